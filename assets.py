@@ -0,0 +1,78 @@
+import pygame
+
+
+class AssetManager:
+    def __init__(self):
+        """
+        Loads every image and font once and shares it between the menu, the world and the player.
+
+        Images are converted to the display's pixel format as soon as a display mode is set, so
+        blits don't pay a per-pixel format conversion. Scaled variants and texture atlases are
+        cached alongside the originals.
+        """
+        self.images = {}  # path -> Surface
+        self.converted = set()  # Paths (and scaled image keys) already in display format
+        self.scaled_images = {}  # (path, size) -> Surface
+        self.atlases = {}  # (paths, tile_size) -> (Surface, [Rect])
+        self.fonts = {}  # (path, size) -> Font
+
+    def image(self, path):
+        """Return the image at path, loading it on first use and converting it once a display exists."""
+        image = self.images.get(path)
+        if image is None:
+            image = pygame.image.load(path)
+            self.images[path] = image
+        if path not in self.converted and pygame.display.get_surface() is not None:
+            # Keep per-pixel alpha for PNGs; JPEGs have none to keep
+            image = image.convert_alpha() if path.lower().endswith('.png') else image.convert()
+            self.images[path] = image
+            self.converted.add(path)
+        return image
+
+    def scaled(self, path, size):
+        """Return the image at path scaled to size, scaling it only the first time."""
+        key = (path, tuple(size))
+        source = self.image(path)
+        image = self.scaled_images.get(key)
+        # Rescale once if the cached variant was made before the original got converted
+        if image is None or (path in self.converted and key not in self.converted):
+            image = pygame.transform.scale(source, size)
+            self.scaled_images[key] = image
+            if path in self.converted:
+                self.converted.add(key)
+        return image
+
+    def atlas(self, paths, tile_size):
+        """
+        Pack square textures side by side into one Surface.
+
+        :param paths: Image paths in atlas order; None leaves an empty slot (e.g. for air).
+        :param tile_size: Width and height of each slot in pixels.
+        :return: (atlas Surface, list of the slot Rect for each path).
+        """
+        key = (tuple(paths), tile_size)
+        if key not in self.atlases:
+            atlas = pygame.Surface((tile_size * len(paths), tile_size), pygame.SRCALPHA)
+            areas = []
+            for slot, path in enumerate(paths):
+                area = pygame.Rect(slot * tile_size, 0, tile_size, tile_size)
+                if path is not None:
+                    atlas.blit(self.scaled(path, (tile_size, tile_size)), area)
+                areas.append(area)
+            if pygame.display.get_surface() is not None:
+                atlas = atlas.convert_alpha()
+            self.atlases[key] = (atlas, areas)
+        return self.atlases[key]
+
+    def font(self, path, size):
+        """Return the font at path in the given size; path None is pygame's default font."""
+        key = (path, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = pygame.font.Font(path, size)
+            self.fonts[key] = font
+        return font
+
+
+# Shared by every module, so each file is decoded once per process
+assets = AssetManager()
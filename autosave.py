@@ -0,0 +1,96 @@
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from profiler import profiler
+
+
+class Autosave:
+    def __init__(self, world, store, interval=30, on_error=None):
+        """
+        Periodic saving that keeps the disk work off the game loop.
+
+        Between frames, the chunks modified since the last save are copied (256 bytes each) and the
+        player's state is packed; compressing and writing them happens on a worker thread while the
+        game carries on with its own copies. Only one save is in flight at a time.
+
+        :param world: World whose modified chunks are saved.
+        :param store: SaveStore the chunks and state are written to.
+        :param interval: Seconds between autosaves.
+        :param on_error: Called with a message when a save fails, e.g. to show it on screen; without it the
+                         failure is raised. The chunks are kept unsaved either way, so the next save retries them.
+        """
+        self.world = world
+        self.store = store
+        self.interval = interval
+        self.on_error = on_error
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending = None  # (future, paged chunks in the snapshot, every chunk position in it) of the running save
+        self.requested = False  # Save at the next frame boundary regardless of the interval
+        self.last_save = time.perf_counter()
+        self.blocked_times = []  # Seconds the main thread spent taking each snapshot
+
+    def request(self):
+        """Save at the next frame boundary."""
+        self.requested = True
+
+    def update(self, player):
+        """Call once per frame, between frames: finishes a completed save and starts one when it is due."""
+        if self.pending is not None and self.pending[0].done():
+            self.finish()
+        if self.pending is None and (self.requested or time.perf_counter() - self.last_save >= self.interval):
+            self.start(player)
+
+    def start(self, player):
+        """Snapshot the unsaved chunks and the player, and hand them to the worker thread."""
+        start = time.perf_counter()
+        loaded, paged = self.world.snapshot_chunks()
+        state = self.store.encode_state(self.world, player)
+        future = self.executor.submit(self.write, loaded, paged, state)
+        self.blocked_times.append(time.perf_counter() - start)
+        self.pending = (future, paged, set(loaded) | set(paged))
+        self.requested = False
+        self.last_save = time.perf_counter()
+
+    def write(self, loaded, paged, state):
+        """Compress and write a snapshot; runs on the worker thread."""
+        chunks = dict(paged)
+        for chunk_pos, blocks in loaded.items():
+            chunks[chunk_pos] = zlib.compress(blocks)
+        self.store.write_chunks(chunks)
+        self.store.write_state(state)
+
+    def finish(self, raise_errors=False):
+        """
+        Wait for the running save; on failure its chunks are marked unsaved again so the next save retries them.
+
+        Whatever the worker raised is raised again here, on the main thread, and reported through on_error
+        unless raise_errors is set or there is no on_error.
+        """
+        future, paged, chunk_positions = self.pending
+        self.pending = None
+        try:
+            future.result()
+        except Exception as error:
+            self.world.unsaved_chunks |= chunk_positions
+            if raise_errors or self.on_error is None:
+                raise
+            self.on_error(f"Autosave failed: {error or type(error).__name__}")
+            return
+        self.world.release_paged(paged)  # On disk now, so they are read back from the store
+        profiler.set_status('autosave', f'{len(chunk_positions)} chunks, blocked {self.blocked_times[-1] * 1000:.2f} ms')
+
+    def close(self, player=None):
+        """
+        Finish the running save, save once more if player is given, and stop the worker thread.
+
+        Nobody is left to see a message by now, so a failed save raises instead of going to on_error.
+        """
+        try:
+            if self.pending is not None:
+                self.finish(raise_errors=True)
+            if player is not None:
+                self.start(player)
+                self.finish(raise_errors=True)
+        finally:
+            self.executor.shutdown()
+            self.store.close()
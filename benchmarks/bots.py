@@ -0,0 +1,29 @@
+from controls import BREAK, JUMP, MOVE_LEFT, MOVE_RIGHT, SELECT_SLOT, StepInput
+
+# Scripted players for exercising the server without anyone at the keyboard, shared by the load test
+# (benchmarks/server.py) and the tests (tests/test_protocol.py, tests/test_controls.py)
+
+
+def bot_step(index, step, pos):
+    """Input of a step of bot index: walk one way in legs of its own length, jumping and digging ahead with each tool."""
+    leg = 90 + 30 * (index % 5)
+    direction = 1 if (step // leg + index) % 2 == 0 else -1
+    held = MOVE_RIGHT if direction > 0 else MOVE_LEFT
+    if (step + index) % 40 == 0:
+        held |= JUMP
+    actions = ()
+    if pos and step % 12 == index % 12:
+        # The bot does not look at what it digs, so it tries the axe, pickaxe and shovel in turn
+        tile_x, tile_y = pos
+        actions = ((SELECT_SLOT, (step // 12) % 3, 0), (BREAK, tile_x + direction, tile_y + (step // 36) % 3))
+    return StepInput(held, actions)
+
+
+def mirror_mismatches(server, client):
+    """Tiles of the client's mirror that differ from the server's blocks, over the chunks it has."""
+    mismatches = 0
+    for chunk_pos, blocks in client.chunks.items():
+        chunk = server.world.chunks.get(chunk_pos)
+        if chunk is not None:
+            mismatches += sum(a != b for a, b in zip(blocks, chunk.blocks))
+    return mismatches
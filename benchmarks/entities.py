@@ -0,0 +1,83 @@
+"""
+Headless timings of the entity step with thousands of dropped items.
+
+Items are dropped over the loaded area around the spawn point; the step is timed while they fall
+(every item in the physics step), once they have settled (only pickups and expiry), and with the
+world render drawing the ones in view. Reuses the percentile summary of benchmarks.frames.
+
+Run from the directory the game is run from, so the assets/ paths resolve:
+
+    python -m benchmarks.entities --counts 1000 5000
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from benchmarks.frames import PERCENTILES, summarize
+from blocks import BLOCK_ICONS
+from main import Game
+
+
+def drop_items(game, count, rng):
+    """Drop count items at random tiles of the sky above the loaded chunks around the spawn point."""
+    world = game.world
+    reach = world.load_radius * world.chunk_size
+    block_types = sorted(BLOCK_ICONS)
+    for _ in range(count):
+        world.entities.spawn_item(rng.choice(block_types), rng.randrange(-reach, reach), rng.randrange(-reach, -8))
+
+
+def bench_entities(game, count, steps):
+    """Time Entities.update while the items fall and after they settle, and the world render over them."""
+    world = game.world
+    drop_items(game, count, random.Random(count))
+    game.player.rect.topleft = (0, world.top_row * world.tile_size)  # Out of reach, so nothing is picked up
+
+    timings = {'falling': [], 'settled': [], 'render': []}
+    for _ in range(steps):
+        world.advance_clock(game.step_time)
+        start = time.perf_counter()
+        world.entities.update([game.player])
+        timings['falling' if world.entities.awake else 'settled'].append(time.perf_counter() - start)
+    while world.entities.awake:  # Let the stragglers land
+        world.entities.update([game.player])
+    for _ in range(steps):
+        start = time.perf_counter()
+        world.entities.update([game.player])
+        timings['settled'].append(time.perf_counter() - start)
+
+    game.camera.offset.update(-game.screen.get_width() // 2, -game.screen.get_height())
+    for _ in range(steps):
+        start = time.perf_counter()
+        world.render(game.screen, game.camera, game.player)
+        timings['render'].append(time.perf_counter() - start)
+    print(f'{count} items: {world.entities.count} left after merging')
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--counts', type=int, nargs='+', default=[1000, 2000, 5000], help='Items dropped per run')
+    parser.add_argument('--steps', type=int, default=120, help='Simulation steps timed per phase')
+    parser.add_argument('--seed', type=int, default=7, help='World seed')
+    args = parser.parse_args()
+
+    results = {}
+    for count in args.counts:
+        for phase, samples in bench_entities(Game(args.seed), count, args.steps).items():
+            if samples:
+                results[f'{phase}/{count}'] = summarize(samples)
+
+    print(f"{'phase':<20} {'samples':>8} {'mean':>8} " + ' '.join(f'{"p" + str(p):>8}' for p in PERCENTILES)
+          + f" {'max':>8}  (ms)")
+    for name, summary in results.items():
+        print(f"{name:<20} {summary['samples']:>8} {summary['mean_ms']:>8.3f} "
+              + ' '.join(f"{summary[f'p{p}_ms']:>8.3f}" for p in PERCENTILES) + f" {summary['max_ms']:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
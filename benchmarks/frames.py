@@ -0,0 +1,166 @@
+"""
+Headless timings of world generation, the player simulation step, world rendering and full game frames.
+
+Runs under SDL's dummy video driver with scripted input, so no window or player is needed.
+Each world size is the load radius in chunks, i.e. a (2r + 1) x (2r + 1) chunk area kept around the player.
+Timings are reported as percentiles and written to a JSON file; passing an earlier file to --compare
+prints the change per phase and exits with status 1 if any median slowed down past --threshold.
+
+Run from the directory the game is run from, so the assets/ paths resolve:
+
+    python -m benchmarks.frames --sizes 2 3 6 --output frames.json
+    python -m benchmarks.frames --output new.json --compare frames.json
+"""
+import argparse
+import json
+import os
+import platform
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+from controls import JUMP, MOVE_LEFT, MOVE_RIGHT, SPRINT, StepInput
+from main import Game
+
+PERCENTILES = (50, 90, 99)
+
+
+def scripted_step(frame):
+    """Input of a frame of a fixed script: walk right then left in 200-frame legs, jumping and sprinting periodically."""
+    held = MOVE_RIGHT if (frame // 200) % 2 == 0 else MOVE_LEFT
+    if frame % 40 == 0:
+        held |= JUMP
+    if frame % 100 < 30:
+        held |= SPRINT
+    return StepInput(held)
+
+
+def timed(function, samples):
+    """Wrap function so the duration of every call is appended to samples, in seconds."""
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        samples.append(time.perf_counter() - start)
+        return result
+    return wrapper
+
+
+def summarize(samples):
+    """Percentiles, mean and max of a list of durations, in milliseconds."""
+    ms = np.array(samples) * 1000
+    summary = {'samples': len(ms), 'mean_ms': float(ms.mean()), 'max_ms': float(ms.max())}
+    for percentile, value in zip(PERCENTILES, np.percentile(ms, PERCENTILES)):
+        summary[f'p{percentile}_ms'] = float(value)
+    return summary
+
+
+def bench_generation(game, repeats):
+    """Time World.generate_world from an empty chunk store."""
+    world = game.world
+    samples = []
+    for _ in range(repeats):
+        world.chunks.clear()
+        start = time.perf_counter()
+        world.generate_world()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_frames(game, frames, warmup):
+    """
+    Play frames scripted frames, timing each whole frame and the phases inside it.
+
+    The first warmup frames are played but not recorded, so one-off chunk baking does not skew the tail.
+    """
+    phases = {'player_update': [], 'handle_collisions': [], 'world_render': []}
+    game.player.update = timed(game.player.update, phases['player_update'])
+    game.player.handle_collisions = timed(game.player.handle_collisions, phases['handle_collisions'])
+    game.world.render = timed(game.world.render, phases['world_render'])
+
+    frame_samples = []
+    for frame in range(warmup + frames):
+        if frame == warmup:
+            for samples in phases.values():
+                samples.clear()
+        start = time.perf_counter()
+        game.handle_events()
+        if not game.update(scripted_step(frame)):
+            raise SystemExit(f'The scripted player died on frame {frame}; try another --seed')
+        game.render()
+        if frame >= warmup:
+            frame_samples.append(time.perf_counter() - start)
+    phases['game_frame'] = frame_samples
+    return phases
+
+
+def compare(results, baseline_path, threshold):
+    """Print the median change of every phase against a baseline file; return True if any regressed."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+    regressed = False
+    print(f"\n{'phase':<32} {'base p50':>10} {'new p50':>10} {'change':>8}")
+    for name, summary in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['p50_ms'], summary['p50_ms']
+        ratio = after / before if before else float('inf')
+        flag = ' REGRESSION' if ratio > threshold else ''
+        regressed |= bool(flag)
+        print(f'{name:<32} {before:>10.3f} {after:>10.3f} {ratio:>7.2f}x{flag}')
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2, 3, 6], help='Chunk load radii to run with')
+    parser.add_argument('--frames', type=int, default=600, help='Recorded frames per size')
+    parser.add_argument('--warmup', type=int, default=60, help='Frames played before recording starts')
+    parser.add_argument('--generation-repeats', type=int, default=10, help='Times generate_world is timed per size')
+    parser.add_argument('--seed', type=int, default=7, help='World seed; the default one keeps the scripted walk clear of hazards')
+    parser.add_argument('--output', default='benchmark.json', help='JSON file the results are written to')
+    parser.add_argument('--compare', help='Earlier results file to compare the medians against')
+    parser.add_argument('--threshold', type=float, default=1.2, help='Median slowdown ratio counted as a regression')
+    args = parser.parse_args()
+
+    results = {}
+    for load_radius in args.sizes:
+        game = Game(args.seed)
+        game.world.load_radius = load_radius
+        game.world.unload_radius = load_radius + 2
+        results[f'generate_world/r{load_radius}'] = summarize(
+            bench_generation(game, args.generation_repeats))
+        for phase, samples in bench_frames(game, args.frames, args.warmup).items():
+            results[f'{phase}/r{load_radius}'] = summarize(samples)
+
+    print(f"{'phase':<32} {'samples':>8} {'mean':>8} " + ' '.join(f'{"p" + str(p):>8}' for p in PERCENTILES)
+          + f" {'max':>8}  (ms)")
+    for name, summary in results.items():
+        print(f"{name:<32} {summary['samples']:>8} {summary['mean_ms']:>8.3f} "
+              + ' '.join(f"{summary[f'p{p}_ms']:>8.3f}" for p in PERCENTILES) + f" {summary['max_ms']:>8.3f}")
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'seed': args.seed,
+            'frames': args.frames,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nWrote {args.output}')
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
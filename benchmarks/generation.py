@@ -0,0 +1,138 @@
+"""
+World generation speed of the vectorized chunk generator, next to the original pure-Python generator.
+
+Prints the generation time per million cells and the share of each block type, so the two
+generators can be checked for producing the same block statistics.
+
+Run from the repository root:
+
+    python -m benchmarks.generation --sizes 200 1000 2000
+"""
+import argparse
+import hashlib
+import os
+import random
+import time
+from collections import Counter
+
+import numpy as np
+
+from blocks import BLOCK_TYPES
+from terrain import TerrainColumns, generate_region
+
+
+def legacy_generate(size):
+    """
+    The original World.generate_world terrain passes for a size x size map, returning rows of block names.
+
+    Only the two data passes are reproduced; the third pass that built a Tile sprite per block is left out.
+    """
+    world_data = [[] for _ in range(size)]
+    cliff_height = size // 2
+
+    for x in range(size):
+        if x > 0:
+            cliff_height += random.choice([-1, 0, 1])
+        for y in range(size):
+            if y > 0 and world_data[y - 1][x] == 'wood' and y < cliff_height:
+                block = 'wood'
+            elif y == cliff_height - 3:
+                block = 'wood' if random.random() < 0.15 else 'air'
+            elif y < cliff_height:
+                block = 'air'
+            elif y == cliff_height:
+                block = 'grass'
+                if world_data[y - 1][x] != 'wood':
+                    if random.random() < 0.08:
+                        world_data[y - 1][x] = 'flower1' if random.random() < 0.5 else 'flower2'
+                    elif random.random() < 0.15:
+                        world_data[y - 1][x] = 'bomb'
+            elif y <= cliff_height + 3:
+                block = 'dirt'
+            elif y < cliff_height + 8:
+                block = 'cobblestone' if random.random() < 0.8 else 'dirt'
+            else:
+                ran = random.random()
+                if ran <= 0.05:
+                    block = 'gem'
+                elif ran <= 0.4:
+                    block = 'cobblestone'
+                elif ran <= 0.7:
+                    block = 'granite'
+                else:
+                    block = 'andesite'
+            world_data[y].append(block)
+
+    for x in range(size):
+        for y in range(size):
+            if world_data[y][x] == 'wood':
+                if y - 2 >= 0 and world_data[y - 2][x] == 'air':
+                    world_data[y - 2][x] = 'leaves'
+                for dx, dy in [(0, -1), (-1, -1), (1, -1), (-1, 0), (1, 0)]:
+                    nx, ny = x + dx, y + dy
+                    if 0 <= nx < size and 0 <= ny < size and world_data[ny][nx] == 'air':
+                        world_data[ny][nx] = 'leaves'
+                break
+    return world_data
+
+
+def vectorized_generate(size, workers, chunk_size=16, seed=0):
+    """Generate the chunks covering a size x size world; returns the block IDs of every chunk in position order."""
+    columns = TerrainColumns(seed, -(size // 4), size // 4)
+    top = -(size // 2)
+    first = top // chunk_size
+    last = (top + size - 1) // chunk_size
+    region = generate_region(columns, first, last, first, last, chunk_size, top, top + size, workers)
+    return b''.join(bytes(region[chunk_pos]) for chunk_pos in sorted(region))
+
+
+def block_shares(counts):
+    """Share of each block type among the non-air blocks; the amount of sky depends on how far the surface wanders."""
+    solid = sum(count for block_type, count in counts.items() if block_type != 'air')
+    return {block_type: counts.get(block_type, 0) / solid for block_type in BLOCK_TYPES[1:]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[200, 1000, 2000], help='World widths (and heights) in tiles')
+    parser.add_argument('--legacy-limit', type=int, default=1000, help='Largest size the legacy generator is run for')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count()],
+                        help='Process pool sizes to generate with; every size must give byte-identical worlds. '
+                             'The in-process run (1) is always included, as the baseline the others are compared to')
+    args = parser.parse_args()
+    worker_counts = [1] + [workers for workers in args.workers if workers != 1]
+
+    for size in args.sizes:
+        cells = size * size
+        digests = set()
+        timings = {}  # Workers -> seconds
+        for workers in worker_counts:
+            start = time.perf_counter()
+            world = vectorized_generate(size, workers)
+            elapsed = timings[workers] = time.perf_counter() - start
+            digests.add(hashlib.sha256(world).hexdigest())
+            # Pool runs include starting the pool, as the game pays for it too
+            speedup = '' if workers == 1 else f' ({timings[1] / elapsed:.1f}x the in-process speed)'
+            print(f'{size}x{size}: vectorized, {workers} worker(s) {elapsed:.3f}s, '
+                  f'{elapsed / len(world) * 1e6:.3f}s per million cells{speedup}')
+        if len(digests) != 1:
+            raise SystemExit(f'{size}x{size}: worker counts produced different worlds')
+        print(f'{size}x{size}: identical output for every worker count (sha256 {digests.pop()[:16]})')
+
+        ids = np.frombuffer(world, dtype=np.uint8)
+        new_shares = block_shares({BLOCK_TYPES[i]: n for i, n in enumerate(np.bincount(ids, minlength=len(BLOCK_TYPES)))})
+
+        if size <= args.legacy_limit:
+            start = time.perf_counter()
+            world_data = legacy_generate(size)
+            legacy_elapsed = time.perf_counter() - start
+            legacy_shares = block_shares(Counter(block for row in world_data for block in row))
+            print(f'{size}x{size}: legacy     {legacy_elapsed:.3f}s, {legacy_elapsed / cells * 1e6:.3f}s per million cells '
+                  f'({legacy_elapsed / cells / (timings[1] / len(world)):.1f}x the in-process vectorized time per cell)')
+            print(f"  {'block':<12} {'vectorized':>10} {'legacy':>10}")
+            for block_type in BLOCK_TYPES[1:]:
+                print(f'  {block_type:<12} {new_shares[block_type]:>10.4%} {legacy_shares[block_type]:>10.4%}')
+
+
+if __name__ == '__main__':
+    main()
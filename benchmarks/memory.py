@@ -0,0 +1,94 @@
+"""
+Memory used by the chunked block-ID storage compared with the old one-Sprite-per-tile layout.
+
+Run from the repository root:
+
+    python -m benchmarks.memory --sizes 200 2000
+"""
+import argparse
+import tracemalloc
+
+import pygame
+
+from blocks import AIR
+from chunk import Chunk
+from terrain import TerrainColumns, generate_region
+
+
+class LegacyTile(pygame.sprite.Sprite):
+    """The per-tile sprite the world used to store for every non-air cell."""
+
+    def __init__(self, x, y, tile_type, texture, tile_size):
+        super().__init__()
+        self.image = texture
+        self.rect = self.image.get_rect(topleft=(x * tile_size, y * tile_size))
+        self.tile_type = tile_type
+
+
+def generate_chunks(size, chunk_size=16, seed=0):
+    """Generate the chunks covering a size x size tile world centred on the origin."""
+    columns = TerrainColumns(seed, -(size // 4), size // 4)
+    top = -(size // 2)
+    first = top // chunk_size
+    last = (top + size - 1) // chunk_size
+    region = generate_region(columns, first, last, first, last, chunk_size, top, top + size, workers=1)
+    return {chunk_pos: Chunk(*chunk_pos, chunk_size, blocks) for chunk_pos, blocks in region.items()}
+
+
+def measure_chunks(size):
+    """Return (bytes used by the chunk dict, number of non-air tiles)."""
+    generate_chunks(32)  # Warm up numpy so its one-off allocations are not counted
+    tracemalloc.start()
+    chunks = generate_chunks(size)
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return used, sum(chunk.block_count for chunk in chunks.values())
+
+
+def measure_legacy(size):
+    """Return (bytes used by a Group plus a tile_map dict of LegacyTile, number of tiles)."""
+    chunks = generate_chunks(size)
+    texture = pygame.Surface((32, 32))
+    tracemalloc.start()
+    tiles = pygame.sprite.Group()
+    tile_map = {}
+    for chunk in chunks.values():
+        for index, block in enumerate(chunk.blocks):
+            if block != AIR:
+                x = chunk.origin_x + index % chunk.size
+                y = chunk.origin_y + index // chunk.size
+                tile = LegacyTile(x, y, block, texture, 32)
+                tiles.add(tile)
+                tile_map[(x, y)] = tile
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return used, len(tile_map)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[200, 2000], help='World widths (and heights) in tiles')
+    parser.add_argument('--legacy-limit', type=int, default=500,
+                        help='Largest size the legacy layout is built for; larger sizes are extrapolated per tile')
+    args = parser.parse_args()
+
+    sample_per_tile = None
+    print(f"{'size':>6} {'tiles':>10} {'chunks':>12} {'B/tile':>7} {'legacy':>12} {'B/tile':>7} {'ratio':>7}")
+    for size in args.sizes:
+        chunk_bytes, tiles = measure_chunks(size)
+        if size <= args.legacy_limit:
+            legacy_bytes, _ = measure_legacy(size)
+            sample_per_tile = legacy_bytes / tiles
+            note = ''
+        else:
+            if sample_per_tile is None:
+                legacy_sample, sample_tiles = measure_legacy(min(200, args.legacy_limit))
+                sample_per_tile = legacy_sample / sample_tiles
+            legacy_bytes = int(sample_per_tile * tiles)
+            note = ' (extrapolated)'
+        print(f"{size:>6} {tiles:>10} {chunk_bytes / 2**20:>10.2f}MB {chunk_bytes / tiles:>7.1f} "
+              f"{legacy_bytes / 2**20:>10.2f}MB {legacy_bytes / tiles:>7.1f} {legacy_bytes / chunk_bytes:>6.0f}x{note}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Load test of the multiplayer server: step time and bandwidth per client as the number of clients grows.
+
+For each client count a server is started on loopback in this process and that many headless clients
+connect to it, each playing a fixed script: walking in its own direction, jumping and mining a tunnel.
+The server step (simulation and streaming) is timed after a warmup, bandwidth is reported per client
+for joining (the first snapshots) and per second afterwards, and at the end every client's mirror is
+checked against the server's blocks. Reuses the percentile summary of benchmarks.frames.
+
+Run from the directory the game is run from, so the assets/ paths resolve:
+
+    python -m benchmarks.server --clients 1 4 16
+"""
+import argparse
+import asyncio
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from benchmarks.bots import bot_step, mirror_mismatches
+from benchmarks.frames import PERCENTILES, summarize
+from client import HeadlessClient
+from controls import StepInput
+from savegame import parse_seed
+from server import GameServer
+
+
+async def bench_clients(count, seconds, warmup, seed):
+    """Run count scripted clients against a fresh server; returns the step times and the traffic per client."""
+    server = GameServer(seed)
+    port = await server.start()
+    clients = [HeadlessClient() for _ in range(count)]
+    for client in clients:
+        await client.connect('127.0.0.1', port)
+
+    step_time = server.step_time
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    joined = None
+    for step in range(int((warmup + seconds) / step_time)):
+        if step == int(warmup / step_time):
+            server.step_times.clear()
+            joined = [(client.bytes_received, client.bytes_sent) for client in clients]
+        for index, client in enumerate(clients):
+            client.send_input(bot_step(index, step, client.get_pos()))
+        await asyncio.sleep(max(start + (step + 1) * step_time - loop.time(), 0))
+    step_times = list(server.step_times)
+    down = sum(client.bytes_received - received for client, (received, _) in zip(clients, joined)) / count / seconds
+    up = sum(client.bytes_sent - sent for client, (_, sent) in zip(clients, joined)) / count / seconds
+    join = sum(received for received, _ in joined) / count
+
+    # Stop the input and let the last changes settle and reach everyone before comparing
+    for client in clients:
+        client.send_input(StepInput())
+    await asyncio.sleep(1)
+    server.task.cancel()
+    await asyncio.sleep(0.2)
+    mismatches = sum(mirror_mismatches(server, client) for client in clients)
+
+    for client in clients:
+        await client.close()
+    await server.close()
+    return step_times, {'join_kb': join / 1024, 'down_kb_s': down / 1024, 'up_b_s': up, 'mismatches': mismatches}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 2, 4, 8, 16], help='Client counts to run with')
+    parser.add_argument('--seconds', type=float, default=10, help='Seconds recorded per client count')
+    parser.add_argument('--warmup', type=float, default=2, help='Seconds played before recording starts')
+    parser.add_argument('--seed', type=parse_seed, default=7, help='World seed')
+    args = parser.parse_args()
+
+    print(f"{'clients':>7} {'steps':>6} {'mean':>8} " + ' '.join(f'{"p" + str(p):>8}' for p in PERCENTILES)
+          + f" {'max':>8}  (ms) {'join KB':>8} {'down KB/s':>10} {'up B/s':>8} {'mismatches':>10}")
+    for count in args.clients:
+        step_times, traffic = asyncio.run(bench_clients(count, args.seconds, args.warmup, args.seed))
+        summary = summarize(step_times)
+        print(f"{count:>7} {summary['samples']:>6} {summary['mean_ms']:>8.3f} "
+              + ' '.join(f"{summary[f'p{p}_ms']:>8.3f}" for p in PERCENTILES) + f" {summary['max_ms']:>8.3f}      "
+              + f"{traffic['join_kb']:>8.1f} {traffic['down_kb_s']:>10.2f} {traffic['up_b_s']:>8.1f} "
+              + f"{traffic['mismatches']:>10}")
+
+
+if __name__ == '__main__':
+    main()
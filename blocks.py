@@ -0,0 +1,96 @@
+# Block registry: each block type has a small integer ID, stored as one byte per tile in the chunks, and
+# its behaviour is kept in tables indexed by that ID so physics and mining do integer lookups, not string checks.
+# IDs are registration order, so new types must be registered last to keep existing IDs (and saves) stable.
+
+# Items that can break blocks, as bits so a block's breaking items fit in one integer
+AXE = 1
+PICKAXE = 2
+SHOVEL = 4
+OTHER_ITEM = 8  # Anything else held, such as a block
+ALL_TOOLS = AXE | PICKAXE | SHOVEL
+ANY_ITEM = ALL_TOOLS | OTHER_ITEM
+TOOL_BITS = {'axe': AXE, 'pickaxe': PICKAXE, 'shovel': SHOVEL}
+
+BLOCK_TYPES = []  # Type name of each ID
+BLOCK_IDS = {}  # Type name -> ID
+SOLID = bytearray()  # 1 if the player collides with the block
+HAZARD = bytearray()  # 1 if touching the block costs a life and sets it off
+BREAK_ITEMS = []  # Bits of the items that break the block; 0 if it cannot be broken
+DROPS = bytearray()  # ID of the block added to the inventory when it is broken; AIR for nothing
+FALLS = bytearray()  # 1 if the block falls when there is nothing solid beneath it
+FLUID_LEVEL = bytearray()  # 0 for blocks that are not fluids, FLUID_SOURCE for a source, 1 to FLUID_SOURCE - 1 for flowing fluid
+LIGHT_EMISSION = bytearray()  # Block light level the block gives off, 0 to MAX_LIGHT
+LIGHT_OPACITY = bytearray()  # Light levels lost leaving the block, on top of the 1 lost per tile
+BLOCK_TEXTURES = []  # Texture drawn in the world, None for air
+BLOCK_ICONS = {}  # Type name -> texture shown in the inventory and in the player's hand
+
+FLUID_SOURCE = 8  # Fluid level of a source; flowing fluid loses a level per tile it spreads sideways
+MAX_LIGHT = 15  # Light level of open sky at noon (see lighting.py)
+SOLID_OPACITY = 3  # Default opacity of solid blocks: light reaches a few tiles into the ground
+
+
+def register_block(name, texture, solid=True, hazard=False, break_items=0, drop=True, icon=None, falls=False,
+                   fluid_level=0, light=0, opacity=None):
+    """
+    Add a block type and return its ID.
+
+    :param texture: Path of the texture drawn in the world.
+    :param break_items: Bits (AXE, PICKAXE, SHOVEL, OTHER_ITEM) of the held items that break the block.
+    :param drop: True to drop the block itself when broken, None for nothing, or the name of another block.
+    :param icon: Inventory texture, if it differs from the world texture.
+    :param falls: Whether the block falls into air or fluid beneath it (see physics.py).
+    :param fluid_level: Fluid level, for the fluid block types (see FLUID_LEVEL).
+    :param light: Block light level the block gives off.
+    :param opacity: Light levels lost leaving the block; SOLID_OPACITY for solid blocks and 0 for
+                    the others when None.
+    """
+    block_id = len(BLOCK_TYPES)
+    BLOCK_TYPES.append(name)
+    BLOCK_IDS[name] = block_id
+    SOLID.append(solid)
+    HAZARD.append(hazard)
+    BREAK_ITEMS.append(break_items)
+    DROPS.append(block_id if drop is True else BLOCK_IDS['air'] if drop is None else BLOCK_IDS[drop])
+    FALLS.append(falls)
+    FLUID_LEVEL.append(fluid_level)
+    LIGHT_EMISSION.append(light)
+    LIGHT_OPACITY.append((SOLID_OPACITY if solid else 0) if opacity is None else opacity)
+    BLOCK_TEXTURES.append(texture)
+    if texture is not None:
+        BLOCK_ICONS[name] = icon or texture
+    return block_id
+
+
+AIR = register_block('air', None, solid=False, drop=None)
+register_block('grass', 'assets/blocks/grass.png', break_items=SHOVEL, falls=True)
+register_block('dirt', 'assets/blocks/dirt.png', break_items=SHOVEL, falls=True)
+register_block('cobblestone', 'assets/blocks/cobblestone.png', break_items=PICKAXE)
+register_block('gem', 'assets/blocks/diamond_ore.png', break_items=PICKAXE, icon='assets/blocks/diamond.png',
+               light=8, opacity=1)  # Glowing ore, letting its glow out
+register_block('granite', 'assets/blocks/granite.png', break_items=PICKAXE)
+register_block('andesite', 'assets/blocks/andesite.png', break_items=PICKAXE)
+register_block('wood', 'assets/blocks/wood.png', break_items=AXE)
+register_block('leaves', 'assets/blocks/leaves.png', break_items=ANY_ITEM, drop=None, opacity=1)
+register_block('flower1', 'assets/blocks/flower1.png', solid=False, break_items=ALL_TOOLS)
+register_block('flower2', 'assets/blocks/flower2.png', solid=False, break_items=ALL_TOOLS)
+register_block('bomb', 'assets/blocks/shrooms.png', solid=False, hazard=True, break_items=ANY_ITEM, drop=None,
+               light=8)
+# Water: a source, then one type per level of flowing water, so a tile's level fits in its block ID
+WATER = register_block('water', 'assets/blocks/water.png', solid=False, drop=None, fluid_level=FLUID_SOURCE, opacity=1)
+FLOWING_WATER = [AIR] + [register_block(f'flowing_water_{level}', 'assets/blocks/water.png', solid=False, drop=None,
+                                        fluid_level=level, opacity=1) for level in range(1, FLUID_SOURCE)]  # By level
+
+
+def item_bit(item):
+    """Return the bit of a held item for BREAK_ITEMS: its tool bit, or OTHER_ITEM for anything else."""
+    return TOOL_BITS.get(item, OTHER_ITEM)
+
+
+def block_id(block_type):
+    """Return the ID of a block type; None stands for air."""
+    return AIR if block_type is None else BLOCK_IDS[block_type]
+
+
+def block_type(block_id):
+    """Return the type name of a block ID, or None for air."""
+    return None if block_id == AIR else BLOCK_TYPES[block_id]
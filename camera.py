@@ -1,10 +1,11 @@
 import pygame
 
+
 class Camera:
     def __init__(self, width, height):
         """
         Initialize the camera.
-        
+
         :param width: Width of the camera viewport (screen width).
         :param height: Height of the camera viewport (screen height).
         :param world_width: Total width of the game world.
@@ -14,11 +15,23 @@ class Camera:
         self.height = height
         self.offset = pygame.math.Vector2()
 
-    def update(self, player):
+    def resize(self, width, height):
+        """Change the viewport size, e.g. after the window was resized."""
+        self.width = width
+        self.height = height
+
+    def viewport(self):
+        """Return the area of the world the camera shows, as a pixel rect in world coordinates."""
+        return pygame.Rect(int(self.offset.x), int(self.offset.y), self.width, self.height)
+
+    def update(self, player, alpha=1.0):
         """
         Update the camera's position to follow the player.
-        
+
         :param player: The player object.
+        :param alpha: How far between the player's last two simulation steps to follow, from 0 to 1.
         """
-        self.offset.x = player.rect.centerx - self.width // 2
-        self.offset.y = player.rect.centery - self.height // 2
+        position = player.interpolated_pos(alpha)
+        # Whole pixels, so the world and the player snap to the same grid and do not jitter against each other
+        self.offset.x = round(position.x) + player.rect.width // 2 - self.width // 2
+        self.offset.y = round(position.y) + player.rect.height // 2 - self.height // 2
@@ -0,0 +1,42 @@
+from blocks import AIR
+
+
+class Chunk:
+    def __init__(self, chunk_x, chunk_y, size, blocks=None):
+        """
+        A fixed-size square of tiles that is generated, kept and evicted as a unit.
+
+        Tiles are stored as one block ID byte each, row by row, so a 16x16 chunk is 256 bytes.
+
+        :param chunk_x: Horizontal chunk coordinate (tile x // size).
+        :param chunk_y: Vertical chunk coordinate (tile y // size).
+        :param size: Width and height of the chunk in tiles.
+        :param blocks: Optional initial block IDs, size * size bytes in row-major order.
+        """
+        self.chunk_x = chunk_x
+        self.chunk_y = chunk_y
+        self.size = size
+        self.origin_x = chunk_x * size  # Tile coordinates of the top-left tile
+        self.origin_y = chunk_y * size
+        self.blocks = bytearray(size * size) if blocks is None else bytearray(blocks)
+        self.block_count = len(self.blocks) - self.blocks.count(AIR)  # Number of non-air tiles
+        self.modified = False  # True once the chunk differs from what generation produced
+        self.sky_light = None  # Light level of each tile in the two channels, set once lit (see lighting.py)
+        self.block_light = None
+
+    def get(self, tile_x, tile_y):
+        """Return the block ID at a tile position inside the chunk."""
+        return self.blocks[(tile_y - self.origin_y) * self.size + tile_x - self.origin_x]
+
+    def set(self, tile_x, tile_y, block_id):
+        """Store a block ID at a tile position inside the chunk."""
+        index = (tile_y - self.origin_y) * self.size + tile_x - self.origin_x
+        previous = self.blocks[index]
+        if previous == block_id:
+            return
+        if previous == AIR:
+            self.block_count += 1
+        elif block_id == AIR:
+            self.block_count -= 1
+        self.blocks[index] = block_id
+        self.modified = True
@@ -0,0 +1,107 @@
+from collections import OrderedDict
+import pygame
+from blocks import MAX_LIGHT
+from lighting import SHADES
+
+
+class ChunkSurfaceCache:
+    def __init__(self, atlas, atlas_areas, tile_size, chunk_size, lighting, max_surfaces=24):
+        """
+        Keeps each chunk's tiles pre-composited into one Surface, so a frame is a few large blits.
+
+        Tiles are baked already shaded by their light level, from one pre-shaded copy of the atlas per
+        level, and dark air is baked as translucent black over whatever is drawn behind the chunk; so
+        lighting costs nothing per frame, only a re-bake when a chunk's light or the time of day changes.
+        A change in the time of day affects every chunk at once, so those re-bakes are spread over a few
+        frames (see rebake_stale) rather than all landing in one.
+
+        :param atlas: Texture atlas holding every block texture.
+        :param atlas_areas: Rect of each block ID's texture within the atlas.
+        :param tile_size: Size of a tile in pixels.
+        :param chunk_size: Width and height of a chunk in tiles.
+        :param lighting: Lighting giving the level each tile is drawn at.
+        :param max_surfaces: Number of baked surfaces kept in memory; the least recently drawn go first.
+        """
+        self.atlas = atlas
+        self.shaded_atlases = []  # Copy of the atlas for each light level, darkened to its shade
+        for shade in SHADES:
+            shaded = atlas.copy()
+            shaded.fill((shade, shade, shade), special_flags=pygame.BLEND_RGB_MULT)
+            self.shaded_atlases.append(shaded)
+        self.lighting = lighting
+        self.atlas_areas = atlas_areas
+        self.tile_size = tile_size
+        self.chunk_size = chunk_size
+        self.max_surfaces = max_surfaces
+        self.surfaces = OrderedDict()  # (chunk_x, chunk_y) -> Surface, least recently used first
+        self.dirty = set()  # Cached chunks whose tiles changed since they were baked
+        self.stale = set()  # Cached chunks baked for an earlier time of day, drawn as they are until re-baked
+        self.max_stale_bakes = 4  # Stale chunks re-baked per frame
+
+    def mark_dirty(self, chunk_pos):
+        """Re-bake the chunk's surface the next time it is drawn."""
+        if chunk_pos in self.surfaces:
+            self.dirty.add(chunk_pos)
+
+    def mark_all_stale(self):
+        """Re-bake every cached surface over the next frames, e.g. when the time of day dims the light."""
+        self.stale.update(self.surfaces)
+
+    def rebake_stale(self, chunks):
+        """
+        Re-bake up to max_stale_bakes stale surfaces, the most recently drawn first; call once per frame.
+
+        :param chunks: Loaded chunks by position; stale surfaces of chunks not loaded are left for later.
+        :return: Positions of the chunks re-baked, whose areas need redrawing.
+        """
+        rebaked = []
+        for chunk_pos in reversed(self.surfaces):
+            if len(rebaked) == self.max_stale_bakes:
+                break
+            if chunk_pos in self.stale and chunk_pos in chunks:
+                self.bake(chunks[chunk_pos], self.surfaces[chunk_pos])
+                rebaked.append(chunk_pos)
+        self.stale.difference_update(rebaked)
+        return rebaked
+
+    def get_surface(self, chunk):
+        """Return the baked surface of a chunk, baking it first if it is missing or dirty."""
+        chunk_pos = (chunk.chunk_x, chunk.chunk_y)
+        surface = self.surfaces.get(chunk_pos)
+        if surface is None:
+            if len(self.surfaces) >= self.max_surfaces:
+                evicted, surface = self.surfaces.popitem(last=False)  # Reuse the least recently used surface
+                self.dirty.discard(evicted)
+                self.stale.discard(evicted)
+            else:
+                size = self.chunk_size * self.tile_size
+                surface = pygame.Surface((size, size), pygame.SRCALPHA)
+            self.surfaces[chunk_pos] = surface
+        else:
+            self.surfaces.move_to_end(chunk_pos)
+            if chunk_pos not in self.dirty:
+                return surface
+        self.bake(chunk, surface)
+        self.dirty.discard(chunk_pos)
+        self.stale.discard(chunk_pos)
+        return surface
+
+    def bake(self, chunk, surface):
+        """
+        Draw every tile of the chunk onto the surface, shaded by its light level. Air is left transparent
+        where it is open to the sky, whose color already follows the time of day, and shaded elsewhere.
+        """
+        surface.fill((0, 0, 0, 0))
+        size = self.chunk_size
+        tile_size = self.tile_size
+        atlases = self.shaded_atlases
+        areas = self.atlas_areas
+        levels = self.lighting.levels(chunk)
+        surface.blits([(atlases[levels[index]], ((index % size) * tile_size, (index // size) * tile_size), areas[block])
+                       for index, block in enumerate(chunk.blocks) if block],
+                      doreturn=False)
+        sky = chunk.sky_light
+        for index, block in enumerate(chunk.blocks):
+            if not block and sky[index] < MAX_LIGHT:
+                surface.fill((0, 0, 0, 255 - SHADES[levels[index]]),
+                             ((index % size) * tile_size, (index // size) * tile_size, tile_size, tile_size))
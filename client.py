@@ -0,0 +1,92 @@
+import asyncio
+from protocol import (CHUNK, DELTA, FORGET, FRAME, PLAYERS, TILE_SIZE, WELCOME, WELCOME_BODY, ProtocolError, decode_chunk,
+                      decode_delta, decode_forget, decode_players, encode_hello, encode_input, read_message)
+
+
+class HeadlessClient:
+    def __init__(self):
+        """
+        Network client without a window: it sends input and keeps a mirror of what the server streams.
+
+        The mirror holds the block IDs of the chunks in view, as snapshots patched by every delta, and
+        the position and lives of every player. Nothing is simulated or drawn here, so many clients can
+        run in one process, e.g. to load-test the server (see benchmarks/server.py).
+        """
+        self.player_id = None
+        self.seed = None
+        self.steps_per_second = None
+        self.chunk_size = None
+        self.chunks = {}  # Chunk position -> bytearray of block IDs, row by row
+        self.players = {}  # Player ID -> (x, y, lives), x and y in pixels
+        self.step = 0  # Server step the mirror is up to date with
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.last_input = None
+        self.reader = None
+        self.writer = None
+        self.task = None
+
+    async def connect(self, host, port):
+        """Connect and shake hands, then keep the mirror up to date in the background."""
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.send(encode_hello())
+        message_type, payload = await read_message(self.reader)
+        self.bytes_received += FRAME.size + len(payload)
+        if message_type != WELCOME or len(payload) != WELCOME_BODY.size:
+            raise ProtocolError('Expected WELCOME')
+        self.player_id, self.seed, self.steps_per_second, self.chunk_size, _, _ = WELCOME_BODY.unpack(payload)
+        self.task = asyncio.create_task(self.receive())
+
+    async def close(self):
+        self.writer.close()
+        if self.task:
+            self.task.cancel()
+
+    def send(self, data):
+        self.writer.write(data)
+        self.bytes_sent += len(data)
+
+    def send_input(self, step_input):
+        """Send a StepInput; it is skipped when only the same keys are held as in the last one sent."""
+        if step_input.actions or step_input.held != self.last_input:
+            self.send(encode_input(step_input))
+            self.last_input = step_input.held
+
+    async def receive(self):
+        try:
+            while True:
+                message_type, payload = await read_message(self.reader)
+                self.bytes_received += FRAME.size + len(payload)
+                self.handle_message(message_type, payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    def handle_message(self, message_type, payload):
+        if message_type == CHUNK:
+            chunk_pos, blocks = decode_chunk(payload)
+            self.chunks[chunk_pos] = blocks
+        elif message_type == FORGET:
+            self.chunks.pop(decode_forget(payload), None)
+        elif message_type == DELTA:
+            self.step, changes = decode_delta(payload)
+            size = self.chunk_size
+            for tile_x, tile_y, block in changes:
+                blocks = self.chunks.get((tile_x // size, tile_y // size))
+                if blocks is not None:
+                    blocks[(tile_y % size) * size + tile_x % size] = block
+        elif message_type == PLAYERS:
+            self.step, players = decode_players(payload)
+            self.players = {player_id: (x, y, lives) for player_id, x, y, lives in players}
+        else:
+            raise ProtocolError(f'Unexpected message type {message_type}')
+
+    def get_block_id(self, tile_x, tile_y):
+        """Return the mirrored block ID at a tile, or None if its chunk is not in view."""
+        size = self.chunk_size
+        blocks = self.chunks.get((tile_x // size, tile_y // size))
+        return None if blocks is None else blocks[(tile_y % size) * size + tile_x % size]
+
+    def get_pos(self):
+        """Tile of the top-left corner of this client's own player, as last sent, or None before the first PLAYERS."""
+        player = self.players.get(self.player_id)
+        return None if player is None else (player[0] // TILE_SIZE, player[1] // TILE_SIZE)
@@ -0,0 +1,156 @@
+import struct
+import zlib
+import pygame
+
+# Held actions, as bits of StepInput.held: true for every simulation step while their key is down
+MOVE_LEFT = 1
+MOVE_RIGHT = 2
+SPRINT = 4
+JUMP = 8
+HELD_ACTIONS = {'move_left': MOVE_LEFT, 'move_right': MOVE_RIGHT, 'sprint': SPRINT, 'jump': JUMP}
+
+# Edge-triggered actions, delivered to one simulation step as (action, a, b) each time their key or button goes down
+SELECT_SLOT = 1  # a: hotbar slot, from 0
+BREAK = 2  # a, b: tile position
+PLACE = 3  # a, b: tile position
+STEP_ACTIONS = {f'hotbar_{slot + 1}': slot for slot in range(10)}
+
+# Interface commands: handled by the game between steps and never recorded, since they do not change the simulation
+COMMANDS = ('toggle_profiler', 'save')
+
+DEFAULT_BINDINGS = {
+    pygame.K_a: 'move_left',
+    pygame.K_d: 'move_right',
+    pygame.K_LSHIFT: 'sprint',
+    pygame.K_SPACE: 'jump',
+    **{getattr(pygame, f'K_{slot}'): f'hotbar_{slot}' for slot in range(1, 10)},
+    pygame.K_0: 'hotbar_10',  # 0 comes after 9 on the keyboard, as it does on the hotbar
+    pygame.K_F3: 'toggle_profiler',
+    pygame.K_F5: 'save',
+}
+DEFAULT_MOUSE_BINDINGS = {1: 'break', 3: 'place'}
+
+# Recordings: a header, then the zlib-compressed steps. Each step is its held bits and number of actions,
+# followed by that many actions
+RECORDING_MAGIC = b'BMIN'
+RECORDING_HEADER = struct.Struct('<4sHq')  # Magic, version, world seed
+RECORDING_STEP = struct.Struct('<BH')  # Held bits, number of actions
+RECORDING_ACTION = struct.Struct('<Bii')
+RECORDING_VERSION = 2
+MAX_STEP_ACTIONS = 0xFFFF  # Most actions one step holds, as RECORDING_STEP counts them; any more wait for the next step
+
+
+class StepInput:
+    __slots__ = ('held', 'actions')
+
+    def __init__(self, held=0, actions=()):
+        """
+        The input of one simulation step.
+
+        :param held: Bits of the held actions (MOVE_LEFT, MOVE_RIGHT, SPRINT, JUMP).
+        :param actions: (action, a, b) tuples of the edge-triggered actions, in the order they happened.
+        """
+        self.held = held
+        self.actions = actions
+
+
+class Controls:
+    def __init__(self, bindings=None, mouse_bindings=None):
+        """
+        Turns pygame events into game actions through binding tables.
+
+        Held actions follow KEYDOWN/KEYUP, so holding a key is a single state change rather than a
+        repeat every frame; everything else fires once per press. Step actions wait in a queue until
+        the next simulation step takes them, so each press lands on exactly one step.
+
+        :param bindings: Key -> action name; DEFAULT_BINDINGS when None.
+        :param mouse_bindings: Mouse button -> 'break' or 'place'; DEFAULT_MOUSE_BINDINGS when None.
+        """
+        self.bindings = DEFAULT_BINDINGS if bindings is None else bindings
+        self.mouse_bindings = DEFAULT_MOUSE_BINDINGS if mouse_bindings is None else mouse_bindings
+        self.held = 0
+        self.queued = []
+        self.recording = None  # Encoded steps while recording, see start_recording
+
+    def handle_event(self, event, world, camera):
+        """Process one pygame event; returns the interface command it triggers, or None."""
+        if event.type == pygame.KEYDOWN or event.type == pygame.KEYUP:
+            action = self.bindings.get(event.key)
+            if action in HELD_ACTIONS:
+                if event.type == pygame.KEYDOWN:
+                    self.held |= HELD_ACTIONS[action]
+                else:
+                    self.held &= ~HELD_ACTIONS[action]
+            elif event.type == pygame.KEYDOWN:
+                if action in STEP_ACTIONS:
+                    self.queued.append((SELECT_SLOT, STEP_ACTIONS[action], 0))
+                elif action in COMMANDS:
+                    return action
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            action = self.mouse_bindings.get(event.button)
+            if action is not None:
+                # Converted to a tile now, with the camera the player was looking through, so replays
+                # do not depend on where the camera happens to be when the step runs
+                tile_x, tile_y = world.screen_to_tile(camera, event.pos)
+                self.queued.append((BREAK if action == 'break' else PLACE, tile_x, tile_y))
+        return None
+
+    def release_all(self):
+        """Forget held keys, e.g. when the window loses focus and their KEYUP events will not arrive."""
+        self.held = 0
+
+    def next_step(self):
+        """Return the StepInput for the next simulation step, recording it if a recording is running."""
+        step = StepInput(self.held, self.queued[:MAX_STEP_ACTIONS])
+        self.queued = self.queued[MAX_STEP_ACTIONS:]
+        if self.recording is not None:
+            self.recording.append(encode_step(step))
+        return step
+
+    def start_recording(self):
+        self.recording = []
+
+    def save_recording(self, path, seed):
+        """Write the steps recorded so far to a file, with the world seed they were played on."""
+        with open(path, 'wb') as f:
+            f.write(RECORDING_HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION, seed))
+            f.write(zlib.compress(b''.join(self.recording), 9))
+
+
+class Replay:
+    def __init__(self, path):
+        """
+        Steps of a recording, fed back one per simulation step in place of live input.
+
+        :param path: File written by Controls.save_recording.
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, self.seed = RECORDING_HEADER.unpack_from(data)
+        if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+            raise ValueError(f'{path} is not a compatible input recording')
+        self.data = zlib.decompress(data[RECORDING_HEADER.size:])
+        self.offset = 0
+
+    def next_step(self):
+        """Return the next recorded StepInput, or None once the recording is over."""
+        if self.offset >= len(self.data):
+            return None
+        step, self.offset = decode_step(self.data, self.offset)
+        return step
+
+
+def encode_step(step):
+    return RECORDING_STEP.pack(step.held, len(step.actions)) + b''.join(
+        RECORDING_ACTION.pack(*action) for action in step.actions)
+
+
+def decode_step(data, offset=0):
+    """Read a StepInput written by encode_step at an offset of data; returns (step, offset just past it)."""
+    held, count = RECORDING_STEP.unpack_from(data, offset)
+    offset += RECORDING_STEP.size
+    actions = []
+    for _ in range(count):
+        actions.append(RECORDING_ACTION.unpack_from(data, offset))
+        offset += RECORDING_ACTION.size
+    return StepInput(held, actions), offset
@@ -0,0 +1,93 @@
+from blocks import block_id
+
+
+class WorldEdit:
+    def __init__(self, world):
+        """
+        A batch of block changes that is applied to the world all at once, as a transaction.
+
+        Changes are buffered (reads see them), and apply writes them chunk by chunk and then sends
+        one change notification per affected chunk (see World.chunk_changed): one re-bake, one dirty
+        area, one wake-up of the entities and physics there, however many tiles changed. Used as a
+        context manager, the edit is applied when the block exits and dropped if it raises.
+
+        :param world: World the changes are made to.
+        """
+        self.world = world
+        self.changes = {}  # (tile_x, tile_y) -> block ID, the last write to a tile winning
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.apply()
+        return False
+
+    def in_world(self, tile_y):
+        return self.world.top_row <= tile_y < self.world.top_row + self.world.world_height
+
+    def get(self, tile_x, tile_y):
+        """Return the block ID at a tile as it will be once the edit is applied."""
+        block = self.changes.get((tile_x, tile_y))
+        return self.world.get_block_id(tile_x, tile_y) if block is None else block
+
+    def set(self, tile_x, tile_y, block_type):
+        """Set a tile to a block type, or to air when block_type is None; tiles outside the world are ignored."""
+        if self.in_world(tile_y):
+            self.changes[(tile_x, tile_y)] = block_id(block_type)
+
+    def fill(self, left, top, right, bottom, block_type):
+        """Set every tile of the inclusive tile rectangle from (left, top) to (right, bottom)."""
+        for tile_y in range(top, bottom + 1):
+            for tile_x in range(left, right + 1):
+                self.set(tile_x, tile_y, block_type)
+
+    def replace(self, left, top, right, bottom, old_type, new_type):
+        """Turn the old_type blocks of the inclusive tile rectangle into new_type; None stands for air."""
+        old = block_id(old_type)
+        for tile_y in range(top, bottom + 1):
+            for tile_x in range(left, right + 1):
+                if self.in_world(tile_y) and self.get(tile_x, tile_y) == old:
+                    self.set(tile_x, tile_y, new_type)
+
+    def clear_radius(self, center_x, center_y, radius):
+        """Clear every tile within radius tiles of a tile, e.g. for a crater."""
+        for dy in range(-radius, radius + 1):
+            for dx in range(-radius, radius + 1):
+                if dx * dx + dy * dy <= radius * radius:
+                    self.set(center_x + dx, center_y + dy, None)
+
+    def stamp(self, tile_x, tile_y, structure):
+        """
+        Place a structure with its origin at a tile.
+
+        :param structure: Dict of (dx, dy) offset -> block type, None to carve out air; offsets it leaves
+                          out keep whatever is there.
+        """
+        for (dx, dy), block_type in structure.items():
+            self.set(tile_x + dx, tile_y + dy, block_type)
+
+    def apply(self):
+        """Write the buffered changes and notify once per affected chunk; returns the number of tiles changed."""
+        world = self.world
+        size = world.chunk_size
+        by_chunk = {}
+        for (tile_x, tile_y), block in self.changes.items():
+            by_chunk.setdefault((tile_x // size, tile_y // size), []).append((tile_x, tile_y, block))
+        self.changes = {}
+
+        # Every block is written before the first notification, so relighting sees the whole edit
+        changed = {}
+        for chunk_pos, tiles in by_chunk.items():
+            chunk = world.get_chunk(*chunk_pos)
+            changed_tiles = []
+            for tile_x, tile_y, block in tiles:
+                if chunk.get(tile_x, tile_y) != block:
+                    chunk.set(tile_x, tile_y, block)
+                    changed_tiles.append((tile_x, tile_y))
+            if changed_tiles:
+                changed[chunk_pos] = changed_tiles
+        for chunk_pos, changed_tiles in changed.items():
+            world.chunk_changed(chunk_pos, changed_tiles)
+        return sum(map(len, changed.values()))
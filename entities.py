@@ -0,0 +1,361 @@
+from collections import deque
+import numpy as np
+import pygame
+from assets import assets
+from blocks import BLOCK_ICONS, SOLID
+from profiler import profiler
+
+
+SOLID_TABLE = bytes(SOLID) + bytes(256 - len(SOLID))  # Block ID -> 1 if solid, as a bytes.translate table
+
+
+class Entity:
+    __slots__ = ('x', 'y', 'vx', 'vy', 'width', 'height', 'cell', 'resting')
+
+    def __init__(self, x, y, width, height, vx=0.0, vy=0.0):
+        """
+        Something that moves through the world on its own, in pixel coordinates.
+
+        :param x: Left edge in world pixels.
+        :param y: Top edge in world pixels.
+        """
+        self.x = x
+        self.y = y
+        self.vx = vx
+        self.vy = vy
+        self.width = width
+        self.height = height
+        self.cell = None  # Spatial hash cell it is filed under; None once removed from the world
+        self.resting = False  # True while it lies still and is left out of the physics step
+
+    def rect(self):
+        return pygame.Rect(int(self.x), int(self.y), self.width, self.height)
+
+
+class DroppedItem(Entity):
+    __slots__ = ('block_type', 'count', 'spawned')
+
+    def __init__(self, x, y, block_type, count, spawned, size):
+        """A stack of mined blocks lying in the world until the player walks over it or it expires."""
+        super().__init__(x, y, size, size)
+        self.block_type = block_type
+        self.count = count
+        self.spawned = spawned  # World clock time it was dropped at
+
+
+class SpatialHash:
+    def __init__(self, cell_size):
+        """
+        Uniform grid of entities, so finding what is in an area only looks at the cells it covers.
+
+        Each cell is a dict used as an insertion-ordered set, so queries return entities in a fixed
+        order and replays stay deterministic.
+
+        :param cell_size: Width and height of a cell in pixels; at least the size of the largest entity.
+        """
+        self.cell_size = cell_size
+        self.cells = {}  # (cell_x, cell_y) -> {entity: None}
+
+    def cell_of(self, entity):
+        return int(entity.x // self.cell_size), int(entity.y // self.cell_size)
+
+    def insert(self, entity):
+        entity.cell = self.cell_of(entity)
+        self.cells.setdefault(entity.cell, {})[entity] = None
+
+    def remove(self, entity):
+        cell = self.cells[entity.cell]
+        del cell[entity]
+        if not cell:
+            del self.cells[entity.cell]
+        entity.cell = None
+
+    def moved(self, entity):
+        """Refile an entity after its position changed."""
+        if self.cell_of(entity) != entity.cell:
+            self.remove(entity)
+            self.insert(entity)
+
+    def query(self, rect):
+        """Return the entities overlapping a pixel rect."""
+        size = self.cell_size
+        # Entities are filed by their top-left corner, so one extra cell up and left catches those reaching in
+        first_x, last_x = (rect.left - size) // size, (rect.right - 1) // size
+        first_y, last_y = (rect.top - size) // size, (rect.bottom - 1) // size
+        found = []
+        for cell_y in range(first_y, last_y + 1):
+            for cell_x in range(first_x, last_x + 1):
+                cell = self.cells.get((cell_x, cell_y))
+                if cell is None:
+                    continue
+                for entity in cell:
+                    if (entity.x < rect.right and entity.x + entity.width > rect.left
+                            and entity.y < rect.bottom and entity.y + entity.height > rect.top):
+                        found.append(entity)
+        return found
+
+
+class Entities:
+    def __init__(self, world, cell_size=64):
+        """
+        Every entity in a world except the player, stepped together once per simulation step.
+
+        Entities that come to rest leave the physics step until a tile next to them changes, so
+        thousands of items lying on the ground cost nothing per step; the ones still moving are
+        stepped together as numpy arrays (see step_awake).
+
+        :param world: World the entities collide with.
+        :param cell_size: Spatial hash cell size in pixels.
+        """
+        self.world = world
+        self.grid = SpatialHash(cell_size)
+        self.awake = {}  # Entities in the physics step, as an insertion-ordered set
+        self.count = 0  # Entities in the world
+        self.dirty_rects = []  # World pixel areas entities were drawn in or moved to since the last render
+        self.max_dirty_rects = 64  # Past this many, dirty_overflow asks for a full redraw instead
+        self.dirty_overflow = False
+        self.expiry = deque()  # Dropped items in spawn order, which is also expiry order
+
+        self.gravity = 0.5
+        self.max_fall_speed = 10
+        self.ground_friction = 0.8  # Horizontal speed kept per step while on the ground
+        self.air_friction = 0.98
+        self.item_size = 12
+        self.item_lifetime = 300  # Seconds a dropped item stays in the world
+        self.pickup_delay = 0.5  # Seconds before a new drop can be picked up, so it is seen to fall
+        self.pickup_reach = 16  # Pixels around the player that items are picked up from
+
+    def spawn_item(self, block_type, tile_x, tile_y, count=1):
+        """Drop count blocks at the centre of a tile, with a small hop."""
+        tile_size = self.world.tile_size
+        item = DroppedItem(tile_x * tile_size + (tile_size - self.item_size) / 2,
+                           tile_y * tile_size + (tile_size - self.item_size) / 2,
+                           block_type, count, self.world.elapsed_time, self.item_size)
+        item.vy = -3
+        self.add(item)
+        self.expiry.append(item)
+        return item
+
+    def add(self, entity):
+        self.grid.insert(entity)
+        self.awake[entity] = None
+        self.count += 1
+        self.mark_dirty(entity.rect())
+
+    def remove(self, entity):
+        self.mark_dirty(entity.rect())
+        self.grid.remove(entity)
+        self.awake.pop(entity, None)
+        self.count -= 1
+
+    def mark_dirty(self, rect):
+        """Record a world pixel area to redraw, or give up on single areas once there are too many."""
+        if len(self.dirty_rects) < self.max_dirty_rects:
+            self.dirty_rects.append(rect)
+        else:
+            self.dirty_overflow = True
+
+    def clear_dirty(self):
+        self.dirty_rects.clear()
+        self.dirty_overflow = False
+
+    def wake_area(self, left, top, right, bottom):
+        """
+        Put the entities in or resting on the inclusive tile rectangle from (left, top) to (right, bottom)
+        back into the physics step, e.g. after its blocks were mined or blown up.
+
+        Entities buried by blocks placed over them are moved up on top of the blocks.
+        """
+        world = self.world
+        tile_size = world.tile_size
+        area = pygame.Rect(left * tile_size, top * tile_size - 1, (right - left + 1) * tile_size,
+                           (bottom - top + 1) * tile_size + 1)
+        for entity in self.grid.query(area):
+            columns = range(int(entity.x) // tile_size, int(entity.x + entity.width - 1) // tile_size + 1)
+            tile_y = int(entity.y + entity.height - 1) // tile_size  # Row of the entity's bottom edge
+            if any(SOLID[world.get_block_id(tile_x, tile_y)] for tile_x in columns):
+                while tile_y > world.top_row and any(SOLID[world.get_block_id(tile_x, tile_y - 1)] for tile_x in columns):
+                    tile_y -= 1
+                self.mark_dirty(entity.rect())
+                entity.y = tile_y * tile_size - entity.height
+                entity.vy = 0
+                self.grid.moved(entity)
+                self.mark_dirty(entity.rect())
+            entity.resting = False
+            self.awake[entity] = None
+
+    def solid_grid(self, first_x, first_y, last_x, last_y):
+        """
+        Return a 2D array with one byte per tile of the chunks from (first_x, first_y) to (last_x, last_y),
+        non-zero where entities collide. Tiles of chunks that are not loaded all collide, so nothing
+        falls out of the loaded world.
+        """
+        size = self.world.chunk_size
+        grid = np.ones(((last_y - first_y + 1) * size, (last_x - first_x + 1) * size), dtype=np.uint8)
+        for chunk_y in range(first_y, last_y + 1):
+            for chunk_x in range(first_x, last_x + 1):
+                chunk = self.world.chunks.get((chunk_x, chunk_y))
+                if chunk is not None:
+                    row, column = (chunk_y - first_y) * size, (chunk_x - first_x) * size
+                    grid[row:row + size, column:column + size] = np.frombuffer(
+                        chunk.blocks.translate(SOLID_TABLE), dtype=np.uint8).reshape(size, size)
+        return grid
+
+    def update(self, players):
+        """Advance every entity by one simulation step, then let each player pick up the items they touch."""
+        now = self.world.elapsed_time
+        while self.expiry and (self.expiry[0].cell is None or self.expiry[0].spawned + self.item_lifetime <= now):
+            item = self.expiry.popleft()
+            if item.cell is not None:
+                self.remove(item)
+
+        profiler.count('entities_simulated', len(self.awake))
+        for cluster in self.clusters(self.awake):
+            self.step_awake(cluster)
+
+        for player in players:
+            for entity in self.grid.query(player.rect.inflate(self.pickup_reach, self.pickup_reach)):
+                if isinstance(entity, DroppedItem) and now >= entity.spawned + self.pickup_delay:
+                    entity.count -= player.inventory.add(entity.block_type, entity.count)
+                    if entity.count <= 0:
+                        self.remove(entity)
+
+    def clusters(self, entities):
+        """
+        Split entities into groups whose chunks touch, in a fixed order, so the solidity grid of each group
+        only spans its own area however far apart the groups are, e.g. around players at opposite ends.
+        """
+        chunk_pixels = self.world.chunk_size * self.world.tile_size
+        by_chunk = {}
+        for entity in entities:
+            by_chunk.setdefault((int(entity.x // chunk_pixels), int(entity.y // chunk_pixels)), []).append(entity)
+
+        clusters = []
+        seen = set()
+        for start in by_chunk:
+            if start in seen:
+                continue
+            seen.add(start)
+            stack = [start]
+            cluster = []
+            while stack:
+                chunk_x, chunk_y = stack.pop()
+                cluster += by_chunk[(chunk_x, chunk_y)]
+                for neighbour in ((chunk_x + dx, chunk_y + dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1)):
+                    if neighbour in by_chunk and neighbour not in seen:
+                        seen.add(neighbour)
+                        stack.append(neighbour)
+            clusters.append(cluster)
+        return clusters
+
+    def step_awake(self, entities):
+        """
+        Move awake entities by their velocity, stopping them at solid tiles; those lying still on the ground settle.
+
+        The entities are stepped together as arrays: positions and velocities are gathered, moved and
+        tested against a solidity grid of the chunks they span in a few numpy operations, and written
+        back. Only the leading edge in each direction is tested, which is enough for entities no larger
+        than a tile.
+
+        :param entities: List of awake entities close together (see clusters).
+        """
+        world = self.world
+        tile_size, chunk_size = world.tile_size, world.chunk_size
+        x = np.array([entity.x for entity in entities], dtype=np.float64)
+        y = np.array([entity.y for entity in entities], dtype=np.float64)
+        vx = np.array([entity.vx for entity in entities], dtype=np.float64)
+        vy = np.array([entity.vy for entity in entities], dtype=np.float64)
+        width = np.array([entity.width for entity in entities], dtype=np.float64)
+        height = np.array([entity.height for entity in entities], dtype=np.float64)
+
+        # Solidity of every tile the entities can reach this step
+        reach = tile_size + self.max_fall_speed
+        chunk_pixels = chunk_size * tile_size
+        first_x, last_x = int((x.min() - reach) // chunk_pixels), int((x.max() + reach) // chunk_pixels) + 1
+        first_y, last_y = int((y.min() - reach) // chunk_pixels), int((y.max() + reach) // chunk_pixels) + 1
+        grid = self.solid_grid(first_x, first_y, last_x, last_y)
+        origin_x, origin_y = first_x * chunk_size, first_y * chunk_size
+        top_row, bottom_row = world.top_row, world.top_row + world.world_height
+
+        def is_solid(tile_x, tile_y):
+            inside = (tile_y >= top_row) & (tile_y < bottom_row)  # Above and below the world is open
+            rows = np.clip(tile_y - origin_y, 0, grid.shape[0] - 1)
+            columns = np.clip(tile_x - origin_x, 0, grid.shape[1] - 1)
+            return inside & (grid[rows, columns] != 0)
+
+        old_x, old_y = x.copy(), y.copy()
+        top_tile = np.floor_divide(y, tile_size).astype(np.int64)
+        bottom_tile = np.floor_divide(y + height - 1, tile_size).astype(np.int64)
+
+        # Horizontal: only the column the leading edge moves into can stop an entity
+        x = x + vx
+        right = vx > 0
+        column = np.where(right, np.floor_divide(x + width - 1, tile_size), np.floor_divide(x, tile_size)).astype(np.int64)
+        hit = (vx != 0) & (is_solid(column, top_tile) | is_solid(column, bottom_tile))
+        x = np.where(hit, np.where(right, column * tile_size - width, (column + 1) * tile_size), x)
+        vx = np.where(hit, 0.0, vx)
+
+        # Vertical, the same way with the leading row
+        vy = np.minimum(vy + self.gravity, self.max_fall_speed)
+        y = y + vy
+        down = vy > 0
+        row = np.where(down, np.floor_divide(y + height - 1, tile_size), np.floor_divide(y, tile_size)).astype(np.int64)
+        left_tile = np.floor_divide(x, tile_size).astype(np.int64)
+        right_tile = np.floor_divide(x + width - 1, tile_size).astype(np.int64)
+        hit = is_solid(left_tile, row) | is_solid(right_tile, row)
+        on_ground = hit & down
+        y = np.where(hit, np.where(down, row * tile_size - height, (row + 1) * tile_size), y)
+        vy = np.where(hit, 0.0, vy)
+        vx = vx * np.where(on_ground, self.ground_friction, self.air_friction)
+
+        for entity, new_x, new_y, new_vx, new_vy in zip(entities, x.tolist(), y.tolist(), vx.tolist(), vy.tolist()):
+            entity.x, entity.y, entity.vx, entity.vy = new_x, new_y, new_vx, new_vy
+
+        # Refile the entities that crossed into another spatial hash cell
+        cell_size = self.grid.cell_size
+        cell_x = np.floor_divide(x, cell_size).astype(np.int64).tolist()
+        cell_y = np.floor_divide(y, cell_size).astype(np.int64).tolist()
+        for index, entity in enumerate(entities):
+            if entity.cell != (cell_x[index], cell_y[index]):
+                self.grid.remove(entity)
+                self.grid.insert(entity)
+
+        moved = np.flatnonzero((x.astype(np.int64) != old_x.astype(np.int64)) | (y.astype(np.int64) != old_y.astype(np.int64)))
+        if len(self.dirty_rects) + 2 * len(moved) > self.max_dirty_rects:
+            self.dirty_overflow = True
+        else:
+            for index in moved.tolist():
+                entity = entities[index]
+                self.dirty_rects.append(pygame.Rect(int(old_x[index]), int(old_y[index]), entity.width, entity.height))
+                self.dirty_rects.append(entity.rect())
+
+        for index in np.flatnonzero(y >= bottom_row * tile_size).tolist():
+            self.remove(entities[index])  # Fell out of the bottom of the world
+        for index in np.flatnonzero(on_ground & (np.abs(vx) < 0.05)).tolist():
+            if entities[index].cell is not None:
+                self.settle(entities[index])
+
+    def settle(self, entity):
+        """Take an entity out of the physics step; an item landing on another of its type merges into it."""
+        entity.vx = 0.0
+        entity.resting = True
+        del self.awake[entity]
+        if isinstance(entity, DroppedItem):
+            for other in self.grid.query(entity.rect()):
+                if (other is not entity and other.resting and isinstance(other, DroppedItem)
+                        and other.block_type == entity.block_type):
+                    # The later drop is kept, so the stack lasts as long as either would have and the
+                    # expiry queue stays in spawn order
+                    kept, merged = (entity, other) if entity.spawned > other.spawned else (other, entity)
+                    kept.count += merged.count
+                    self.remove(merged)
+                    return
+
+    def blits(self, view, offset_x, offset_y):
+        """Return (surface, screen position) of the entities inside a world pixel rect, for Surface.blits."""
+        batch = []
+        for entity in self.grid.query(view):
+            if isinstance(entity, DroppedItem):
+                icon = assets.scaled(BLOCK_ICONS[entity.block_type], (entity.width, entity.height))
+                batch.append((icon, (int(entity.x) - offset_x, int(entity.y) - offset_y)))
+        return batch
@@ -0,0 +1,120 @@
+import pygame
+from assets import assets
+
+
+class Hud:
+    def __init__(self):
+        """
+        Health, stamina and inventory overlay, composed into cached panel surfaces.
+
+        Each part is redrawn only when the state it shows changes (lives, the stamina bar's
+        pixel width, or a change the inventory reports to inventory_changed); otherwise a frame
+        costs one blit per panel. The panels are kept separate rather than as one screen-sized overlay,
+        because blitting a full 800x600 alpha surface costs more than the whole HUD redraw.
+        """
+        # Health and stamina, top left
+        self.status_surface = pygame.Surface((215, 50), pygame.SRCALPHA)
+        self.health_area = pygame.Rect(0, 0, 215, 30)
+        self.stamina_area = pygame.Rect(0, 30, 215, 20)
+        self.stamina_bar_width = 200
+        self.stamina_bar_height = 10
+        self.stamina_bar_pos = (10, 35)
+
+        # Inventory bar, bottom centre
+        self.inventory_bar_width = 450
+        self.inventory_bar_height = 60
+        self.inventory_surface = pygame.Surface((self.inventory_bar_width, self.inventory_bar_height), pygame.SRCALPHA)
+
+        # State each part was last drawn for
+        self.drawn_lives = None
+        self.drawn_stamina_width = None
+        self.inventory_dirty = True  # Set by the inventory's change notifications
+
+    def update(self, screen, player):
+        """Bring the panels up to date with the player's state; returns the screen rects that changed."""
+        changed = []
+        if player.lives != self.drawn_lives:
+            self.render_health(player.lives)
+            self.drawn_lives = player.lives
+            changed.append(self.health_area.copy())
+
+        stamina_width = int(self.stamina_bar_width * player.stamina / player.max_stamina)
+        if stamina_width != self.drawn_stamina_width:
+            self.render_stamina(stamina_width)
+            self.drawn_stamina_width = stamina_width
+            changed.append(self.stamina_area.copy())
+
+        if self.inventory_dirty:
+            self.render_inventory(player)
+            self.inventory_dirty = False
+            changed.append(self.inventory_rect(screen))
+        return changed
+
+    def inventory_changed(self, slot):
+        """Inventory listener: redraw the inventory bar on the next update."""
+        self.inventory_dirty = True
+
+    def inventory_rect(self, screen):
+        screen_width, screen_height = screen.get_size()
+        return pygame.Rect((screen_width - self.inventory_bar_width) // 2, screen_height - self.inventory_bar_height - 20,
+                           self.inventory_bar_width, self.inventory_bar_height)
+
+    def render(self, screen, player):
+        """Bring the panels up to date with the player's state and draw them."""
+        self.update(screen, player)
+        screen.blit(self.status_surface, (0, 0))
+        screen.blit(self.inventory_surface, self.inventory_rect(screen))
+
+    def render_health(self, lives):
+        self.status_surface.fill((0, 0, 0, 0), self.health_area)
+        health_image = assets.scaled('assets/lifeline.png', (15, 15))
+        health_x1, health_y1 = 75, 10
+
+        # Render the lives remaining
+        for i in range(max(lives, 0)):
+            self.status_surface.blit(health_image, (health_x1 - (i * 16), health_y1))
+
+    def render_stamina(self, current_stamina_bar_width):
+        surface = self.status_surface
+        surface.fill((0, 0, 0, 0), self.stamina_area)
+        bar_x, bar_y = self.stamina_bar_pos
+
+        # Draw the stamina bar background
+        pygame.draw.rect(surface, (60, 60, 60), (bar_x, bar_y, self.stamina_bar_width, self.stamina_bar_height))
+        # Draw the current stamina
+        pygame.draw.rect(surface, (255, 255, 255), (bar_x, bar_y, current_stamina_bar_width, self.stamina_bar_height))
+        # Draw the border
+        pygame.draw.rect(surface, (0, 0, 0), (bar_x, bar_y, self.stamina_bar_width, self.stamina_bar_height), 2)
+
+    def render_inventory(self, player):
+        surface = self.inventory_surface
+        bar_height = self.inventory_bar_height
+        inventory = player.inventory
+        slot_width = self.inventory_bar_width // inventory.size  # Tools and blocks
+
+        # Semi-transparent background
+        surface.fill((0, 0, 0, 150))
+
+        # Render each slot (tools + blocks); empty block slots keep their place
+        for i in range(inventory.size):
+            slot_x = i * slot_width
+
+            # Highlight the box if the item is selected
+            box_color = (200, 200, 200) if i == inventory.selected else (0, 0, 0)
+
+            # Draw the border
+            pygame.draw.rect(surface, box_color, (slot_x, 0, slot_width, bar_height), 2)
+
+            # Render the tool or block
+            item = inventory.item(i)
+            item_texture = player.textures.get(item)
+            if item_texture:
+                surface.blit(item_texture, (slot_x + (slot_width - 20) // 2, (bar_height - 20) // 2))
+
+            # If it's a block, show the count
+            if inventory.count(i):
+                self.render_block_count(slot_x, 0, inventory.count(i))
+
+    def render_block_count(self, x, y, count):
+        count_text = assets.font(None, 24).render(str(count), True, (255, 255, 255))
+        self.inventory_surface.blit(count_text, (x + 2, y + 2))  # Slight offset for visibility
@@ -0,0 +1,159 @@
+class Inventory:
+    def __init__(self, tools=('axe', 'pickaxe', 'shovel'), block_slots=7, stack_limit=64):
+        """
+        The player's hotbar: a fixed row of slots, the tools first and then the block stacks.
+
+        Slots keep their index for as long as they exist, so the selection is just a slot index and an
+        emptied stack leaves a gap instead of shifting the stacks after it. Per-type totals make "do I
+        have this block" a dict lookup. Every change is reported to the listeners with the slot it
+        touched, so views such as the HUD only redraw when something actually changed.
+
+        :param tools: Tool names in the first slots, which are always there.
+        :param block_slots: Number of block stacks after the tools.
+        :param stack_limit: Most blocks one stack holds; more of the same type starts another stack.
+        """
+        self.tools = tools
+        self.block_slots = block_slots
+        self.stack_limit = stack_limit
+        self.size = len(tools) + block_slots  # Total number of slots
+        self.stack_types = [None] * block_slots  # Block type of each stack, None for an empty slot
+        self.stack_counts = [0] * block_slots
+        self.totals = {}  # Block type -> count across all its stacks
+        self.selected = 0  # Slot of the held item
+        self.listeners = []  # Called with the changed slot on every change
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def notify(self, slot):
+        for listener in self.listeners:
+            listener(slot)
+
+    def item(self, slot):
+        """Return the tool name or block type in a slot, or None if it is empty."""
+        if slot < len(self.tools):
+            return self.tools[slot]
+        return self.stack_types[slot - len(self.tools)]
+
+    def count(self, slot):
+        """Return the number of blocks in a slot; 0 for tools and empty slots."""
+        if slot < len(self.tools):
+            return 0
+        return self.stack_counts[slot - len(self.tools)]
+
+    def selected_item(self):
+        """Return the held tool name or block type, or None if the selected stack has run out."""
+        return self.item(self.selected)
+
+    def selected_block(self):
+        """Return the type of the held block, or None while a tool or nothing is held."""
+        if self.selected < len(self.tools):
+            return None
+        return self.stack_types[self.selected - len(self.tools)]
+
+    def is_tool_selected(self):
+        return self.selected < len(self.tools)
+
+    def select(self, slot):
+        """Hold the item in a slot; empty and out of range slots are ignored."""
+        if 0 <= slot < self.size and slot != self.selected and self.item(slot) is not None:
+            previous, self.selected = self.selected, slot
+            self.notify(previous)
+            self.notify(slot)
+
+    def has(self, block_type):
+        return block_type in self.totals
+
+    def add(self, block_type, count=1):
+        """
+        Add blocks, topping up the type's stacks before starting new ones in the first empty slots.
+
+        Returns how many were added; the rest did not fit and are lost.
+        """
+        remaining = count
+        for index, stack_type in enumerate(self.stack_types):
+            if remaining and stack_type == block_type and self.stack_counts[index] < self.stack_limit:
+                remaining -= self.fill(index, block_type, remaining)
+        for index, stack_type in enumerate(self.stack_types):
+            if remaining and stack_type is None:
+                remaining -= self.fill(index, block_type, remaining)
+        return count - remaining
+
+    def remove(self, block_type, count=1):
+        """
+        Take blocks, from the held stack first and then from the type's last stacks.
+
+        Returns how many were removed. Emptied stacks leave their slot empty; the selection does not move.
+        """
+        indices = [index for index in range(self.block_slots - 1, -1, -1) if self.stack_types[index] == block_type]
+        held = self.selected - len(self.tools)
+        if held in indices:
+            indices.remove(held)
+            indices.insert(0, held)
+        remaining = count
+        for index in indices:
+            if not remaining:
+                break
+            taken = min(remaining, self.stack_counts[index])
+            self.set_stack(index, block_type, self.stack_counts[index] - taken)
+            remaining -= taken
+        return count - remaining
+
+    def move(self, from_slot, to_slot):
+        """
+        Move a stack to another block slot: merged into a stack of the same type as far as the limit allows,
+        otherwise swapped with whatever is there.
+        """
+        source, target = from_slot - len(self.tools), to_slot - len(self.tools)
+        if source == target or not (0 <= source < self.block_slots and 0 <= target < self.block_slots):
+            return
+        source_type, source_count = self.stack_types[source], self.stack_counts[source]
+        target_type, target_count = self.stack_types[target], self.stack_counts[target]
+        if source_type is not None and source_type == target_type:
+            moved = min(source_count, self.stack_limit - target_count)
+            self.set_stack(target, target_type, target_count + moved)
+            self.set_stack(source, source_type, source_count - moved)
+        else:
+            self.set_stack(target, source_type, source_count)
+            self.set_stack(source, target_type, target_count)
+
+    def stacks(self):
+        """Yield (slot, block type, count) of every non-empty stack."""
+        for index, block_type in enumerate(self.stack_types):
+            if block_type is not None:
+                yield len(self.tools) + index, block_type, self.stack_counts[index]
+
+    def load(self, stacks, selected):
+        """Replace the contents with (slot, block type, count) stacks and a selected slot, e.g. from a save."""
+        for index in range(self.block_slots):
+            self.set_stack(index, None, 0)
+        for slot, block_type, count in stacks:
+            if len(self.tools) <= slot < self.size:
+                self.set_stack(slot - len(self.tools), block_type, min(count, self.stack_limit))
+        self.selected = selected if 0 <= selected < self.size else 0
+        self.notify(self.selected)
+
+    def fill(self, index, block_type, count):
+        """Put up to count blocks on the stack at a block slot index; returns how many fit."""
+        added = min(count, self.stack_limit - self.stack_counts[index])
+        self.set_stack(index, block_type, self.stack_counts[index] + added)
+        return added
+
+    def set_stack(self, index, block_type, count):
+        """Set the stack at a block slot index, keeping the totals in step; a count of 0 empties it."""
+        old_type, old_count = self.stack_types[index], self.stack_counts[index]
+        if block_type is None or count <= 0:
+            block_type, count = None, 0
+        if (old_type, old_count) == (block_type, count):
+            return
+        if old_type is not None:
+            total = self.totals[old_type] - old_count
+            if total:
+                self.totals[old_type] = total
+            else:
+                del self.totals[old_type]
+        if block_type is not None:
+            self.totals[block_type] = self.totals.get(block_type, 0) + count
+        self.stack_types[index] = block_type
+        self.stack_counts[index] = count
+        self.notify(len(self.tools) + index)
@@ -0,0 +1,337 @@
+from collections import deque
+import pygame
+from blocks import LIGHT_EMISSION, LIGHT_OPACITY, MAX_LIGHT
+from profiler import profiler
+
+SKY = 'sky_light'  # Light channels, named after the Chunk attribute holding them
+BLOCK = 'block_light'
+CANOPY = 5  # Tallest surface feature above the grass, in tiles (the crown of a tree)
+NIGHT_DARKNESS = 9  # Levels the sky light is dimmed by at midnight
+
+# Brightness each light level leaves a tile at, as a 0-255 multiplier
+SHADES = [round(255 * 0.85 ** (MAX_LIGHT - level)) for level in range(MAX_LIGHT + 1)]
+# Per darkness: bytes.translate table dimming a sky light level by that many levels
+DIM_TABLES = [bytes(max(level - darkness, 0) for level in range(256)) for darkness in range(MAX_LIGHT + 1)]
+
+
+class Lighting:
+    def __init__(self, world):
+        """
+        Per-tile light levels, from 0 to MAX_LIGHT, kept in two channels on every loaded chunk: sky light
+        coming down from above and block light given off by blocks such as gems. Both spread by
+        breadth-first flood fill, losing a level per tile plus the opacity of the block they leave, so the
+        face of the ground is lit and the light fades a few tiles into it; sky light at full strength goes
+        straight down out of clear tiles without losing any.
+
+        A chunk is lit once when it is loaded, from its own blocks and the light already in its lit
+        neighbours. After that only edits relight, and only around the changed tiles: the light they
+        gave is flood-removed and whatever still reaches the hole flood-fills it back in. The time of
+        day does not touch the levels at all; it only dims the sky channel when the chunks are drawn
+        (see darkness and ChunkSurfaceCache).
+
+        Chunks above the loaded ones are assumed to be as generated, open to the sky above the tallest
+        possible tree, until they are loaded and lit themselves.
+
+        :param world: World whose chunks are lit.
+        """
+        self.world = world
+        self.darkness = 0  # Levels the sky light is dimmed by at the current time of day
+
+    def set_time_of_day(self, night):
+        """Set how far into the night it is, from 0 at noon to 1 at midnight; returns True if the darkness changed."""
+        darkness = round(night * NIGHT_DARKNESS)
+        if darkness == self.darkness:
+            return False
+        self.darkness = darkness
+        return True
+
+    def levels(self, chunk):
+        """Return the light level each tile of a lit chunk is drawn at: its block light or its dimmed sky light."""
+        return bytes(map(max, chunk.sky_light.translate(DIM_TABLES[self.darkness]), chunk.block_light))
+
+    def lit_chunk(self, tile_x, tile_y):
+        """Return the chunk holding a tile if it is loaded and lit, otherwise None."""
+        world = self.world
+        if not world.top_row <= tile_y < world.top_row + world.world_height:
+            return None
+        chunk = world.chunks.get((tile_x // world.chunk_size, tile_y // world.chunk_size))
+        return chunk if chunk is not None and chunk.sky_light is not None else None
+
+    def sky_source(self, tile_x, tile_y):
+        """
+        Sky light a tile gets directly from above the loaded world, if the tile above it is outside the
+        world or in a chunk that is not lit; 0 for every other tile, which only gets the light spread to it.
+        """
+        world = self.world
+        above = tile_y - 1
+        if above < world.top_row:
+            return MAX_LIGHT
+        if self.lit_chunk(tile_x, above) is not None:
+            return 0
+        heights, _ = world.columns.span(tile_x, 1)
+        return MAX_LIGHT if above < heights[0] - CANOPY else 0
+
+    def light_chunk(self, chunk):
+        """Compute the light of a newly loaded chunk and spread it to and from its lit neighbours."""
+        world = self.world
+        size = chunk.size
+        blocks = chunk.blocks
+        chunk.sky_light = sky = bytearray(size * size)
+        chunk.block_light = block_light = bytearray(size * size)
+
+        # Sky light straight down each column, from the chunk above or from the sky if it is not lit
+        above = world.chunks.get((chunk.chunk_x, chunk.chunk_y - 1))
+        if above is not None and above.sky_light is not None:
+            incoming = [(above.sky_light[index], LIGHT_OPACITY[above.blocks[index]]) for index in range(-size, 0)]
+        elif chunk.origin_y - 1 < world.top_row:
+            incoming = [(MAX_LIGHT, 0)] * size
+        else:
+            heights, _ = world.columns.span(chunk.origin_x, size)
+            incoming = [(MAX_LIGHT if chunk.origin_y - 1 < height - CANOPY else 0, 0) for height in heights]
+        for column in range(size):
+            level, opacity = incoming[column]  # Of the tile above
+            for index in range(column, size * size, size):
+                if level < MAX_LIGHT or opacity:
+                    level = max(level - 1 - opacity, 0)
+                    if not level:
+                        break
+                sky[index] = level
+                opacity = LIGHT_OPACITY[blocks[index]]
+        for index, block in enumerate(blocks):
+            block_light[index] = LIGHT_EMISSION[block]
+
+        # Spread from the tiles that would brighten a neighbour, the tiles on the borders with lit neighbours,
+        # and those neighbours' tiles on the borders, so the light crosses both ways.
+        # Left, right, upper and lower neighbour (None unless lit), with the index of the first tile of
+        # their edge facing this chunk and the step along it
+        neighbours = []
+        for (dx, dy), first, step in (((-1, 0), size - 1, size), ((1, 0), 0, size),
+                                      ((0, -1), size * (size - 1), 1), ((0, 1), 0, 1)):
+            neighbour = world.chunks.get((chunk.chunk_x + dx, chunk.chunk_y + dy))
+            if neighbour is not None and neighbour.sky_light is not None:
+                neighbours.append((neighbour, first, step))
+            else:
+                neighbours.append((None, first, step))
+        left, right, up, down = (neighbour is not None for neighbour, _, _ in neighbours)
+        updated = []
+        for channel, lights in ((SKY, sky), (BLOCK, block_light)):
+            queue = deque()
+            if not any(lights):
+                tiles = ()  # Dark, as deep underground: nothing to spread
+            elif lights.count(lights[0]) == len(lights) and blocks.count(blocks[0]) == len(blocks):
+                tiles = ()  # Uniform, as in the sky: only the borders can spread anything
+                if lights[0] > 1 + LIGHT_OPACITY[blocks[0]]:
+                    queue.extend(self.border_tiles(chunk, left, right, up, down))
+            else:
+                tiles = enumerate(lights)
+            for index, level in tiles:
+                passed = level - 1 - LIGHT_OPACITY[blocks[index]]  # Level passed on to the neighbours
+                if passed > 0:
+                    x, y = index % size, index // size
+                    passed_down = MAX_LIGHT if channel == SKY and level == MAX_LIGHT == passed + 1 else passed
+                    if ((left if x == 0 else lights[index - 1] < passed)
+                            or (right if x == size - 1 else lights[index + 1] < passed)
+                            or (up if y == 0 else lights[index - size] < passed)
+                            or (down if y == size - 1 else lights[index + size] < passed_down)):
+                        queue.append((chunk.origin_x + x, chunk.origin_y + y))
+            for neighbour, first, step in neighbours:
+                if neighbour is not None:
+                    neighbour_lights = getattr(neighbour, channel)
+                    for index in range(first, first + size * step, step):
+                        if neighbour_lights[index] > 1 + LIGHT_OPACITY[neighbour.blocks[index]]:
+                            queue.append((neighbour.origin_x + index % size, neighbour.origin_y + index // size))
+            updated += self.spread(queue, channel)
+        self.mark_updated(updated)
+
+        # The chunk below took the sky above it for open when it was lit; where this chunk is in the way,
+        # the columns under it have to darken
+        below = neighbours[3][0]
+        if below is not None:
+            stale = [(chunk.origin_x + x, below.origin_y) for x in range(size)
+                     if below.sky_light[x] > self.expected_sky(chunk.origin_x + x, below.origin_y)]
+            if stale:
+                self.relight(stale)
+
+    @staticmethod
+    def border_tiles(chunk, left, right, up, down):
+        """Yield the tiles along the chosen borders of a chunk (the corners once)."""
+        first_x, first_y = chunk.origin_x, chunk.origin_y
+        last_x, last_y = first_x + chunk.size - 1, first_y + chunk.size - 1
+        for tile_y in range(first_y, last_y + 1):
+            for tile_x in range(first_x, last_x + 1):
+                if ((left and tile_x == first_x) or (right and tile_x == last_x) or (up and tile_y == first_y)
+                        or (down and tile_y == last_y)):
+                    yield tile_x, tile_y
+
+    def expected_sky(self, tile_x, tile_y):
+        """Sky light a lit tile should have from its neighbours and from above as they are now."""
+        best = self.sky_source(tile_x, tile_y)
+        for x, y, down in ((tile_x, tile_y - 1, True), (tile_x - 1, tile_y, False), (tile_x + 1, tile_y, False),
+                           (tile_x, tile_y + 1, False)):
+            chunk = self.lit_chunk(x, y)
+            if chunk is not None:
+                index = (y - chunk.origin_y) * chunk.size + x - chunk.origin_x
+                level = chunk.sky_light[index]
+                opacity = LIGHT_OPACITY[chunk.blocks[index]]
+                best = max(best, level if down and level == MAX_LIGHT and not opacity else level - 1 - opacity)
+        return best
+
+    def unload_chunks(self, chunks):
+        """
+        Take the light of chunks just removed from the world back out of the lit chunks beside them, so those
+        end up lit as if the removed chunks had never been loaded, as they would be after loading afresh.
+
+        Only the border tiles that could have got their light from a removed chunk are relit, like edited
+        tiles; that also gives the tiles under a removed chunk the sky of the generated terrain above again.
+        """
+        tiles = []
+        for chunk in chunks:
+            size = chunk.size
+            first_x, first_y = chunk.origin_x, chunk.origin_y
+            last_x, last_y = first_x + size - 1, first_y + size - 1
+            # Each tile of the removed chunk's edges with the tile beside it, and whether that one is below it
+            for k in range(size):
+                for inner, outer, down in (((first_x, first_y + k), (first_x - 1, first_y + k), False),
+                                           ((last_x, first_y + k), (last_x + 1, first_y + k), False),
+                                           ((first_x + k, first_y), (first_x + k, first_y - 1), False),
+                                           ((first_x + k, last_y), (first_x + k, last_y + 1), True)):
+                    if self.lit_from(chunk, inner, outer, down):
+                        tiles.append(outer)
+        if tiles:
+            self.relight(tiles)
+
+    def lit_from(self, chunk, inner, outer, down):
+        """
+        Whether the tile outer, in a lit chunk, may have got light from the tile inner of a removed chunk,
+        or would now get more sky light than it has.
+        """
+        neighbour = self.lit_chunk(*outer)
+        if neighbour is None:
+            return False
+        index = (inner[1] - chunk.origin_y) * chunk.size + inner[0] - chunk.origin_x
+        opacity = LIGHT_OPACITY[chunk.blocks[index]]
+        outer_index = (outer[1] - neighbour.origin_y) * neighbour.size + outer[0] - neighbour.origin_x
+        for channel in (SKY, BLOCK):
+            level = getattr(chunk, channel)[index]
+            passed = MAX_LIGHT if channel == SKY and down and level == MAX_LIGHT and not opacity else level - 1 - opacity
+            current = getattr(neighbour, channel)[outer_index]
+            if channel == SKY:
+                source = self.sky_source(*outer)
+                if source > current:
+                    return True
+            else:
+                source = LIGHT_EMISSION[neighbour.blocks[outer_index]]
+            if source < current <= passed:
+                return True
+        return False
+
+    def relight(self, tiles):
+        """Recompute the light around tiles whose blocks changed, in both channels."""
+        updated = []
+        for channel in (SKY, BLOCK):
+            removals = deque()
+            for tile_x, tile_y in tiles:
+                chunk = self.lit_chunk(tile_x, tile_y)
+                if chunk is not None:
+                    lights = getattr(chunk, channel)
+                    index = (tile_y - chunk.origin_y) * chunk.size + tile_x - chunk.origin_x
+                    removals.append((tile_x, tile_y, lights[index]))
+                    lights[index] = 0
+                    updated.append((tile_x, tile_y))
+            updated += self.spread(self.unspread(removals, channel, updated), channel)
+        self.mark_updated(updated)
+
+    def unspread(self, removals, channel, updated):
+        """
+        Flood-remove light: clear the tiles that got their light from the removed tiles, and return a queue
+        of the brighter tiles around the cleared area and of the cleared light sources, to spread back in.
+        """
+        spread_queue = deque()
+        cleared = []
+        while removals:
+            tile_x, tile_y, level = removals.popleft()
+            cleared.append((tile_x, tile_y))
+            for x, y, down in ((tile_x, tile_y + 1, True), (tile_x - 1, tile_y, False), (tile_x + 1, tile_y, False),
+                               (tile_x, tile_y - 1, False)):
+                chunk = self.lit_chunk(x, y)
+                if chunk is None:
+                    continue
+                lights = getattr(chunk, channel)
+                index = (y - chunk.origin_y) * chunk.size + x - chunk.origin_x
+                current = lights[index]
+                if not current:
+                    continue
+                if current < level or (down and channel == SKY and level == current == MAX_LIGHT):
+                    lights[index] = 0
+                    updated.append((x, y))
+                    removals.append((x, y, current))
+                else:
+                    spread_queue.append((x, y))
+
+        for tile_x, tile_y in cleared:
+            chunk = self.lit_chunk(tile_x, tile_y)
+            index = (tile_y - chunk.origin_y) * chunk.size + tile_x - chunk.origin_x
+            block = chunk.blocks[index]
+            source = self.sky_source(tile_x, tile_y) if channel == SKY else LIGHT_EMISSION[block]
+            lights = getattr(chunk, channel)
+            if source > lights[index]:
+                lights[index] = source
+                spread_queue.append((tile_x, tile_y))
+        return spread_queue
+
+    def spread(self, queue, channel):
+        """Flood-fill light outwards from the queued tiles of lit chunks; returns the tiles that got brighter."""
+        updated = []
+        top, bottom = self.world.top_row, self.world.top_row + self.world.world_height
+        while queue:
+            tile_x, tile_y = queue.popleft()
+            chunk = self.lit_chunk(tile_x, tile_y)
+            if chunk is None:
+                continue
+            size = chunk.size
+            local_x, local_y = tile_x - chunk.origin_x, tile_y - chunk.origin_y
+            index = local_y * size + local_x
+            lights = getattr(chunk, channel)
+            level = lights[index]
+            opacity = LIGHT_OPACITY[chunk.blocks[index]]
+            if level <= 1 + opacity:
+                continue
+            new_level = level - 1 - opacity
+            down_level = MAX_LIGHT if channel == SKY and level == MAX_LIGHT and not opacity else new_level
+            # Neighbours in the same chunk are found by index; only those across the border look up their chunk,
+            # as do those above and below the world, which lit_chunk turns away
+            for x, y, inside, offset, neighbour_level in (
+                    (tile_x, tile_y + 1, local_y < size - 1 and tile_y + 1 < bottom, size, down_level),
+                    (tile_x - 1, tile_y, local_x > 0, -1, new_level),
+                    (tile_x + 1, tile_y, local_x < size - 1, 1, new_level),
+                    (tile_x, tile_y - 1, local_y > 0 and tile_y > top, -size, new_level)):
+                if inside:
+                    neighbour_lights, neighbour_index = lights, index + offset
+                else:
+                    neighbour = self.lit_chunk(x, y)
+                    if neighbour is None:
+                        continue
+                    neighbour_lights = getattr(neighbour, channel)
+                    neighbour_index = (y - neighbour.origin_y) * neighbour.size + x - neighbour.origin_x
+                if neighbour_level > neighbour_lights[neighbour_index]:
+                    neighbour_lights[neighbour_index] = neighbour_level
+                    queue.append((x, y))
+                    updated.append((x, y))
+        profiler.count('light_updates', len(updated))
+        return updated
+
+    def mark_updated(self, tiles):
+        """Re-bake the chunks whose light changed and add the changed areas to the world's dirty rects."""
+        world = self.world
+        size = world.chunk_size
+        by_chunk = {}
+        for tile in tiles:
+            by_chunk.setdefault((tile[0] // size, tile[1] // size), []).append(tile)
+        for chunk_pos, chunk_tiles in by_chunk.items():
+            xs = [tile_x for tile_x, _ in chunk_tiles]
+            ys = [tile_y for _, tile_y in chunk_tiles]
+            left, top = min(xs), min(ys)
+            world.chunk_cache.mark_dirty(chunk_pos)
+            world.changed_rects.append(pygame.Rect(left * world.tile_size, top * world.tile_size,
+                                                   (max(xs) - left + 1) * world.tile_size,
+                                                   (max(ys) - top + 1) * world.tile_size))
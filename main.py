@@ -1,84 +1,268 @@
+import argparse
 import pygame
 import sys
+import time
 from world import World
 from player import Player
 from camera import Camera
 from menu import Menu
+from assets import assets
+from hud import Hud
+from profiler import profiler
+from savegame import SaveStore, parse_seed
+from autosave import Autosave
+from notifications import Notifications
+from controls import Controls, Replay
+
 
 class Game:
-    def __init__(self):
+    def __init__(self, seed=None, time_scale=1.0, profile_path=None, save_path=None, dirty_rect_rendering=True,
+                 record_path=None, replay_path=None):
         pygame.init()
-        self.screen = pygame.display.set_mode((800, 600))
+        self.screen = pygame.display.set_mode((800, 600), pygame.RESIZABLE)
         pygame.display.set_caption("Block Mine")
-        self.world = World()
-        self.player = Player(0, 0)  # Adjust Y-position to 288 (600 - (20 * 32) + 48)
+
+        # A replay is of a fresh world with the recording's seed, so it never loads or writes a save
+        self.replay = Replay(replay_path) if replay_path else None
+        if self.replay:
+            seed, save_path = self.replay.seed, None
+
+        # A save, when there is one, decides the seed; its chunks are only read once the player gets near them
+        self.store = SaveStore(save_path) if save_path else None
+        state = self.store.read_state() if self.store else None
+        # The player is placed first, so the world starts loading around the saved position rather than the origin
+        self.player = Player(*state['position']) if state else Player(0, 0)
+        self.world = World(state['seed'] if state else seed, self.store, self.player.get_pos())
+        if state:
+            self.load_state(state)
         self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 36)
-        self.camera = Camera(800, 600)
+        self.font = assets.font(None, 36)
+        self.camera = Camera(*self.screen.get_size())
+        self.hud = Hud()
+        self.player.inventory.add_listener(self.hud.inventory_changed)
+        self.notifications = Notifications()
+        self.autosave = Autosave(self.world, self.store, on_error=self.notifications.push) if self.store else None
+        self.is_game_over = False
+
+        # Input arrives as events and reaches the simulation one StepInput per step, optionally recorded
+        self.controls = Controls()
+        self.record_path = record_path
+        if record_path:
+            self.controls.start_recording()
+
+        self.fps = 60  # Render cap
+        self.step_time = 1 / 60  # The simulation always advances in steps of this many seconds
+        self.max_frame_time = 0.25  # Longer stalls are dropped rather than caught up, so a hitch cannot snowball
+        self.time_scale = time_scale  # Simulated seconds per real second
+
+        # Dirty-rect rendering: what the last frame was drawn with, to tell which screen areas changed
+        self.dirty_rect_rendering = dirty_rect_rendering
+        self.full_redraw = True  # Set when something without its own dirty rect changes, e.g. the overlay toggling
+        self.drawn_camera_offset = pygame.math.Vector2()
+        self.drawn_sky_color = None
+        self.drawn_darkness = None
+        self.drawn_rects = []
+
+        # Frame timings are recorded from the start when a dump file is given, otherwise once F3 shows the overlay
+        self.profile_path = profile_path
+        if profile_path:
+            profiler.enable()
+
+    def load_state(self, state):
+        """Restore the world clock and the player from a state read from the save."""
+        self.world.elapsed_time = state['elapsed_time']
+        self.player.rect.topleft = state['position']
+        self.player.previous_pos.update(self.player.rect.topleft)
+        self.player.lives = state['lives']
+        self.player.stamina = state['stamina']
+        self.player.inventory.load(state['stacks'], state['selected'])
+
+    def save(self):
+        """Save at the end of this frame, in the background; a lost game is never saved."""
+        if self.autosave and not self.is_game_over:
+            self.autosave.request()
 
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                if event.button == 1:  # Left mouse button click
-                    item = self.player.inventory[self.player.item_held]  # Correct access to current item
-                    # Pass the player object to the handle_click function
-                    self.world.handle_click(self.player, self.camera, event.pos, item, event.button)
-
-                elif event.button == 3:  # Right mouse button click
-                    # Get the selected block from the inventory
-                    if self.player.is_tool_selected:
-                        continue
-                    else:
-                        selected_block = list(self.player.block_inventory.keys())[self.player.item_held]
-
-                    # Pass the selected block to the handle_click function
-                        self.world.handle_click(self.player, self.camera, event.pos, selected_block, event.button)
+            elif event.type == pygame.VIDEORESIZE:
+                self.screen = pygame.display.get_surface()
+                self.camera.resize(*self.screen.get_size())
+                self.full_redraw = True
+            elif event.type == pygame.WINDOWFOCUSLOST:
+                self.controls.release_all()  # Keys let go of in another window never send KEYUP here
+            else:
+                command = self.controls.handle_event(event, self.world, self.camera)
+                if command == 'toggle_profiler':
+                    profiler.toggle_overlay()
+                    self.full_redraw = True
+                elif command == 'save':
+                    self.save()
         return True
 
-    def update(self):
-        self.player.update(self.camera, self.world)
-        self.camera.update(self.player)
+    def update(self, step_input=None):
+        """
+        Advance the game by one fixed simulation step.
+
+        :param step_input: StepInput to drive the step with instead of the controls, e.g. scripted input.
+        """
+        self.notifications.update(self.step_time)
+        if self.is_game_over:
+            return self.notifications.is_active()  # The game ends once the Game Over message has been shown
+
+        if step_input is None:
+            step_input = self.replay.next_step() if self.replay else self.controls.next_step()
+            if step_input is None:
+                return False  # The replay is over
+
+        self.world.update_chunks(*self.player.get_pos())
+        self.world.advance_clock(self.step_time)
+        self.player.apply_actions(self.world, step_input.actions)
+        self.player.update(self.camera, self.world, step_input.held)
+        self.world.physics.update([self.player])
+        self.world.entities.update([self.player])
+        for cause in self.player.pending_damage:
+            self.apply_damage(cause)
+        self.player.pending_damage.clear()
+        return True
 
-        if self.player.lives <= 0:
+    def apply_damage(self, cause):
+        """Take a life for damage the player reported during the step, and say so on screen."""
+        if self.is_game_over:
+            return
+        self.player.lives -= 1
+        if self.player.lives > 0:
+            self.notifications.push("One Life Lost")
+        else:
             self.game_over()
-            return False
+
+    def render(self, alpha=1.0):
+        """
+        Draw the current state, interpolated alpha (0 to 1) of the way from the previous step.
+
+        With dirty-rect rendering, a frame where the camera, the sky colour and the daylight have not changed
+        only redraws and pushes the areas that did: the player, changed HUD panels, messages, the profiler
+        overlay, edited and relit tiles and moving entities. Anything else falls back to a full redraw and flip.
+        """
+        self.camera.update(self.player, alpha)
+        self.world.update_day_night_cycle()
+        self.world.refresh_shading()
+        moving_rects = [rect for rect in (self.player.screen_rect(self.camera, alpha), self.notifications.screen_rect(self.screen),
+                                          profiler.overlay_rect(self.screen)) if rect is not None]
+        hud_rects = self.hud.update(self.screen, self.player)
+
+        if (not self.dirty_rect_rendering or self.full_redraw or self.camera.offset != self.drawn_camera_offset
+                or self.world.sky_color != self.drawn_sky_color or self.world.lighting.darkness != self.drawn_darkness
+                or self.world.entities.dirty_overflow):  # Too many moving entities to track one by one
+            self.draw_scene(alpha)
+            pygame.display.flip()
         else:
-            return True
+            offset_x, offset_y = int(self.camera.offset.x), int(self.camera.offset.y)
+            tile_rects = [rect.move(-offset_x, -offset_y) for rect in self.world.changed_rects]
+            tile_rects += [rect.move(-offset_x, -offset_y) for rect in self.world.entities.dirty_rects]
+            # Where moving things were drawn last frame has to be redrawn too, to clear them from there
+            rects = merge_rects(self.drawn_rects + moving_rects + hud_rects + tile_rects, self.screen.get_rect())
+            for rect in rects:
+                self.screen.set_clip(rect)
+                self.draw_scene(alpha)
+            self.screen.set_clip(None)
+            pygame.display.update(rects)
+        profiler.mark('flip')
 
-    def render(self):
-        self.screen.fill((255, 255, 255))
+        self.world.changed_rects.clear()
+        self.world.entities.clear_dirty()
+        self.drawn_rects = moving_rects
+        self.drawn_camera_offset.update(self.camera.offset)
+        self.drawn_sky_color = self.world.sky_color
+        self.drawn_darkness = self.world.lighting.darkness
+        self.full_redraw = False
+
+    def draw_scene(self, alpha):
+        """Draw every layer; the sky covers the whole screen, so nothing needs clearing first."""
         self.world.render(self.screen, self.camera, self.player)
-        self.player.render(self.screen, self.camera)
-        pygame.display.flip()
-    
+        profiler.mark('world')
+        self.player.render(self.screen, self.camera, alpha)
+        profiler.mark('player')
+        self.hud.render(self.screen, self.player)
+        self.notifications.render(self.screen)
+        profiler.render_overlay(self.screen)
+        profiler.mark('hud')
+
     def game_over(self):
-        """Handles game over logic."""
-        font = pygame.font.Font("assets/gui/menu_font.ttf", 50)
-        text = font.render("Game Over", True, (0, 0, 0))
-        text_rect = text.get_rect(center=(400, 300))
-        screen = pygame.display.get_surface()  # Get the current screen surface
-        screen.blit(text, text_rect)
-        pygame.display.flip()  # Update the display
-        pygame.time.wait(1000)
-        pygame.quit()  # Exit the game
+        """Stop the simulation and show Game Over; update ends the game once the message is done."""
+        self.is_game_over = True
+        self.notifications.clear()
+        self.notifications.push("Game Over", size=50, color=(0, 0, 0), anchor=(0.5, 0.5), shadow=False)
 
     def run(self):
         running = True
+        accumulator = 0.0  # Simulated time owed but not yet stepped
+        previous = time.perf_counter()
         while running:
+            now = time.perf_counter()
+            accumulator += min(now - previous, self.max_frame_time) * self.time_scale
+            previous = now
+
+            profiler.begin_frame()
             running = self.handle_events()
-            if running:
+            profiler.mark('events')
+            # As many fixed steps as the elapsed time calls for, so slow frames do not slow the game down
+            while running and accumulator >= self.step_time:
                 running = self.update()
+                accumulator -= self.step_time
+            profiler.mark('update')
             if running:
-                self.render()
-            self.clock.tick(60)
+                self.render(accumulator / self.step_time)
+            if self.autosave and not self.is_game_over:
+                self.autosave.update(self.player)  # Between frames, so the snapshot is consistent
+            profiler.mark('autosave')
+            profiler.end_frame()
+            self.clock.tick(self.fps)
+
+        if self.autosave:
+            # Quitting keeps the world; a lost game is not saved over it
+            self.autosave.close(self.player if self.player.lives > 0 else None)
+        if self.record_path:
+            self.controls.save_recording(self.record_path, self.world.seed)
+        if self.profile_path:
+            profiler.dump(self.profile_path)
+        self.world.close()
+
+
+def merge_rects(rects, bounds):
+    """Clip rects to bounds and merge the overlapping ones, so no area is drawn or pushed twice."""
+    merged = []
+    for rect in rects:
+        rect = rect.clip(bounds)
+        if not rect:
+            continue
+        # Absorb every merged rect this one overlaps, then check the grown rect again
+        overlap = rect.collidelist(merged)
+        while overlap != -1:
+            rect = rect.union(merged.pop(overlap))
+            overlap = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Block Mine")
+    parser.add_argument("--seed", type=parse_seed, help="World seed for a new world, to play the same world again")
+    parser.add_argument("--save", default="saves/world", help="Folder the world is saved to and loaded from")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Simulation speed relative to real time")
+    parser.add_argument("--profile", metavar="CSV", help="Record per-phase frame timings and write them here on exit")
+    parser.add_argument("--full-redraw", action="store_true", help="Redraw and flip the whole screen every frame")
+    parser.add_argument("--record", metavar="FILE", help="Record the input of every simulation step to this file")
+    parser.add_argument("--replay", metavar="FILE", help="Play back a recording on a fresh world instead of live input")
+    args = parser.parse_args()
+
     menu = Menu()
     game_run = menu.main_menu()
     if game_run:
-        game = Game()
+        # A recording only replays exactly on the world it started from, so it gets a fresh one too
+        save = None if args.record else args.save
+        game = Game(args.seed, args.time_scale, args.profile, save, not args.full_redraw, args.record, args.replay)
         game.run()
     pygame.quit()
-    sys.exit()
\ No newline at end of file
+    sys.exit()
@@ -1,44 +1,54 @@
 import pygame
 import sys
+from assets import assets
 
 class Menu:
     def __init__(self):
         pygame.init()
         self.SCREEN = pygame.display.set_mode((800, 600))
         pygame.display.set_caption("Menu")
-        self.BG = pygame.image.load("assets/gui/menu_background.jpg")
+        self.BG = assets.image("assets/gui/menu_background.jpg")
+        self.clock = pygame.time.Clock()
+        self.fps = 60  # Menus only redraw at this rate instead of spinning a CPU core
         pygame.mixer.music.load('assets/gui/menu_music.mp3')
         pygame.mixer.music.set_volume(0.5)
         pygame.mixer.music.play(-1)
 
     def get_font(self, size):
-        return pygame.font.Font("assets/gui/menu_font.ttf", size)
+        return assets.font("assets/gui/menu_font.ttf", size)
+
+    def render_text(self, text, size, color, center):
+        """Render a static label once, returning the surface and its rect."""
+        surface = self.get_font(size).render(text, True, color)
+        return surface, surface.get_rect(center=center)
+
+    def load_volume_icon(self):
+        """Load the volume icon with its near-white background made transparent."""
+        icon = assets.image("assets/gui/volume_icon.jpg").convert_alpha()  # A copy, since it gets keyed below
+        rgb = pygame.surfarray.pixels3d(icon)
+        alpha = pygame.surfarray.pixels_alpha(icon)
+        alpha[(rgb > 240).all(axis=2)] = 0
+        del rgb, alpha  # Release the pixel arrays so the surface is unlocked
+        return pygame.transform.scale(icon, (90, 90))
 
     def options(self):
+        OPTIONS_TEXTS = [
+            self.render_text("D: Moving right", 30, "White", (400, 150)),
+            self.render_text("A: Moving left", 30, "White", (400, 200)),
+            self.render_text("Spacebar: Jump", 30, "White", (400, 250)),
+            self.render_text("Number keys: Change item", 30, "White", (400, 300)),
+            self.render_text("F3: Performance overlay", 30, "White", (400, 350)),
+            self.render_text("F5: Save (also saved on quit)", 30, "White", (400, 400)),
+        ]
+        OPTIONS_BACK = Button(image=None, pos=(400, 500),
+                              text_input="BACK", font=self.get_font(75), base_color="White", hovering_color="Green")
+
         while True:
             OPTIONS_MOUSE_POS = pygame.mouse.get_pos()
 
-            menu_bg2 = pygame.image.load("assets/gui/menu_background.jpg")
-            self.SCREEN.blit(menu_bg2, (0, 0))
-
-            OPTIONS_TEXT_1 = self.get_font(30).render("D: Moving right", True, "White")
-            OPTIONS_RECT_1 = OPTIONS_TEXT_1.get_rect(center=(400, 150))
-            self.SCREEN.blit(OPTIONS_TEXT_1, OPTIONS_RECT_1)
-
-            OPTIONS_TEXT_2 = self.get_font(30).render("A: Moving left", True, "White")
-            OPTIONS_RECT_2 = OPTIONS_TEXT_2.get_rect(center=(400, 200))
-            self.SCREEN.blit(OPTIONS_TEXT_2, OPTIONS_RECT_2)
-
-            OPTIONS_TEXT_3 = self.get_font(30).render("Spacebar: Jump", True, "White")
-            OPTIONS_RECT_3 = OPTIONS_TEXT_3.get_rect(center=(400, 250))
-            self.SCREEN.blit(OPTIONS_TEXT_3, OPTIONS_RECT_3)
-
-            OPTIONS_TEXT_4 = self.get_font(30).render("Number keys: Change item", True, "White")
-            OPTIONS_RECT_4 = OPTIONS_TEXT_4.get_rect(center=(400, 300))
-            self.SCREEN.blit(OPTIONS_TEXT_4, OPTIONS_RECT_4)
-
-            OPTIONS_BACK = Button(image=None, pos=(400, 450),
-                                  text_input="BACK", font=self.get_font(75), base_color="White", hovering_color="Green")
+            self.SCREEN.blit(self.BG, (0, 0))
+            for text, rect in OPTIONS_TEXTS:
+                self.SCREEN.blit(text, rect)
 
             OPTIONS_BACK.changeColor(OPTIONS_MOUSE_POS)
             OPTIONS_BACK.update(self.SCREEN)
@@ -52,25 +62,25 @@ class Menu:
                         return
 
             pygame.display.update()
+            self.clock.tick(self.fps)
 
     def volume_menu(self):
         running = True
         slider_rect = pygame.Rect(300, 300, 200, 10)
         knob_x = slider_rect.x + int(pygame.mixer.music.get_volume() * slider_rect.width)
 
+        VOLUME_TEXT, VOLUME_RECT = self.render_text("Volume", 40, "White", (400, 200))
+        BACK_BUTTON = Button(image=None, pos=(400, 500),
+                             text_input="BACK", font=self.get_font(30), base_color="#d7fcd4", hovering_color="Black")
+
         while running:
-            menu_bg = pygame.image.load("assets/gui/menu_background.jpg")
-            self.SCREEN.blit(menu_bg, (0, 0))
+            self.SCREEN.blit(self.BG, (0, 0))
             VOLUME_MOUSE_POS = pygame.mouse.get_pos()
-            VOLUME_TEXT = self.get_font(40).render("Volume", True, "White")
-            VOLUME_RECT = VOLUME_TEXT.get_rect(center=(400, 200))
             self.SCREEN.blit(VOLUME_TEXT, VOLUME_RECT)
 
             pygame.draw.rect(self.SCREEN, (200, 200, 200), slider_rect)
             pygame.draw.circle(self.SCREEN, (0, 0, 0), (knob_x, slider_rect.y + slider_rect.height // 2), 10)
 
-            BACK_BUTTON = Button(image=None, pos=(400, 500),
-                                 text_input="BACK", font=self.get_font(30), base_color="#d7fcd4", hovering_color="Black")
             BACK_BUTTON.changeColor(VOLUME_MOUSE_POS)
             BACK_BUTTON.update(self.SCREEN)
 
@@ -90,37 +100,31 @@ class Menu:
                         pygame.mixer.music.set_volume(volume)
 
             pygame.display.update()
+            self.clock.tick(self.fps)
 
     def main_menu(self):
-        Vol_icon = pygame.image.load("assets/gui/volume_icon.jpg").convert_alpha()
-        for x in range(Vol_icon.get_width()):
-            for y in range(Vol_icon.get_height()):
-                color = Vol_icon.get_at((x, y))
-                if color.r > 240 and color.g > 240 and color.b > 240:
-                    Vol_icon.set_at((x, y), (255, 255, 255, 0))
-
-        Vol_icon = pygame.transform.scale(Vol_icon, (90, 90))
+        Vol_icon = self.load_volume_icon()
         Vol_icon_rect = Vol_icon.get_rect(topleft=(720, 0.5))
 
+        MENU_TEXT, MENU_RECT = self.render_text("Block Mine", 60, "Black", (400, 70))
+        button_box = assets.image("assets/gui/gray_box.png")
+        PLAY_BUTTON = Button(image=button_box, pos=(400, 200),
+                             text_input="PLAY", font=self.get_font(30), base_color="#d7fcd4", hovering_color="Black")
+        OPTIONS_BUTTON = Button(image=button_box, pos=(400, 330),
+                                text_input="CONTROLS", font=self.get_font(30), base_color="#d7fcd4", hovering_color="Black")
+        QUIT_BUTTON = Button(image=button_box, pos=(400, 460),
+                             text_input="QUIT", font=self.get_font(30), base_color="#d7fcd4", hovering_color="Black")
+        buttons = [PLAY_BUTTON, OPTIONS_BUTTON, QUIT_BUTTON]
+
         game_run = True
         while game_run:
             self.SCREEN.blit(self.BG, (0, 0))
 
             MENU_MOUSE_POS = pygame.mouse.get_pos()
 
-            MENU_TEXT = self.get_font(60).render("Block Mine", True, "Black")
-            MENU_RECT = MENU_TEXT.get_rect(center=(400, 70))
-
-            PLAY_BUTTON = Button(image=pygame.image.load("assets/gui/gray_box.png"), pos=(400, 200),
-                                 text_input="PLAY", font=self.get_font(30), base_color="#d7fcd4", hovering_color="Black")
-            OPTIONS_BUTTON = Button(image=pygame.image.load("assets/gui/gray_box.png"), pos=(400, 330),
-                                    text_input="CONTROLS", font=self.get_font(30), base_color="#d7fcd4", hovering_color="Black")
-            QUIT_BUTTON = Button(image=pygame.image.load("assets/gui/gray_box.png"), pos=(400, 460),
-                                 text_input="QUIT", font=self.get_font(30), base_color="#d7fcd4", hovering_color="Black")
-
             self.SCREEN.blit(MENU_TEXT, MENU_RECT)
 
-            for button in [PLAY_BUTTON, OPTIONS_BUTTON, QUIT_BUTTON]:
+            for button in buttons:
                 button.changeColor(MENU_MOUSE_POS)
                 button.update(self.SCREEN)
 
@@ -142,6 +146,7 @@ class Menu:
                         game_run = True
             if game_run:
                 pygame.display.update()
+                self.clock.tick(self.fps)
         return game_run
 
 class Button():
@@ -152,7 +157,11 @@ class Button():
         self.font = font
         self.base_color, self.hovering_color = base_color, hovering_color
         self.text_input = text_input
-        self.text = self.font.render(self.text_input, True, self.base_color)
+        # Both colour states are rendered once; changeColor only swaps between them
+        self.base_text = self.font.render(self.text_input, True, self.base_color)
+        self.hover_text = self.font.render(self.text_input, True, self.hovering_color)
+        self.text = self.base_text
+        self.hovered = False
         if self.image is None:
             self.image = self.text
         self.rect = self.image.get_rect(center=(self.x_pos, self.y_pos))
@@ -164,13 +173,10 @@ class Button():
         screen.blit(self.text, self.text_rect)
 
     def checkForInput(self, position):
-        if position[0] in range(self.rect.left, self.rect.right) and position[1] in range(self.rect.top, self.rect.bottom):
-            return True
-        return False
+        return self.rect.collidepoint(position)
 
     def changeColor(self, position):
-        if position[0] in range(self.rect.left, self.rect.right) and position[1] in range(self.rect.top, self.rect.bottom):
-            self.text = self.font.render(self.text_input, True, self.hovering_color)
-        else:
-            self.text = self.font.render(self.text_input, True, self.base_color)
-
+        hovered = self.rect.collidepoint(position)
+        if hovered != self.hovered:
+            self.hovered = hovered
+            self.text = self.hover_text if hovered else self.base_text
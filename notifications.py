@@ -0,0 +1,68 @@
+from collections import deque
+import pygame
+from assets import assets
+
+
+class Notifications:
+    def __init__(self):
+        """
+        Timed on-screen messages such as "One Life Lost", drawn as part of the normal frame.
+
+        Messages are queued and shown one at a time, each for its own duration, so nothing has to
+        stop the game loop to keep a message on screen.
+        """
+        self.queue = deque()  # [surface, anchor, duration, shadow offset] of each message, the one on screen first
+        self.elapsed = 0.0  # Seconds the first message has been shown
+        self.fade_time = 0.25  # Messages fade out over their last this many seconds
+        self.shadow_offset = 3
+
+    def push(self, text, size=20, color=(255, 0, 0), anchor=(0.5, 0.75), duration=1.0, shadow=True):
+        """
+        Queue a message; its text and shadow are rendered once, here.
+
+        :param anchor: Where the message is centred, as fractions of the screen width and height, so it stays
+                       in place when the window is resized.
+        """
+        font = assets.font("assets/gui/menu_font.ttf", size)
+        text_surface = font.render(text, True, color)
+        offset = self.shadow_offset if shadow else 0
+        surface = pygame.Surface((text_surface.get_width() + offset, text_surface.get_height() + offset),
+                                 pygame.SRCALPHA)
+        if shadow:
+            surface.blit(font.render(text, True, (0, 0, 0)), (offset, offset))
+        surface.blit(text_surface, (0, 0))
+        self.queue.append([surface, anchor, duration, offset])
+
+    def clear(self):
+        self.queue.clear()
+        self.elapsed = 0.0
+
+    def is_active(self):
+        return bool(self.queue)
+
+    def update(self, dt):
+        """Advance the message on screen by dt seconds, moving on to the next one when its time is up."""
+        if not self.queue:
+            return
+        self.elapsed += dt
+        if self.elapsed >= self.queue[0][2]:
+            self.queue.popleft()
+            self.elapsed = 0.0
+
+    def screen_rect(self, screen):
+        """Screen area of the message on screen, or None."""
+        if not self.queue:
+            return None
+        surface, (anchor_x, anchor_y), _, offset = self.queue[0]
+        # Centred on the text, with the shadow hanging off its bottom right
+        return surface.get_rect(topleft=(int(screen.get_width() * anchor_x) - (surface.get_width() - offset) // 2,
+                                         int(screen.get_height() * anchor_y) - (surface.get_height() - offset) // 2))
+
+    def render(self, screen):
+        if not self.queue:
+            return
+        surface, _, duration, _ = self.queue[0]
+        rect = self.screen_rect(screen)
+        remaining = duration - self.elapsed
+        surface.set_alpha(255 if remaining >= self.fade_time else int(255 * remaining / self.fade_time))
+        screen.blit(surface, rect)
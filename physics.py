@@ -0,0 +1,96 @@
+from collections import deque
+from blocks import AIR, FALLS, FLOWING_WATER, FLUID_LEVEL, FLUID_SOURCE, block_type
+from profiler import profiler
+
+
+class BlockPhysics:
+    def __init__(self, world, budget=256):
+        """
+        Falling blocks and flowing fluids, as a cellular automaton over an active set of tiles.
+
+        Nothing sweeps the map: every World.set_block puts the changed tile and its four neighbours
+        in a queue, and each simulation step evaluates the tiles queued before it against their
+        neighbours. A tile that changes queues its neighbours again, so a collapse or a flood keeps
+        spreading over the following steps and stops by itself once nothing changes. At most budget
+        tiles are evaluated per step; the rest wait, so a large collapse spreads over several frames.
+
+        Moves are made with World.set_block, the same path mining and placing take, so the chunk
+        caches, saving, collisions and entities see them like any other edit.
+
+        :param world: World whose blocks are simulated.
+        :param budget: Most tiles evaluated per simulation step.
+        """
+        self.world = world
+        self.budget = budget
+        self.queue = deque()  # Tiles to evaluate, in the order they were queued
+        self.queued = set()  # The same tiles, so a tile is queued at most once
+
+    def schedule(self, tile_x, tile_y):
+        """Queue a tile and its four neighbours for evaluation."""
+        for tile in ((tile_x, tile_y), (tile_x, tile_y - 1), (tile_x - 1, tile_y), (tile_x + 1, tile_y),
+                     (tile_x, tile_y + 1)):
+            if tile not in self.queued:
+                self.queued.add(tile)
+                self.queue.append(tile)
+
+    def peek(self, tile_x, tile_y):
+        """Return the block ID at a tile, or None outside the world or the loaded chunks, where nothing moves to."""
+        world = self.world
+        if not world.top_row <= tile_y < world.top_row + world.world_height:
+            return None
+        chunk = world.chunks.get((tile_x // world.chunk_size, tile_y // world.chunk_size))
+        return None if chunk is None else chunk.get(tile_x, tile_y)
+
+    def update(self, players):
+        """Evaluate the tiles queued before this step, up to the budget; the players' tiles are not fallen into."""
+        count = min(len(self.queue), self.budget)
+        for _ in range(count):
+            tile = self.queue.popleft()
+            self.queued.discard(tile)
+            self.evaluate(tile[0], tile[1], players)
+        profiler.count('physics_updates', count)
+
+    def evaluate(self, tile_x, tile_y, players):
+        block = self.peek(tile_x, tile_y)
+        if block is None:
+            return
+        world = self.world
+
+        if FALLS[block]:
+            below = self.peek(tile_x, tile_y + 1)
+            if below is not None and (below == AIR or FLUID_LEVEL[below]):
+                below_rect = world.get_tile_rect(tile_x, tile_y + 1)
+                if any(player.rect.colliderect(below_rect) for player in players):
+                    self.schedule(tile_x, tile_y)  # Held up by a player; try again next step
+                    return
+                # Swap down; fluid it falls into is displaced and recomputed from its neighbours
+                world.set_block(tile_x, tile_y + 1, block_type(block))
+                world.set_block(tile_x, tile_y, None)
+            return
+
+        # Air and flowing fluid take the level their neighbours give them; sources never change
+        level = FLUID_LEVEL[block]
+        if block != AIR and not 0 < level < FLUID_SOURCE:
+            return
+        expected = self.fed_level(tile_x, tile_y)
+        if expected != level:
+            world.set_block(tile_x, tile_y, block_type(FLOWING_WATER[expected]) if expected else None)
+
+    def fed_level(self, tile_x, tile_y):
+        """
+        Level of flowing fluid a tile should hold: the highest below a source if fluid is above it, otherwise
+        one less than the highest neighbour beside it that is spreading sideways; 0 for none.
+        """
+        above = self.peek(tile_x, tile_y - 1)
+        if above is not None and FLUID_LEVEL[above]:
+            return FLUID_SOURCE - 1
+        level = 0
+        for side_x in (tile_x - 1, tile_x + 1):
+            side = self.peek(side_x, tile_y)
+            if side is None or FLUID_LEVEL[side] <= 1:
+                continue
+            # Fluid only spreads sideways from where it cannot fall any further: on a block or a source
+            beneath = self.peek(side_x, tile_y + 1)
+            if beneath is None or FLUID_LEVEL[beneath] == FLUID_SOURCE or (beneath != AIR and not FLUID_LEVEL[beneath]):
+                level = max(level, FLUID_LEVEL[side] - 1)
+        return level
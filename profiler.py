@@ -0,0 +1,156 @@
+import csv
+import time
+import numpy as np
+import pygame
+from assets import assets
+
+# Timed phases of a frame, in the order Game.run goes through them
+PHASES = ('events', 'update', 'world', 'player', 'hud', 'flip', 'autosave')
+# Per-frame counters the game code reports through FrameProfiler.count
+COUNTERS = ('chunks_blitted', 'tiles_blitted', 'collision_checks', 'entities_simulated', 'physics_updates',
+            'light_updates')
+
+
+class FrameProfiler:
+    def __init__(self, capacity=600):
+        """
+        Per-phase frame timings and counters, kept for the last capacity frames in a ring buffer.
+
+        Game code calls mark() at the end of each phase and count() for the counters; while the
+        profiler is disabled both return straight away, so it can stay wired in permanently.
+
+        :param capacity: Number of frames kept; older frames are overwritten.
+        """
+        self.enabled = False
+        self.overlay_visible = False
+        self.columns = ('frame',) + PHASES + COUNTERS
+        self.column_index = {name: i for i, name in enumerate(self.columns)}
+        self.buffer = np.zeros((capacity, len(self.columns)))
+        self.index = 0  # Row the next finished frame is written to
+        self.frames = 0  # Frames recorded in total
+        self.current = [0.0] * len(self.columns)
+        self.status = {}  # Name -> latest text of things reported now and then rather than every frame
+        self.last_mark = 0.0
+        self.last_frame_end = None
+
+        # Overlay
+        self.font = None
+        self.overlay_text = []
+        self.panel = None
+        self.graph_size = (240, 60)
+        self.graph_budget = 1 / 30  # Frame time drawn at the top of the graph, in seconds
+
+    def enable(self):
+        if not self.enabled:
+            self.enabled = True
+            self.last_frame_end = None
+
+    def toggle_overlay(self):
+        """Show or hide the on-screen overlay; showing it starts recording if the profiler was off."""
+        self.overlay_visible = not self.overlay_visible
+        if self.overlay_visible:
+            self.enable()
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.last_mark = time.perf_counter()
+
+    def mark(self, phase):
+        """Charge the time since the previous mark (or begin_frame) to phase."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.current[self.column_index[phase]] += now - self.last_mark
+        self.last_mark = now
+
+    def count(self, counter, amount=1):
+        if not self.enabled:
+            return
+        self.current[self.column_index[counter]] += amount
+
+    def set_status(self, name, text):
+        """Show text under the counters until the next status of that name, e.g. the last autosave."""
+        self.status[name] = text
+
+    def end_frame(self):
+        """Store the frame in the ring buffer; its frame time runs from the previous end_frame, idle time included."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.last_frame_end is not None:
+            self.current[0] = now - self.last_frame_end
+        self.last_frame_end = now
+        self.buffer[self.index] = self.current
+        self.index = (self.index + 1) % len(self.buffer)
+        self.frames += 1
+        self.current = [0.0] * len(self.columns)
+
+    def recent(self, count=None):
+        """Return up to count of the latest recorded frames, oldest first, as rows of self.columns."""
+        stored = min(self.frames, len(self.buffer))
+        count = stored if count is None else min(count, stored)
+        rows = np.arange(self.index - count, self.index) % len(self.buffer)
+        return self.buffer[rows]
+
+    def dump(self, path):
+        """Write the buffered frames to a CSV file, times in milliseconds."""
+        frames = self.recent()
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow([f'{name}_ms' for name in ('frame',) + PHASES] + list(COUNTERS))
+            timed = 1 + len(PHASES)
+            for row in frames:
+                writer.writerow([f'{value * 1000:.3f}' for value in row[:timed]] + [int(value) for value in row[timed:]])
+
+    def overlay_rect(self, screen):
+        """Screen area the overlay covers, or None while it is hidden."""
+        if not self.overlay_visible or self.panel is None:
+            return None
+        return self.panel.get_rect(topleft=(screen.get_width() - self.graph_size[0] - 15, 5))
+
+    def render_overlay(self, screen):
+        """Draw FPS, average phase times, counters and a frame-time graph in the top right corner."""
+        if not self.overlay_visible:
+            return
+        frames = self.recent(self.graph_size[0])
+        if len(frames) == 0:
+            return
+        if self.font is None:
+            self.font = assets.font(None, 20)
+
+        # The text only changes a few times a second, so it is re-rendered every 15 frames rather than every frame
+        if self.frames % 15 == 0 or not self.overlay_text:
+            window = frames[-60:]
+            average = window.mean(axis=0)
+            frame_time = average[0]
+            lines = [f'FPS {1 / frame_time:.0f}  frame {frame_time * 1000:.1f} ms' if frame_time else 'FPS -']
+            lines += [f'{phase:<7} {average[self.column_index[phase]] * 1000:.2f} ms' for phase in PHASES]
+            lines += [f'{counter.replace("_", " ")} {average[self.column_index[counter]]:.0f}' for counter in COUNTERS]
+            lines += [f'{name} {text}' for name, text in self.status.items()]
+            self.overlay_text = [self.font.render(line, True, (255, 255, 255)) for line in lines]
+
+        width, height = self.graph_size
+        left = screen.get_width() - width - 10
+        top = 10
+        panel_height = height + 10 + len(self.overlay_text) * 16
+        if self.panel is None or self.panel.get_height() != panel_height:
+            self.panel = pygame.Surface((width + 10, panel_height), pygame.SRCALPHA)
+            self.panel.fill((0, 0, 0, 160))
+        screen.blit(self.panel, (left - 5, top - 5))
+
+        # Frame-time graph, newest frame on the right, with a line at the 60 FPS budget
+        budget_y = top + height - int(height * (1 / 60) / self.graph_budget)
+        pygame.draw.line(screen, (0, 160, 0), (left, budget_y), (left + width, budget_y))
+        if len(frames) > 1:
+            heights = np.minimum(frames[:, 0] / self.graph_budget, 1.0) * height
+            points = [(left + width - len(frames) + i, top + height - h) for i, h in enumerate(heights)]
+            pygame.draw.lines(screen, (255, 200, 0), False, points)
+
+        y = top + height + 5
+        for text in self.overlay_text:
+            screen.blit(text, (left, y))
+            y += 16
+
+
+profiler = FrameProfiler()
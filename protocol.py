@@ -0,0 +1,120 @@
+import struct
+import zlib
+from controls import decode_step, encode_step
+
+# Every message is a FRAME header followed by its payload. Clients send input, never positions: the
+# server owns the world and the players and streams back what changed (see server.py and client.py)
+PROTOCOL_MAGIC = b'BMNT'
+PROTOCOL_VERSION = 2
+FRAME = struct.Struct('<IB')  # Payload length, message type
+MAX_PAYLOAD = 1 << 20  # Longer frames are refused, so a bad peer cannot make the reader buffer without bound
+TILE_SIZE = 32  # Pixels per tile of the world, the unit of the positions in PLAYER_ENTRY
+
+# Client to server
+HELLO = 1  # HELLO_BODY, the first message of a connection
+INPUT = 2  # A StepInput as written by controls.encode_step; its held actions last until the next INPUT
+HELLO_BODY = struct.Struct('<4sH')  # Magic, protocol version
+
+# Server to client
+WELCOME = 101  # WELCOME_BODY, the answer to HELLO
+CHUNK = 102  # CHUNK_POS, then the chunk's zlib-compressed block IDs: a snapshot of a chunk coming into view
+FORGET = 103  # CHUNK_POS of a chunk gone out of view, which gets no more deltas
+DELTA = 104  # DELTA_HEADER, then a DELTA_ENTRY per tile changed in the chunks in view, zlib-compressed if flagged
+PLAYERS = 105  # PLAYERS_HEADER, then a PLAYER_ENTRY per player
+WELCOME_BODY = struct.Struct('<HqHBiH')  # Player ID, world seed, steps per second, chunk size, top row, world height
+CHUNK_POS = struct.Struct('<ii')
+DELTA_HEADER = struct.Struct('<IB')  # Server step, compressed flag
+DELTA_ENTRY = struct.Struct('<iiB')  # Tile x, tile y, block ID
+DELTA_COMPRESS_MIN = 128  # Entry bytes from which a delta is worth compressing
+PLAYERS_HEADER = struct.Struct('<IH')  # Server step, number of players
+PLAYER_ENTRY = struct.Struct('<HiiB')  # Player ID, x, y in pixels, lives
+MAX_PLAYER_ID = 0xFFFF  # Largest ID the 16-bit fields of WELCOME_BODY and PLAYER_ENTRY hold
+
+
+class ProtocolError(Exception):
+    """A peer sent something that is not a valid message; the connection is dropped."""
+
+
+def frame(message_type, payload=b''):
+    return FRAME.pack(len(payload), message_type) + payload
+
+
+async def read_message(reader):
+    """Read one message from an asyncio StreamReader; returns (message type, payload)."""
+    length, message_type = FRAME.unpack(await reader.readexactly(FRAME.size))
+    if length > MAX_PAYLOAD:
+        raise ProtocolError(f'Frame of {length} bytes is over the limit')
+    return message_type, await reader.readexactly(length)
+
+
+def encode_hello():
+    return frame(HELLO, HELLO_BODY.pack(PROTOCOL_MAGIC, PROTOCOL_VERSION))
+
+
+def check_hello(message_type, payload):
+    if message_type != HELLO or len(payload) != HELLO_BODY.size:
+        raise ProtocolError('Expected HELLO')
+    magic, version = HELLO_BODY.unpack(payload)
+    if magic != PROTOCOL_MAGIC or version != PROTOCOL_VERSION:
+        raise ProtocolError(f'Unsupported protocol {magic!r} version {version}')
+
+
+def encode_input(step):
+    return frame(INPUT, encode_step(step))
+
+
+def decode_input(payload):
+    """Return the StepInput of an INPUT payload."""
+    try:
+        step, end = decode_step(payload)
+    except struct.error as error:
+        raise ProtocolError(f'Truncated INPUT: {error}') from None
+    if end != len(payload):
+        raise ProtocolError('Trailing bytes after INPUT')
+    return step
+
+
+def encode_chunk(chunk_pos, compressed_blocks):
+    return frame(CHUNK, CHUNK_POS.pack(*chunk_pos) + compressed_blocks)
+
+
+def decode_chunk(payload):
+    """Return (chunk position, block IDs) of a CHUNK payload."""
+    return CHUNK_POS.unpack_from(payload), bytearray(zlib.decompress(payload[CHUNK_POS.size:]))
+
+
+def encode_forget(chunk_pos):
+    return frame(FORGET, CHUNK_POS.pack(*chunk_pos))
+
+
+def decode_forget(payload):
+    """Return the chunk position of a FORGET payload."""
+    return CHUNK_POS.unpack(payload)
+
+
+def encode_delta(step, changes):
+    """A DELTA message of (tile x, tile y, block ID) changes."""
+    entries = b''.join(DELTA_ENTRY.pack(*change) for change in changes)
+    compressed = len(entries) >= DELTA_COMPRESS_MIN
+    return frame(DELTA, DELTA_HEADER.pack(step, compressed) + (zlib.compress(entries) if compressed else entries))
+
+
+def decode_delta(payload):
+    """Return (server step, list of (tile x, tile y, block ID)) of a DELTA payload."""
+    step, compressed = DELTA_HEADER.unpack_from(payload)
+    entries = payload[DELTA_HEADER.size:]
+    if compressed:
+        entries = zlib.decompress(entries)
+    return step, list(DELTA_ENTRY.iter_unpack(entries))
+
+
+def encode_players(step, players):
+    """A PLAYERS message of (player ID, x, y, lives) entries."""
+    return frame(PLAYERS, PLAYERS_HEADER.pack(step, len(players))
+                 + b''.join(PLAYER_ENTRY.pack(*player) for player in players))
+
+
+def decode_players(payload):
+    """Return (server step, list of (player ID, x, y, lives)) of a PLAYERS payload."""
+    step, _ = PLAYERS_HEADER.unpack_from(payload)
+    return step, list(PLAYER_ENTRY.iter_unpack(payload[PLAYERS_HEADER.size:]))
@@ -0,0 +1,216 @@
+import argparse
+import mmap
+import os
+import struct
+import threading
+from blocks import BLOCK_TYPES, BLOCK_IDS
+
+# Region files hold REGION_SIZE x REGION_SIZE chunks: a header, a table with an (offset, length) entry per
+# chunk (offset 0 when the chunk is not stored), then the zlib-compressed block IDs of each stored chunk
+REGION_SIZE = 32
+REGION_MAGIC = b'BMRG'
+REGION_HEADER = struct.Struct('<4sHH')  # Magic, format version, chunk size
+REGION_ENTRY = struct.Struct('<II')  # Offset from the start of the file, compressed length
+REGION_TABLE_START = REGION_HEADER.size
+
+REGION_VERSION = 1
+
+# world.dat: world settings and the player, followed by one entry per inventory stack
+STATE_MAGIC = b'BMSV'
+STATE_HEADER = struct.Struct('<4sHHIqd')  # Magic, version, chunk size, world height, seed, world clock
+PLAYER_STATE = struct.Struct('<iiidBB')  # x, y, lives, stamina, selected slot, inventory stacks
+INVENTORY_STACK = struct.Struct('<BBI')  # Slot, block ID, count
+STATE_VERSION = 2
+MIN_SEED, MAX_SEED = -2 ** 63, 2 ** 63 - 1  # Seeds the seed field of STATE_HEADER holds
+
+
+def parse_seed(text):
+    """Parse a --seed command line argument, refusing seeds too large to be saved."""
+    seed = int(text)
+    if not MIN_SEED <= seed <= MAX_SEED:
+        raise argparse.ArgumentTypeError(f'seed must be between {MIN_SEED} and {MAX_SEED}')
+    return seed
+
+
+class SaveStore:
+    def __init__(self, directory, chunk_size=16, world_height=200):
+        """
+        A saved world on disk: world.dat for the world settings and player, plus region files of chunks.
+
+        Only chunks that differ from what the seed generates are stored; everything else is regenerated.
+        Region files are memory-mapped and opened only when a chunk inside them is asked for, and a chunk
+        is decompressed only when it is loaded, so opening a save costs the same however large it is.
+        Every file is written to a temporary name and renamed over the old one, so a crash mid-save
+        leaves the previous save intact. Writes may run on a background thread while the game reads.
+
+        :param directory: Folder the save lives in; created on the first write.
+        :param chunk_size: Width and height of a chunk in tiles; must match the world's and the save's.
+        :param world_height: Height of the world in tiles; must match the world's and the save's.
+        """
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.world_height = world_height
+        self.regions = {}  # (region_x, region_y) -> mmap of the region file, or None if there is none
+        self.lock = threading.Lock()  # Guards self.regions against a writer replacing a file that is being read
+
+    def state_path(self):
+        return os.path.join(self.directory, 'world.dat')
+
+    def region_path(self, region_pos):
+        return os.path.join(self.directory, f'r.{region_pos[0]}.{region_pos[1]}.bin')
+
+    def region(self, region_pos):
+        """
+        Return the memory map of a region file, opening it on first use; None if it does not exist.
+
+        Callers must hold self.lock.
+        """
+        if region_pos not in self.regions:
+            try:
+                with open(self.region_path(region_pos), 'rb') as f:
+                    region = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except FileNotFoundError:
+                region = None
+            if region is not None:
+                magic, version, chunk_size = REGION_HEADER.unpack_from(region)
+                if magic != REGION_MAGIC or version != REGION_VERSION or chunk_size != self.chunk_size:
+                    region.close()
+                    raise ValueError(f'{self.region_path(region_pos)} is not a compatible region file')
+            self.regions[region_pos] = region
+        return self.regions[region_pos]
+
+    def locate(self, chunk_pos):
+        """Return (region position, index of the chunk in that region's table)."""
+        chunk_x, chunk_y = chunk_pos
+        region_pos = (chunk_x // REGION_SIZE, chunk_y // REGION_SIZE)
+        return region_pos, (chunk_y % REGION_SIZE) * REGION_SIZE + chunk_x % REGION_SIZE
+
+    def read_compressed(self, chunk_pos):
+        """Return the compressed block IDs stored for a chunk, or None if the chunk was never saved."""
+        region_pos, index = self.locate(chunk_pos)
+        with self.lock:
+            region = self.region(region_pos)
+            if region is None:
+                return None
+            offset, length = REGION_ENTRY.unpack_from(region, REGION_TABLE_START + index * REGION_ENTRY.size)
+            if offset == 0:
+                return None
+            return region[offset:offset + length]
+
+    def has_chunk(self, chunk_pos):
+        region_pos, index = self.locate(chunk_pos)
+        with self.lock:
+            region = self.region(region_pos)
+            if region is None:
+                return False
+            return REGION_ENTRY.unpack_from(region, REGION_TABLE_START + index * REGION_ENTRY.size)[0] != 0
+
+    def write_chunks(self, chunks):
+        """
+        Store chunks, given as a dict of (chunk_x, chunk_y) -> zlib-compressed block IDs.
+
+        Each affected region file is rewritten with its other chunks carried over unchanged. The lock is
+        only held to copy the old entries and to swap the new file in, not while writing to disk.
+        """
+        by_region = {}
+        for chunk_pos, data in chunks.items():
+            region_pos, index = self.locate(chunk_pos)
+            by_region.setdefault(region_pos, {})[index] = data
+
+        os.makedirs(self.directory, exist_ok=True)
+        for region_pos, updates in by_region.items():
+            entries = {}
+            with self.lock:
+                region = self.region(region_pos)
+                if region is not None:
+                    for index in range(REGION_SIZE * REGION_SIZE):
+                        offset, length = REGION_ENTRY.unpack_from(region, REGION_TABLE_START + index * REGION_ENTRY.size)
+                        if offset and index not in updates:
+                            entries[index] = region[offset:offset + length]
+            entries.update(updates)
+
+            table = bytearray(REGION_SIZE * REGION_SIZE * REGION_ENTRY.size)
+            offset = REGION_TABLE_START + len(table)
+            for index in sorted(entries):
+                REGION_ENTRY.pack_into(table, index * REGION_ENTRY.size, offset, len(entries[index]))
+                offset += len(entries[index])
+            payload = [REGION_HEADER.pack(REGION_MAGIC, REGION_VERSION, self.chunk_size), table]
+            payload += [entries[index] for index in sorted(entries)]
+
+            path = self.region_path(region_pos)
+            temporary = self.write_temporary(path, payload)
+            # The old map has to be closed before the file is replaced; it is reopened on the next read
+            with self.lock:
+                region = self.regions.pop(region_pos, None)
+                if region is not None:
+                    region.close()
+                os.replace(temporary, path)
+
+    def encode_state(self, world, player):
+        """Pack the world settings, world clock and the player's position, health, stamina and inventory."""
+        stacks = list(player.inventory.stacks())
+        payload = [
+            STATE_HEADER.pack(STATE_MAGIC, STATE_VERSION, world.chunk_size, world.world_height, world.seed,
+                              world.elapsed_time),
+            PLAYER_STATE.pack(player.rect.x, player.rect.y, player.lives, player.stamina, player.inventory.selected,
+                              len(stacks)),
+        ]
+        payload += [INVENTORY_STACK.pack(slot, BLOCK_IDS[block_type], count) for slot, block_type, count in stacks]
+        return b''.join(payload)
+
+    def write_state(self, state):
+        """Store a state packed by encode_state."""
+        os.makedirs(self.directory, exist_ok=True)
+        os.replace(self.write_temporary(self.state_path(), [state]), self.state_path())
+
+    def read_state(self):
+        """Return the saved state as a dict, or None if nothing has been saved here yet."""
+        try:
+            with open(self.state_path(), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+
+        magic, version, chunk_size, world_height, seed, elapsed_time = STATE_HEADER.unpack_from(data)
+        if magic != STATE_MAGIC or version != STATE_VERSION:
+            raise ValueError(f'{self.state_path()} is not a compatible save file')
+        if chunk_size != self.chunk_size:
+            raise ValueError(f'{self.state_path()} was saved with {chunk_size}-tile chunks, not {self.chunk_size}')
+        if world_height != self.world_height:
+            raise ValueError(f'{self.state_path()} was saved with a world {world_height} tiles high, not {self.world_height}')
+
+        x, y, lives, stamina, selected, entries = PLAYER_STATE.unpack_from(data, STATE_HEADER.size)
+        offset = STATE_HEADER.size + PLAYER_STATE.size
+        stacks = []
+        for _ in range(entries):
+            slot, block_id, count = INVENTORY_STACK.unpack_from(data, offset)
+            stacks.append((slot, BLOCK_TYPES[block_id], count))
+            offset += INVENTORY_STACK.size
+
+        return {
+            'seed': seed,
+            'world_height': world_height,
+            'elapsed_time': elapsed_time,
+            'position': (x, y),
+            'lives': lives,
+            'stamina': stamina,
+            'selected': selected,
+            'stacks': stacks,
+        }
+
+    def write_temporary(self, path, parts):
+        """Write parts to a temporary file next to path and flush it to disk; the caller renames it over path."""
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as f:
+            for part in parts:
+                f.write(part)
+            f.flush()
+            os.fsync(f.fileno())
+        return temporary
+
+    def close(self):
+        with self.lock:
+            for region in self.regions.values():
+                if region is not None:
+                    region.close()
+            self.regions.clear()
@@ -0,0 +1,246 @@
+import argparse
+import asyncio
+import time
+import zlib
+from collections import deque
+from player import Player
+from protocol import (FRAME, INPUT, MAX_PLAYER_ID, TILE_SIZE, WELCOME, WELCOME_BODY, ProtocolError, check_hello,
+                      decode_input, encode_chunk, encode_delta, encode_forget, encode_players, frame, read_message)
+from savegame import parse_seed
+from world import World
+
+
+class Connection:
+    def __init__(self, player_id, player, writer):
+        """
+        A connected client and the player it controls.
+
+        :param player_id: ID the player is known by to every client.
+        :param player: Player simulated by the server for this client.
+        :param writer: asyncio StreamWriter of the client's socket.
+        """
+        self.player_id = player_id
+        self.player = player
+        self.writer = writer
+        self.inputs = deque()  # StepInputs received since the last step, oldest first
+        self.held = 0  # Held actions of the latest input, which last until the next one
+        self.chunks = set()  # Chunks the client has a snapshot of and gets deltas for
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def send(self, data):
+        self.writer.write(data)
+        self.bytes_sent += len(data)
+
+
+class GameServer:
+    def __init__(self, seed=None, steps_per_second=60, view_radius=None, max_buffered=1 << 20):
+        """
+        Authoritative multiplayer server: it owns the world and every player and steps them at a fixed rate.
+
+        Clients connect over TCP (see protocol.py) and only ever send input; the server applies it at its
+        next step, the same way Game.update applies local input. After each step every client is sent
+        what it needs to mirror the world around its player: a compressed snapshot of each chunk coming
+        into view, then only the tiles that changed in the chunks it has, and the players' positions
+        whenever they moved. Chunk changes are collected from World.chunk_changed, so mining, physics and
+        batched edits all reach the clients the same way, once per step however often a tile changed.
+
+        :param seed: World seed; a random one is used when None.
+        :param steps_per_second: Simulation steps per second.
+        :param view_radius: Chunks streamed around each player, in chunks; the world's load radius when None.
+        :param max_buffered: Bytes of unsent output a client may fall behind by before it is dropped.
+        """
+        self.world = World(seed)
+        if self.world.tile_size != TILE_SIZE:
+            raise ValueError(f'The world uses {self.world.tile_size}-pixel tiles, the protocol {TILE_SIZE}-pixel ones')
+        self.step_time = 1 / steps_per_second
+        self.steps_per_second = steps_per_second
+        self.view_radius = self.world.load_radius if view_radius is None else view_radius
+        self.max_buffered = max_buffered
+        self.spawn = (0, 0)  # Pixel position players join and respawn at
+        self.connections = {}  # Player ID -> Connection
+        self.step = 0
+        self.changed = {}  # Chunk position -> tiles changed during the current step
+        self.snapshots = {}  # Chunk position -> compressed blocks, kept while the chunk is unchanged
+        self.sent_players = None  # PLAYERS entries last sent to everyone
+        self.step_times = deque(maxlen=3600)  # Seconds each recent step took, streaming included
+        self.server = None
+        self.task = None
+        self.handlers = set()  # Tasks of handle_client, one per open connection
+        self.world.add_change_listener(self.chunk_changed)
+
+    async def start(self, host='127.0.0.1', port=0):
+        """Start listening and stepping; returns the port, which is picked by the system when port is 0."""
+        self.server = await asyncio.start_server(self.handle_client, host, port)
+        self.task = asyncio.create_task(self.run())
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """Stop stepping and disconnect every client."""
+        self.task.cancel()
+        self.server.close()
+        for connection in self.connections.values():
+            connection.writer.close()  # Its handler sees the end of the stream and returns
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        await self.server.wait_closed()
+        self.world.close()
+
+    async def run(self):
+        """Step at the fixed rate; steps that fall more than a second behind are skipped, not caught up."""
+        loop = asyncio.get_running_loop()
+        next_step = loop.time()
+        while True:
+            self.update()
+            next_step += self.step_time
+            delay = next_step - loop.time()
+            if delay < -1:
+                next_step = loop.time()
+            await asyncio.sleep(max(delay, 0))
+
+    async def handle_client(self, reader, writer):
+        """Serve one client: the handshake, then its input until it disconnects or misbehaves."""
+        self.handlers.add(asyncio.current_task())
+        try:
+            check_hello(*await read_message(reader))
+            # IDs are reused once their player leaves, so they stay within the 16 bits the protocol gives them
+            player_id = next(player_id for player_id in range(1, len(self.connections) + 2)
+                             if player_id not in self.connections)
+            if player_id > MAX_PLAYER_ID:
+                raise ProtocolError('The server is full')
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError):
+            self.handlers.discard(asyncio.current_task())
+            writer.close()
+            return
+
+        connection = Connection(player_id, Player(*self.spawn), writer)
+        world = self.world
+        connection.send(frame(WELCOME, WELCOME_BODY.pack(player_id, world.seed, self.steps_per_second,
+                                                         world.chunk_size, world.top_row, world.world_height)))
+        self.connections[player_id] = connection
+        self.sent_players = None  # The new client needs the players even if none moved
+        try:
+            while True:
+                message_type, payload = await read_message(reader)
+                connection.bytes_received += FRAME.size + len(payload)
+                if message_type != INPUT:
+                    raise ProtocolError(f'Unexpected message type {message_type}')
+                connection.inputs.append(decode_input(payload))
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError):
+            pass
+        finally:
+            self.handlers.discard(asyncio.current_task())
+            self.connections.pop(player_id, None)
+            self.sent_players = None
+            writer.close()
+
+    def chunk_changed(self, chunk_pos, tiles):
+        self.changed.setdefault(chunk_pos, set()).update(tiles)
+        self.snapshots.pop(chunk_pos, None)
+
+    def update(self):
+        """Advance the world and every player by one step, then stream the results to the clients."""
+        start = time.perf_counter()
+        world = self.world
+        connections = list(self.connections.values())
+        players = [connection.player for connection in connections]
+
+        # With nobody connected the chunks around the spawn point stay loaded, ready for the next player
+        spawn_tile = (self.spawn[0] // world.tile_size, self.spawn[1] // world.tile_size)
+        world.update_chunks_around([player.get_pos() for player in players] or [spawn_tile])
+        world.advance_clock(self.step_time)
+        for connection in connections:
+            # Every input that arrived is applied, in order: the latest held actions and all the clicks
+            actions = []
+            while connection.inputs:
+                step_input = connection.inputs.popleft()
+                connection.held = step_input.held
+                actions += step_input.actions
+            connection.player.apply_actions(world, actions)
+            connection.player.update(None, world, connection.held)
+        world.physics.update(players)
+        world.entities.update(players)
+        for connection in connections:
+            if connection.player.pending_damage:
+                connection.player.lives -= len(connection.player.pending_damage)
+                connection.player.pending_damage.clear()
+                if connection.player.lives <= 0:
+                    connection.player = Player(*self.spawn)  # Game over: start again at the spawn point
+
+        # Nothing is drawn here, so the renderer's dirty areas would only pile up
+        world.changed_rects.clear()
+        world.entities.clear_dirty()
+
+        self.stream(connections)
+        self.step += 1
+        self.step_times.append(time.perf_counter() - start)
+
+    def stream(self, connections):
+        """Send each client the chunks that came into and went out of its view, the changed tiles and the players."""
+        world = self.world
+        size = world.chunk_size
+        top = world.top_row // size
+        bottom = (world.top_row + world.world_height - 1) // size
+        for chunk_pos in list(self.snapshots):
+            if chunk_pos not in world.chunks:
+                del self.snapshots[chunk_pos]
+
+        for connection in connections:
+            if connection.writer.transport.get_write_buffer_size() > self.max_buffered:
+                connection.writer.close()  # Too slow to keep up; handle_client drops it
+                continue
+            tile_x, tile_y = connection.player.get_pos()
+            center_x, center_y = tile_x // size, tile_y // size
+
+            # Deltas only for chunks the client already had; the snapshots below are taken after this step
+            changes = [(x, y, world.get_block_id(x, y)) for chunk_pos, tiles in self.changed.items()
+                       if chunk_pos in connection.chunks for x, y in tiles]
+            if changes:
+                connection.send(encode_delta(self.step, changes))
+
+            radius = self.view_radius
+            for chunk_y in range(max(center_y - radius, top), min(center_y + radius, bottom) + 1):
+                for chunk_x in range(center_x - radius, center_x + radius + 1):
+                    if (chunk_x, chunk_y) not in connection.chunks:
+                        connection.send(encode_chunk((chunk_x, chunk_y), self.snapshot((chunk_x, chunk_y))))
+                        connection.chunks.add((chunk_x, chunk_y))
+            # A chunk is only forgotten a chunk past the view, so walking along a border does not resend it
+            for chunk_pos in [chunk_pos for chunk_pos in connection.chunks
+                              if max(abs(chunk_pos[0] - center_x), abs(chunk_pos[1] - center_y)) > radius + 1]:
+                connection.send(encode_forget(chunk_pos))
+                connection.chunks.discard(chunk_pos)
+        self.changed.clear()
+
+        entries = [(connection.player_id, connection.player.rect.x, connection.player.rect.y,
+                    max(connection.player.lives, 0)) for connection in connections]
+        if entries != self.sent_players:
+            message = encode_players(self.step, entries)
+            for connection in connections:
+                connection.send(message)
+            self.sent_players = entries
+
+    def snapshot(self, chunk_pos):
+        """Return the compressed blocks of a chunk, compressing them only once while the chunk is unchanged."""
+        snapshot = self.snapshots.get(chunk_pos)
+        if snapshot is None:
+            snapshot = zlib.compress(bytes(self.world.get_chunk(*chunk_pos).blocks))
+            self.snapshots[chunk_pos] = snapshot
+        return snapshot
+
+
+async def serve(host, port, seed):
+    server = GameServer(seed)
+    port = await server.start(host, port)
+    print(f'Serving world {server.world.seed} on {host}:{port}')
+    await server.task
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Block Mine multiplayer server')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=5150, help='Port to listen on')
+    parser.add_argument('--seed', type=parse_seed, help='World seed')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.seed))
+    except KeyboardInterrupt:
+        pass
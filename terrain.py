@@ -0,0 +1,233 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+import numpy as np
+from blocks import AIR, BLOCK_IDS, WATER
+
+# Surface features a column can carry on top of its grass block
+NO_FEATURE = 0
+TREE = 1
+FLOWER1 = 2
+FLOWER2 = 3
+BOMB = 4
+
+GRASS = BLOCK_IDS['grass']
+DIRT = BLOCK_IDS['dirt']
+COBBLESTONE = BLOCK_IDS['cobblestone']
+WOOD = BLOCK_IDS['wood']
+LEAVES = BLOCK_IDS['leaves']
+
+# Block drawn on top of the grass for each feature (air where the feature is not a block)
+FEATURE_BLOCKS = np.array([AIR, AIR, BLOCK_IDS['flower1'], BLOCK_IDS['flower2'], BLOCK_IDS['bomb']], dtype=np.uint8)
+
+# Deep layer ores: a roll <= 0.05 is gem, <= 0.4 cobblestone, <= 0.7 granite, andesite otherwise
+ORE_THRESHOLDS = np.array([0.05, 0.4, 0.7])
+ORE_BLOCKS = np.array([BLOCK_IDS['gem'], COBBLESTONE, BLOCK_IDS['granite'], BLOCK_IDS['andesite']], dtype=np.uint8)
+
+
+# Valleys whose grass lies below this tile row are filled with water up to it
+SEA_LEVEL = 6
+
+# Surface height octaves as (lattice spacing in columns, peak-to-peak amplitude in tiles). Their combined
+# slope stays below one tile per column, so neighbouring columns still differ by at most one tile.
+HEIGHT_OCTAVES = [(64, 24), (12, 3)]
+
+
+class TerrainColumns:
+    def __init__(self, seed, min_height, max_height):
+        """
+        Per-column terrain profile computed from (seed, x) alone, so any range of columns can be
+        produced independently and heights line up across chunk borders.
+
+        Surface heights are smoothed value noise anchored so the origin column sits at row 0;
+        nothing is cached, so memory does not grow as the world is explored.
+
+        :param seed: World seed.
+        :param min_height: Highest tile row the grass layer may climb to.
+        :param max_height: Lowest tile row the grass layer may sink to.
+        """
+        self.seed = seed
+        self.min_height = min_height
+        self.max_height = max_height
+        self.origin_noise = self.noise(np.zeros(1, dtype=np.int64))[0]
+
+    def noise(self, xs):
+        """Sum of the height octaves at integer columns xs, as floats."""
+        total = np.zeros(len(xs))
+        for octave, (spacing, amplitude) in enumerate(HEIGHT_OCTAVES):
+            cell = np.floor_divide(xs, spacing)
+            t = (xs - cell * spacing) / spacing
+            t = t * t * (3 - 2 * t)  # Smoothstep between lattice values
+            left = cell_rolls(self.seed, cell, 0, salt=octave + 1)
+            right = cell_rolls(self.seed, cell + 1, 0, salt=octave + 1)
+            total += (left + (right - left) * t - 0.5) * amplitude
+        return total
+
+    def span(self, start_x, count):
+        """Return (heights, features) numpy arrays of the count columns starting at start_x."""
+        xs = np.arange(start_x, start_x + count, dtype=np.int64)
+        heights = np.clip(np.rint(self.noise(xs) - self.origin_noise), self.min_height, self.max_height)
+
+        rolls = [cell_rolls(self.seed, xs, 0, salt=salt) for salt in (101, 102, 103, 104)]
+        features = np.select(
+            [rolls[0] < 0.15, rolls[1] < 0.08, rolls[3] < 0.15],  # Tree, flower, bomb
+            [TREE, np.where(rolls[2] < 0.5, FLOWER1, FLOWER2), BOMB],
+            NO_FEATURE,
+        )
+        return heights.astype(np.int32), features.astype(np.int8)
+
+
+def cell_rolls(seed, xs, ys, salt=0):
+    """
+    Uniform [0, 1) roll for each tile position, derived only from (seed, x, y, salt).
+
+    A counter-based hash (splitmix64 finaliser) instead of a stateful generator, so any region
+    can be rolled in one array operation and gets the same values whichever order it is generated in.
+    """
+    key = (seed + salt * 0x632BE59BD9B4E019) & 0xFFFFFFFFFFFFFFFF
+    h = (np.asarray(xs, dtype=np.int64).astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+         ^ np.asarray(ys, dtype=np.int64).astype(np.uint64) * np.uint64(0xC2B2AE3D27D4EB4F)
+         ^ np.uint64(key))
+    h ^= h >> np.uint64(30)
+    h *= np.uint64(0xBF58476D1CE4E5B9)
+    h ^= h >> np.uint64(27)
+    h *= np.uint64(0x94D049BB133111EB)
+    h ^= h >> np.uint64(31)
+    return (h >> np.uint64(11)) * (1.0 / (1 << 53))
+
+
+def generate_chunk_row(columns, chunk_x, count, chunk_y, chunk_size, top, bottom):
+    """
+    Generate count horizontally adjacent chunks at once with array operations.
+
+    :param columns: TerrainColumns supplying the surface profile and the seed for the underground rolls.
+    :param chunk_x: Chunk coordinate of the leftmost chunk.
+    :param top: First tile row of the world (inclusive).
+    :param bottom: Last tile row of the world (exclusive).
+    :return: List of count bytearrays, each chunk_size * chunk_size block IDs in row-major order.
+    """
+    width = count * chunk_size
+    heights, features = columns.span(chunk_x * chunk_size - 1, width + 2)  # One extra column on each side
+    cliff_height = heights[1:-1]
+    feature = features[1:-1]
+    tree = feature == TREE
+
+    rows = np.arange(chunk_y * chunk_size, chunk_y * chunk_size + chunk_size)[:, None]
+    depth = rows - cliff_height  # Tiles below the grass, negative above it
+    rolls = cell_rolls(columns.seed, np.arange(chunk_x * chunk_size, chunk_x * chunk_size + width)[None, :], rows)
+
+    # Underground, from the deep ores up to the grass
+    blocks = np.where(depth >= 8, ORE_BLOCKS[np.searchsorted(ORE_THRESHOLDS, rolls)], AIR).astype(np.uint8)
+    band = (depth >= 4) & (depth < 8)
+    blocks[band] = np.where(rolls < 0.8, COBBLESTONE, DIRT)[band]
+    blocks[(depth >= 1) & (depth <= 3)] = DIRT
+    blocks[depth == 0] = GRASS
+
+    # Above ground, lowest priority first: leaves spilled from neighbouring trees, the tree's own crown,
+    # flowers and bombs, then the trunk
+    left_leaves = (features[:-2] == TREE) & ((rows - heights[:-2] == -4) | (rows - heights[:-2] == -3))
+    right_leaves = (features[2:] == TREE) & ((rows - heights[2:] == -4) | (rows - heights[2:] == -3))
+    blocks[(left_leaves | right_leaves) & (depth < 0)] = LEAVES
+    blocks[tree & ((depth == -5) | (depth == -4))] = LEAVES
+    on_top = (depth == -1) & (feature >= FLOWER1)
+    blocks[on_top] = np.broadcast_to(FEATURE_BLOCKS[feature], blocks.shape)[on_top]
+    blocks[tree & (depth >= -3) & (depth <= -1)] = WOOD
+    blocks[(blocks == AIR) & (depth < 0) & (rows >= SEA_LEVEL)] = WATER  # Lakes; features stay underwater
+
+    blocks[((rows < top) | (rows >= bottom))[:, 0]] = AIR  # Rows outside the world
+    return [bytearray(blocks[:, i * chunk_size:(i + 1) * chunk_size].tobytes()) for i in range(count)]
+
+
+def generate_chunk(columns, chunk_x, chunk_y, chunk_size, top, bottom):
+    """Generate the block IDs of a single chunk; see generate_chunk_row."""
+    return generate_chunk_row(columns, chunk_x, 1, chunk_y, chunk_size, top, bottom)[0]
+
+
+def generate_region(columns, first_chunk_x, last_chunk_x, first_chunk_y, last_chunk_y, chunk_size, top, bottom,
+                    workers=None):
+    """
+    Generate every chunk in an inclusive rectangle of chunk coordinates, one row of chunks per task.
+
+    Chunks depend only on the seed and their position, so the output is byte-identical for any number of workers.
+
+    :param workers: Processes to spread the rows over; None uses every core, 1 generates in this process.
+    :return: Dict mapping (chunk_x, chunk_y) to a bytearray of block IDs.
+    """
+    count = last_chunk_x - first_chunk_x + 1
+    chunk_rows = range(first_chunk_y, last_chunk_y + 1)
+    args = [(columns, first_chunk_x, count, chunk_y, chunk_size, top, bottom) for chunk_y in chunk_rows]
+
+    if workers == 1:
+        rows = [generate_chunk_row(*arg) for arg in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            rows = list(executor.map(generate_chunk_row, *zip(*args)))
+
+    chunks = {}
+    for chunk_y, row in zip(chunk_rows, rows):
+        for chunk_x, blocks in enumerate(row, first_chunk_x):
+            chunks[(chunk_x, chunk_y)] = blocks
+    return chunks
+
+
+class ChunkPrefetcher:
+    def __init__(self, columns, chunk_size, top, bottom, workers=None):
+        """
+        Generates chunks ahead of need on a process pool, so the game loop only has to pick them up.
+
+        The world asks for the chunks just outside its load radius (see World.prefetch_chunks), one
+        generate_chunk_row task per run of adjacent chunks, and takes them once the player gets there.
+        Chunks depend only on the seed and their position, so a prefetched chunk is byte-identical to
+        one generated on demand, and a chunk needed before its task is done is simply generated then.
+
+        :param columns: TerrainColumns of the world.
+        :param top: First tile row of the world (inclusive).
+        :param bottom: Last tile row of the world (exclusive).
+        :param workers: Processes in the pool, which is started on the first request; None uses every core
+                        but the one the game loop runs on.
+        """
+        self.columns = columns
+        self.chunk_size = chunk_size
+        self.top = top
+        self.bottom = bottom
+        self.workers = max((os.cpu_count() or 1) - 1, 1) if workers is None else workers
+        self.executor = None
+        self.pending = {}  # Future -> (first chunk_x, chunk_y) of a row of chunks being generated
+        self.requested = set()  # Chunk positions pending or ready, so none is asked for twice
+        self.ready = {}  # (chunk_x, chunk_y) -> bytearray of block IDs, generated and not taken yet
+
+    def request(self, chunk_x, count, chunk_y):
+        """Start generating count adjacent chunks from (chunk_x, chunk_y) rightwards."""
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        future = self.executor.submit(generate_chunk_row, self.columns, chunk_x, count, chunk_y, self.chunk_size,
+                                      self.top, self.bottom)
+        self.pending[future] = (chunk_x, chunk_y)
+        self.requested.update((chunk_x + i, chunk_y) for i in range(count))
+
+    def collect(self):
+        """Move the rows that finished generating into ready."""
+        for future in [future for future in self.pending if future.done()]:
+            first_x, chunk_y = self.pending.pop(future)
+            for chunk_x, blocks in enumerate(future.result(), first_x):
+                self.ready[(chunk_x, chunk_y)] = blocks
+
+    def take(self, chunk_pos):
+        """Return the prefetched blocks of a chunk and forget them, or None if they are not ready."""
+        blocks = self.ready.pop(chunk_pos, None)
+        if blocks is not None:
+            self.requested.discard(chunk_pos)
+        return blocks
+
+    def discard(self, chunk_pos):
+        """Forget a ready chunk that is no longer wanted."""
+        del self.ready[chunk_pos]
+        self.requested.discard(chunk_pos)
+
+    def close(self):
+        """Stop the pool and forget every request; the cancelled rows are generated on demand if ever needed."""
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+        self.pending.clear()
+        self.requested.clear()
+        self.ready.clear()
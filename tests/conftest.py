@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+# The game modules live at the top of the repository and are imported as plain modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+
+@pytest.fixture
+def blank_assets(monkeypatch):
+    """
+    Serve every image as a blank surface, so worlds, players and games can be built without assets/,
+    which is not part of the repository.
+    """
+    import pygame
+    from assets import assets
+
+    monkeypatch.setattr(assets, 'images', {})
+    monkeypatch.setattr(assets, 'converted', set())
+    monkeypatch.setattr(assets, 'scaled_images', {})
+    monkeypatch.setattr(assets, 'atlases', {})
+    monkeypatch.setattr(assets, 'image', lambda path: assets.images.setdefault(
+        path, pygame.Surface((32, 32), pygame.SRCALPHA)))
+
+
+@pytest.fixture
+def world(blank_assets):
+    """A freshly generated world around the spawn point, with its prefetcher stopped afterwards."""
+    from world import World
+
+    world = World(seed=3)
+    yield world
+    world.close()
@@ -0,0 +1,158 @@
+"""Autosave: snapshots written on the worker thread, and failed writes that keep the chunks for the next save."""
+import threading
+import zlib
+from types import SimpleNamespace
+
+import pygame
+import pytest
+
+from autosave import Autosave
+from chunk import Chunk
+from inventory import Inventory
+from profiler import profiler
+from savegame import SaveStore
+from world import World
+
+CHUNK_SIZE = 16
+LOADED = (0, 1)
+PAGED = (40, -2)
+
+
+class SavedWorld:
+    """A world with one loaded and one paged-out modified chunk, snapshotted the way World does it."""
+    snapshot_chunks = World.snapshot_chunks
+    release_paged = World.release_paged
+
+    def __init__(self):
+        self.chunk_size = CHUNK_SIZE
+        self.world_height = 200
+        self.seed = 99
+        self.elapsed_time = 12.0
+        self.chunks = {LOADED: Chunk(*LOADED, CHUNK_SIZE, bytes([3]) * CHUNK_SIZE ** 2)}
+        self.paged_chunks = {PAGED: zlib.compress(bytes([5]) * CHUNK_SIZE ** 2)}
+        self.unsaved_chunks = {LOADED, PAGED}
+
+
+def make_player():
+    return SimpleNamespace(rect=pygame.Rect(64, -32, 32, 32), lives=2, stamina=80.0, inventory=Inventory())
+
+
+def stored_blocks(store, chunk_pos):
+    data = store.read_compressed(chunk_pos)
+    return None if data is None else zlib.decompress(data)
+
+
+def test_save_runs_on_the_worker_thread(tmp_path):
+    world = SavedWorld()
+    store = SaveStore(str(tmp_path))
+    autosave = Autosave(world, store)
+    threads = []
+    write_chunks = store.write_chunks
+    store.write_chunks = lambda chunks: (threads.append(threading.current_thread()), write_chunks(chunks))
+
+    autosave.update(make_player())
+    assert autosave.pending is None  # Not due yet
+    autosave.request()
+    autosave.update(make_player())
+    # The snapshot is taken at the frame boundary; the game may change the chunk while the worker writes
+    world.chunks[LOADED].blocks[0] = 0
+    autosave.finish()
+
+    assert threads and threads[0] is not threading.main_thread()
+    assert stored_blocks(store, LOADED) == bytes([3]) * CHUNK_SIZE ** 2
+    assert stored_blocks(store, PAGED) == bytes([5]) * CHUNK_SIZE ** 2
+    assert store.read_state()['position'] == (64, -32)
+    assert world.unsaved_chunks == set()
+    assert world.paged_chunks == {}  # Written, so read back from the store from now on
+    assert len(autosave.blocked_times) == 1
+    assert profiler.status['autosave'].startswith('2 chunks')
+    autosave.close()
+
+
+def test_failed_write_keeps_chunks_unsaved(tmp_path):
+    world = SavedWorld()
+    store = SaveStore(str(tmp_path))
+    errors = []
+    autosave = Autosave(world, store, on_error=errors.append)
+    write_chunks = store.write_chunks
+
+    def fail(chunks):
+        raise OSError('No space left on device')
+
+    store.write_chunks = fail
+    autosave.start(make_player())
+    autosave.finish()
+    assert errors == ['Autosave failed: No space left on device']
+    assert world.unsaved_chunks == {LOADED, PAGED}
+    assert PAGED in world.paged_chunks
+    assert store.read_state() is None
+
+    # The next save retries the same chunks
+    store.write_chunks = write_chunks
+    autosave.start(make_player())
+    autosave.finish()
+    assert stored_blocks(store, LOADED) == bytes([3]) * CHUNK_SIZE ** 2
+    assert stored_blocks(store, PAGED) == bytes([5]) * CHUNK_SIZE ** 2
+    assert world.unsaved_chunks == set()
+    autosave.close()
+
+
+def test_failed_write_raises_without_on_error(tmp_path):
+    world = SavedWorld()
+    store = SaveStore(str(tmp_path))
+    autosave = Autosave(world, store)
+
+    def fail(chunks):
+        raise OSError('No space left on device')
+
+    store.write_chunks = fail
+    autosave.start(make_player())
+    with pytest.raises(OSError):
+        autosave.finish()
+    assert world.unsaved_chunks == {LOADED, PAGED}
+    autosave.close()
+
+
+def test_crash_mid_write_keeps_the_previous_save(tmp_path):
+    world = SavedWorld()
+    store = SaveStore(str(tmp_path))
+    autosave = Autosave(world, store, on_error=lambda message: None)
+    autosave.start(make_player())
+    autosave.finish()
+
+    def crash(path, parts):
+        # Dies halfway through the temporary file, before it would be renamed over path
+        with open(path + '.tmp', 'wb') as f:
+            f.write(parts[0][:3])
+        raise OSError('Crashed')
+
+    store.write_temporary = crash
+    world.chunks[LOADED].blocks[:] = bytes([7]) * CHUNK_SIZE ** 2
+    world.unsaved_chunks.add(LOADED)
+    player = make_player()
+    player.rect.x = 640
+    autosave.start(player)
+    autosave.finish()
+    assert world.unsaved_chunks == {LOADED}
+
+    reopened = SaveStore(str(tmp_path))
+    assert stored_blocks(reopened, LOADED) == bytes([3]) * CHUNK_SIZE ** 2
+    assert reopened.read_state()['position'] == (64, -32)
+    reopened.close()
+    autosave.close()
+
+
+def test_close_raises_on_a_failed_final_save(tmp_path):
+    world = SavedWorld()
+    store = SaveStore(str(tmp_path))
+    autosave = Autosave(world, store, on_error=lambda message: None)
+
+    def fail(chunks):
+        raise OSError('No space left on device')
+
+    store.write_chunks = fail
+    with pytest.raises(OSError):
+        autosave.close(make_player())
+    assert world.unsaved_chunks == {LOADED, PAGED}
+    with pytest.raises(RuntimeError):
+        autosave.executor.submit(print)  # The worker thread was stopped anyway
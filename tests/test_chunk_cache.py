@@ -0,0 +1,54 @@
+"""Baked chunk surfaces: a change in the time of day is re-baked a few chunks per frame, not all at once."""
+import pygame
+
+from blocks import BLOCK_TYPES, MAX_LIGHT, block_id
+from chunk import Chunk
+from chunk_cache import ChunkSurfaceCache
+from lighting import Lighting
+
+TILE_SIZE = 4
+CHUNK_SIZE = 4
+
+
+def make_chunk(chunk_x):
+    blocks = [block_id('dirt') if index % 3 else 0 for index in range(CHUNK_SIZE ** 2)]
+    chunk = Chunk(chunk_x, 0, CHUNK_SIZE, bytes(blocks))
+    chunk.sky_light = bytearray(index % (MAX_LIGHT + 1) for index in range(CHUNK_SIZE ** 2))
+    chunk.block_light = bytearray(CHUNK_SIZE ** 2)
+    return chunk
+
+
+def make_cache(lighting):
+    atlas = pygame.Surface((TILE_SIZE * len(BLOCK_TYPES), TILE_SIZE), pygame.SRCALPHA)
+    for slot in range(len(BLOCK_TYPES)):
+        atlas.fill((40 * slot % 256, 200, 100, 255), (slot * TILE_SIZE, 0, TILE_SIZE, TILE_SIZE))
+    areas = [pygame.Rect(slot * TILE_SIZE, 0, TILE_SIZE, TILE_SIZE) for slot in range(len(BLOCK_TYPES))]
+    return ChunkSurfaceCache(atlas, areas, TILE_SIZE, CHUNK_SIZE, lighting)
+
+
+def pixels(surface):
+    return pygame.image.tobytes(surface, 'RGBA')
+
+
+def test_time_of_day_rebakes_a_few_chunks_per_frame():
+    lighting = Lighting(None)
+    cache = make_cache(lighting)
+    chunks = {(chunk_x, 0): make_chunk(chunk_x) for chunk_x in range(6)}
+    for chunk in chunks.values():
+        cache.get_surface(chunk)
+    before = pixels(cache.surfaces[(0, 0)])
+
+    assert lighting.set_time_of_day(1.0)
+    cache.mark_all_stale()
+    # Drawn as they were baked until their turn comes
+    assert pixels(cache.get_surface(chunks[(0, 0)])) == before
+
+    # Most recently drawn first: (0, 0) was just drawn again
+    assert cache.rebake_stale(chunks) == [(0, 0), (5, 0), (4, 0), (3, 0)]
+    assert cache.rebake_stale(chunks) == [(2, 0), (1, 0)]
+    assert cache.rebake_stale(chunks) == []
+
+    fresh = make_cache(lighting)
+    for chunk_pos, chunk in chunks.items():
+        assert pixels(cache.surfaces[chunk_pos]) == pixels(fresh.get_surface(chunk))
+    assert pixels(cache.surfaces[(0, 0)]) != before
@@ -0,0 +1,44 @@
+"""World edits: a batch is applied chunk by chunk, with one change notification per chunk it touches."""
+from blocks import AIR, block_id
+
+
+def listen(world):
+    calls = []
+    world.add_change_listener(lambda chunk_pos, tiles: calls.append((chunk_pos, sorted(tiles))))
+    return calls
+
+
+def test_fill_notifies_once_per_chunk(world):
+    calls = listen(world)
+    # 20 x 20 tiles of the sky spanning the corners of four chunks
+    assert world.fill_region(-10, -60, 9, -41, 'cobblestone') == 400
+
+    assert sorted(chunk_pos for chunk_pos, _ in calls) == [(-1, -4), (-1, -3), (0, -4), (0, -3)]
+    assert sum(len(tiles) for _, tiles in calls) == 400
+    for (chunk_x, chunk_y), tiles in calls:
+        assert all((x // 16, y // 16) == (chunk_x, chunk_y) for x, y in tiles)
+    assert world.get_block(-10, -60) == world.get_block(9, -41) == 'cobblestone'
+
+
+def test_edit_reads_its_own_writes_and_skips_unchanged_tiles(world):
+    calls = listen(world)
+    with world.edit() as edit:
+        edit.fill(0, -60, 3, -60, 'wood')
+        edit.replace(0, -60, 5, -60, 'wood', 'granite')
+        assert edit.get(2, -60) == block_id('granite')
+        assert world.get_block_id(2, -60) == AIR  # Nothing is written before the edit is applied
+        edit.set(4, -60, None)  # Already air
+    assert calls == [((0, -4), [(0, -60), (1, -60), (2, -60), (3, -60)])]
+    assert world.replace_region(0, -60, 3, -60, 'wood', 'dirt') == 0
+
+
+def test_failed_edit_is_dropped(world):
+    calls = listen(world)
+    try:
+        with world.edit() as edit:
+            edit.fill(0, -60, 3, -60, 'wood')
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert calls == []
+    assert world.get_block_id(0, -60) == AIR
@@ -0,0 +1,38 @@
+"""Entities: buried items lifted on top of the blocks placed over them, and redrawn where they end up."""
+from blocks import AIR, block_id
+from entities import Entities
+
+TILE_SIZE = 32
+
+
+class BlockWorld:
+    """The little of a World that entities need: a dict of blocks, air everywhere else."""
+
+    def __init__(self):
+        self.tile_size = TILE_SIZE
+        self.chunk_size = 16
+        self.top_row = -100
+        self.world_height = 200
+        self.elapsed_time = 0.0
+        self.blocks = {}  # (tile_x, tile_y) -> block ID
+
+    def get_block_id(self, tile_x, tile_y):
+        return self.blocks.get((tile_x, tile_y), AIR)
+
+
+def test_lifted_item_is_redrawn_at_its_new_position():
+    world = BlockWorld()
+    entities = Entities(world)
+    item = entities.spawn_item('cobblestone', 0, 5)
+    item.vy = 0
+    entities.clear_dirty()
+
+    # Two blocks stacked over the item's tile bury it
+    world.blocks[(0, 5)] = world.blocks[(0, 4)] = block_id('cobblestone')
+    old_rect = item.rect()
+    entities.wake_area(0, 4, 0, 5)
+
+    assert item.y == 4 * TILE_SIZE - item.height
+    assert old_rect in entities.dirty_rects
+    assert item.rect() in entities.dirty_rects
+    assert item in entities.grid.query(item.rect())
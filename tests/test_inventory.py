@@ -0,0 +1,76 @@
+"""Inventory: stacks keep their slots, totals follow every change, and listeners hear about each slot touched."""
+from inventory import Inventory
+
+FIRST_STACK = 3  # Slot of the first block stack, after the axe, pickaxe and shovel
+
+
+def test_stacks_fill_up_before_new_ones_start():
+    inventory = Inventory(block_slots=3, stack_limit=10)
+    assert inventory.add('dirt', 15) == 15
+    assert inventory.add('wood', 4) == 4
+    assert inventory.add('dirt', 3) == 3
+    assert list(inventory.stacks()) == [(3, 'dirt', 10), (4, 'dirt', 8), (5, 'wood', 4)]
+    assert inventory.add('granite') == 0  # No slot left
+    assert inventory.add('wood', 10) == 6
+
+
+def test_emptied_stack_leaves_a_gap():
+    inventory = Inventory()
+    inventory.add('dirt', 2)
+    inventory.add('wood', 1)
+    inventory.select(FIRST_STACK + 1)
+    assert inventory.remove('wood') == 1
+    assert inventory.item(FIRST_STACK + 1) is None and not inventory.has('wood')
+    assert inventory.selected == FIRST_STACK + 1  # The selection does not move
+    assert inventory.selected_block() is None
+    assert inventory.item(FIRST_STACK) == 'dirt'
+    inventory.add('granite')
+    assert inventory.item(FIRST_STACK + 1) == 'granite'  # The gap is the first empty slot
+
+
+def test_remove_takes_from_the_held_stack_first():
+    inventory = Inventory(block_slots=3, stack_limit=5)
+    inventory.add('dirt', 12)
+    inventory.select(FIRST_STACK)
+    assert inventory.remove('dirt', 7) == 7
+    # The held 5, then the 2 of the last stack
+    assert list(inventory.stacks()) == [(FIRST_STACK + 1, 'dirt', 5)]
+    assert inventory.totals == {'dirt': 5}
+    assert inventory.remove('dirt', 9) == 5
+    assert inventory.totals == {}
+
+
+def test_move_merges_or_swaps():
+    inventory = Inventory(block_slots=3, stack_limit=5)
+    inventory.add('dirt', 8)
+    inventory.add('wood', 2)
+    inventory.move(FIRST_STACK + 1, FIRST_STACK)  # dirt 3 onto dirt 5: already full, nothing moves
+    assert list(inventory.stacks()) == [(3, 'dirt', 5), (4, 'dirt', 3), (5, 'wood', 2)]
+    inventory.move(FIRST_STACK + 2, FIRST_STACK)
+    assert list(inventory.stacks()) == [(3, 'wood', 2), (4, 'dirt', 3), (5, 'dirt', 5)]
+    inventory.move(FIRST_STACK + 1, FIRST_STACK + 2)
+    assert list(inventory.stacks()) == [(3, 'wood', 2), (4, 'dirt', 3), (5, 'dirt', 5)]
+    inventory.move(FIRST_STACK + 2, FIRST_STACK + 1)
+    assert list(inventory.stacks()) == [(3, 'wood', 2), (4, 'dirt', 5), (5, 'dirt', 3)]
+    assert inventory.totals == {'dirt': 8, 'wood': 2}
+
+
+def test_listeners_hear_each_changed_slot():
+    inventory = Inventory()
+    changed = []
+    inventory.add_listener(changed.append)
+    inventory.add('dirt')
+    inventory.add('dirt')
+    inventory.select(FIRST_STACK)
+    inventory.select(FIRST_STACK)  # Already held
+    inventory.select(FIRST_STACK + 4)  # Empty
+    assert changed == [FIRST_STACK, FIRST_STACK, 0, FIRST_STACK]
+
+
+def test_load_restores_stacks_and_selection():
+    inventory = Inventory()
+    inventory.add('wood', 3)
+    inventory.load([(FIRST_STACK + 2, 'gem', 4), (FIRST_STACK, 'dirt', 500)], FIRST_STACK + 2)
+    assert list(inventory.stacks()) == [(FIRST_STACK, 'dirt', 64), (FIRST_STACK + 2, 'gem', 4)]
+    assert inventory.selected_item() == 'gem'
+    assert inventory.totals == {'dirt': 64, 'gem': 4}
@@ -0,0 +1,73 @@
+"""Lighting: relighting around edits and evictions ends up where lighting every chunk from scratch does."""
+import pytest
+
+
+def light_snapshot(world):
+    return {chunk_pos: (bytes(chunk.sky_light), bytes(chunk.block_light)) for chunk_pos, chunk in world.chunks.items()}
+
+
+def full_relight(world):
+    """Light every loaded chunk again from its blocks alone, in the order they were loaded."""
+    chunks = list(world.chunks.values())
+    for chunk in chunks:
+        chunk.sky_light = chunk.block_light = None
+    for chunk in chunks:
+        world.lighting.light_chunk(chunk)
+
+
+@pytest.mark.parametrize('edits', [
+    # A shaft dug from the surface deep underground, reaching into the chunk below
+    [('fill', -1, -8, 1, 30, None)],
+    # A roof over the shaft, then glowing gems at its bottom
+    [('fill', -1, -8, 1, 30, None), ('fill', -3, -10, 3, -9, 'cobblestone'), ('fill', -1, 29, 1, 30, 'gem')],
+    # Blocks placed and taken away again across a chunk border
+    [('fill', 10, -20, 20, 5, 'granite'), ('fill', 12, -18, 18, 3, None)],
+])
+def test_incremental_relight_matches_full_relight(world, edits):
+    for _, left, top, right, bottom, block_type in edits:
+        world.fill_region(left, top, right, bottom, block_type)
+    incremental = light_snapshot(world)
+    full_relight(world)
+    assert light_snapshot(world) == incremental
+
+
+def test_single_block_changes_match_full_relight(world):
+    for tile_y in range(-2, 12):
+        world.set_block(5, tile_y, None)
+    world.set_block(5, 11, 'gem')
+    world.set_block(5, 0, 'wood')
+    incremental = light_snapshot(world)
+    full_relight(world)
+    assert light_snapshot(world) == incremental
+
+
+@pytest.mark.parametrize('path', [
+    # Out past the unload radius and back, so the chunks on one side are evicted and loaded again
+    [(16 * step, 40) for step in list(range(12)) + list(range(12, -1, -1))],
+    [(16 * step, 40) for step in list(range(0, -12, -1)) + list(range(-12, 6))],
+    # Down to the bottom of the world and back up, evicting the sky above and the depths below in turn
+    [(8, 16 * step) for step in list(range(-6, 7)) + list(range(6, -7, -1))],
+])
+def test_light_after_evictions_matches_full_relight(world, path):
+    # Something to evict: a lit shaft with glowing gems at the bottom
+    world.fill_region(40, -8, 42, 30, None)
+    world.fill_region(40, 29, 42, 30, 'gem')
+    for tile_x, tile_y in path:
+        world.update_chunks(tile_x, tile_y)
+        incremental = light_snapshot(world)
+        full_relight(world)
+        assert light_snapshot(world) == incremental, (tile_x, tile_y)
+
+
+def test_light_stays_inside_the_world(world):
+    # The bottom chunk row reaches past the last row of the world; glowing gems on that row must not light it
+    world.update_chunks(0, 90)
+    bottom = world.top_row + world.world_height
+    world.fill_region(0, bottom - 3, 2, bottom - 1, None)
+    world.fill_region(1, bottom - 1, 1, bottom - 1, 'gem')
+    chunk = world.chunks[(0, bottom // world.chunk_size)]
+    outside = range((bottom - chunk.origin_y) * chunk.size, chunk.size * chunk.size)
+    assert not any(chunk.block_light[index] for index in outside)
+    incremental = light_snapshot(world)
+    full_relight(world)
+    assert light_snapshot(world) == incremental
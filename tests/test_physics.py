@@ -0,0 +1,66 @@
+"""Block physics: unsupported blocks fall, water spreads and drains, and only queued tiles are evaluated."""
+from types import SimpleNamespace
+
+import pygame
+
+from blocks import FLUID_LEVEL, FLUID_SOURCE
+
+# High in the sky above the spawn point, well clear of the terrain, inside the loaded chunks
+TOP = -40
+
+
+def settle(world, players=(), steps=200):
+    """Step the physics until nothing is queued; returns the number of steps it took."""
+    for step in range(steps):
+        if not world.physics.queue:
+            return step
+        world.physics.update(list(players))
+    raise AssertionError('The physics never settled')
+
+
+def level(world, tile_x, tile_y):
+    return FLUID_LEVEL[world.get_block_id(tile_x, tile_y)]
+
+
+def test_unsupported_blocks_fall_onto_a_floor(world):
+    world.fill_region(-3, TOP + 10, 3, TOP + 10, 'cobblestone')
+    world.set_block(0, TOP, 'dirt')
+    world.set_block(0, TOP + 1, 'dirt')
+    settle(world)
+    assert world.get_block(0, TOP + 9) == world.get_block(0, TOP + 8) == 'dirt'
+    assert all(world.get_block(0, tile_y) is None for tile_y in range(TOP, TOP + 8))
+
+
+def test_player_holds_up_a_falling_block(world):
+    world.fill_region(-3, TOP + 10, 3, TOP + 10, 'cobblestone')
+    player = SimpleNamespace(rect=pygame.Rect(0, (TOP + 5) * world.tile_size, 32, 32))
+    world.set_block(0, TOP, 'dirt')
+    for _ in range(20):
+        world.physics.update([player])
+    assert world.get_block(0, TOP + 4) == 'dirt'
+    settle(world)
+    assert world.get_block(0, TOP + 9) == 'dirt'
+
+
+def test_water_spreads_sideways_and_drains(world):
+    world.fill_region(-10, TOP + 10, 10, TOP + 10, 'cobblestone')
+    world.set_block(0, TOP + 9, 'water')
+    settle(world)
+    for distance in range(1, FLUID_SOURCE):
+        assert level(world, -distance, TOP + 9) == level(world, distance, TOP + 9) == FLUID_SOURCE - distance
+    assert level(world, FLUID_SOURCE, TOP + 9) == 0
+
+    world.set_block(0, TOP + 9, None)
+    settle(world)
+    assert all(level(world, tile_x, TOP + 9) == 0 for tile_x in range(-10, 11))
+
+
+def test_budget_spreads_work_over_steps(world):
+    world.fill_region(-3, TOP + 10, 3, TOP + 10, 'cobblestone')
+    settle(world)
+    world.physics.budget = 4
+    world.set_block(0, TOP, 'dirt')  # Queues the tile and its four neighbours
+    world.physics.update([])
+    assert len(world.physics.queue) > 0  # The fifth waited, and the fall queued more
+    settle(world)
+    assert world.get_block(0, TOP + 9) == 'dirt'
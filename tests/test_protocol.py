@@ -0,0 +1,158 @@
+"""Round trips of every wire message, and a loopback server whose clients' mirrors must match its world."""
+import asyncio
+import zlib
+
+import pytest
+
+from benchmarks.bots import bot_step, mirror_mismatches
+from controls import BREAK, JUMP, MOVE_RIGHT, SELECT_SLOT, StepInput
+from protocol import (CHUNK, DELTA, DELTA_COMPRESS_MIN, DELTA_ENTRY, FORGET, FRAME, HELLO, INPUT, MAX_PAYLOAD,
+                      MAX_PLAYER_ID, PLAYERS, WELCOME_BODY, ProtocolError, check_hello, decode_chunk, decode_delta,
+                      decode_forget, decode_input, decode_players, encode_chunk, encode_delta, encode_forget,
+                      encode_hello, encode_input, encode_players, frame, read_message)
+
+
+def read(data):
+    """Read the first message of the bytes a peer sent."""
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await read_message(reader)
+    return asyncio.run(run())
+
+
+def test_hello():
+    message_type, payload = read(encode_hello())
+    assert message_type == HELLO
+    check_hello(message_type, payload)
+
+
+def test_bad_hello():
+    with pytest.raises(ProtocolError):
+        check_hello(HELLO, b'XXXX\x01\x00')
+    with pytest.raises(ProtocolError):
+        check_hello(INPUT, b'')
+
+
+def test_input_round_trip():
+    step = StepInput(MOVE_RIGHT | JUMP, ((SELECT_SLOT, 9, 0), (BREAK, -17, 40)))
+    message_type, payload = read(encode_input(step))
+    assert message_type == INPUT
+    decoded = decode_input(payload)
+    assert decoded.held == step.held
+    assert list(decoded.actions) == list(step.actions)
+
+
+def test_bad_input():
+    payload = read(encode_input(StepInput(MOVE_RIGHT, ((BREAK, 1, 2),))))[1]
+    with pytest.raises(ProtocolError):
+        decode_input(payload[:-1])
+    with pytest.raises(ProtocolError):
+        decode_input(payload + b'\x00')
+
+
+def test_chunk_round_trip():
+    blocks = bytes(i % 11 for i in range(16 * 16))
+    message_type, payload = read(encode_chunk((-3, 5), zlib.compress(blocks)))
+    assert message_type == CHUNK
+    assert decode_chunk(payload) == ((-3, 5), bytearray(blocks))
+
+
+def test_forget_round_trip():
+    message_type, payload = read(encode_forget((7, -2)))
+    assert message_type == FORGET
+    assert decode_forget(payload) == (7, -2)
+
+
+@pytest.mark.parametrize('count', [1, DELTA_COMPRESS_MIN // DELTA_ENTRY.size + 1])
+def test_delta_round_trip(count):
+    # Both sides of the size from which deltas are compressed
+    changes = [(x - 50, x % 7, x % 20) for x in range(count)]
+    message_type, payload = read(encode_delta(123, changes))
+    assert message_type == DELTA
+    assert decode_delta(payload) == (123, changes)
+
+
+def test_players_round_trip():
+    players = [(1, -640, 96, 5), (MAX_PLAYER_ID, 12345, -20, 0)]
+    message_type, payload = read(encode_players(9, players))
+    assert message_type == PLAYERS
+    assert decode_players(payload) == (9, players)
+
+
+def test_welcome_holds_every_player_id():
+    assert WELCOME_BODY.unpack(WELCOME_BODY.pack(MAX_PLAYER_ID, 2 ** 32 - 1, 60, 16, -100, 200))[0] == MAX_PLAYER_ID
+
+
+def test_oversized_frame():
+    with pytest.raises(ProtocolError):
+        read(FRAME.pack(MAX_PAYLOAD + 1, INPUT))
+
+
+def test_frame_split_across_reads():
+    data = frame(DELTA, b'x' * 1000)
+
+    async def run():
+        reader = asyncio.StreamReader()
+        task = asyncio.create_task(read_message(reader))
+        for start in range(0, len(data), 7):
+            reader.feed_data(data[start:start + 7])
+            await asyncio.sleep(0)
+        return await task
+    assert asyncio.run(run()) == (DELTA, b'x' * 1000)
+
+
+@pytest.mark.usefixtures('blank_assets')
+def test_loopback_mirrors_match_server():
+    from client import HeadlessClient
+    from server import GameServer
+
+    async def run():
+        server = GameServer(7)
+        port = await server.start()
+        clients = [HeadlessClient() for _ in range(3)]
+        for client in clients:
+            await client.connect('127.0.0.1', port)
+        for step in range(240):
+            for index, client in enumerate(clients):
+                client.send_input(bot_step(index, step, client.get_pos()))
+            await asyncio.sleep(server.step_time)
+        for client in clients:
+            client.send_input(StepInput())
+        await asyncio.sleep(0.5)
+        server.task.cancel()
+        await asyncio.sleep(0.1)
+
+        assert all(client.chunks for client in clients)
+        assert server.world.unsaved_chunks  # The bots did change the world
+        assert [mirror_mismatches(server, client) for client in clients] == [0, 0, 0]
+        for client in clients:
+            assert set(client.players) == set(server.connections)
+        for client in clients:
+            await client.close()
+        await server.close()
+    asyncio.run(run())
+
+
+@pytest.mark.usefixtures('blank_assets')
+def test_player_ids_are_reused():
+    from client import HeadlessClient
+    from server import GameServer
+
+    async def run():
+        server = GameServer(7)
+        port = await server.start()
+        clients = [HeadlessClient() for _ in range(3)]
+        for client in clients:
+            await client.connect('127.0.0.1', port)
+        assert [client.player_id for client in clients] == [1, 2, 3]
+        await clients[0].close()
+        await asyncio.sleep(0.1)
+        newcomer = HeadlessClient()
+        await newcomer.connect('127.0.0.1', port)
+        assert newcomer.player_id == 1
+        for client in clients[1:] + [newcomer]:
+            await client.close()
+        await server.close()
+    asyncio.run(run())
@@ -0,0 +1,129 @@
+"""Round trips of the save format: region files of chunks and the world.dat state, and seeds that fit it."""
+import argparse
+import struct
+import zlib
+from types import SimpleNamespace
+
+import pygame
+import pytest
+
+from inventory import Inventory
+from savegame import MAX_SEED, MIN_SEED, REGION_SIZE, STATE_HEADER, STATE_MAGIC, SaveStore, parse_seed
+
+
+def make_state(seed=1234, elapsed_time=75.5, chunk_size=16, world_height=200):
+    """A world and player with just what SaveStore.encode_state reads."""
+    world = SimpleNamespace(chunk_size=chunk_size, world_height=world_height, seed=seed, elapsed_time=elapsed_time)
+    inventory = Inventory()
+    inventory.add('dirt', 70)  # Two stacks
+    inventory.add('gem', 3)
+    inventory.select(4)
+    player = SimpleNamespace(rect=pygame.Rect(-320, 96, 32, 32), lives=3, stamina=42.5, inventory=inventory)
+    return world, player
+
+
+def test_state_round_trip(tmp_path):
+    store = SaveStore(str(tmp_path))
+    world, player = make_state()
+    store.write_state(store.encode_state(world, player))
+
+    state = SaveStore(str(tmp_path)).read_state()
+    assert state['seed'] == 1234
+    assert state['world_height'] == 200
+    assert state['elapsed_time'] == 75.5
+    assert state['position'] == (-320, 96)
+    assert state['lives'] == 3
+    assert state['stamina'] == 42.5
+    assert state['selected'] == 4
+    assert state['stacks'] == list(player.inventory.stacks())
+
+
+def test_missing_state(tmp_path):
+    assert SaveStore(str(tmp_path / 'nothing')).read_state() is None
+
+
+@pytest.mark.parametrize('store_args, message', [
+    ({'chunk_size': 32}, 'chunks'),
+    ({'world_height': 256}, 'tiles high'),
+])
+def test_incompatible_state(tmp_path, store_args, message):
+    store = SaveStore(str(tmp_path))
+    store.write_state(store.encode_state(*make_state()))
+    with pytest.raises(ValueError, match=message):
+        SaveStore(str(tmp_path), **store_args).read_state()
+
+
+@pytest.mark.parametrize('version', [1, 99])
+def test_unknown_state_version(tmp_path, version):
+    (tmp_path / 'world.dat').write_bytes(STATE_HEADER.pack(STATE_MAGIC, version, 16, 200, 0, 0.0))
+    with pytest.raises(ValueError, match='not a compatible save'):
+        SaveStore(str(tmp_path)).read_state()
+
+
+def test_chunks_round_trip(tmp_path):
+    store = SaveStore(str(tmp_path))
+    # Chunks in four regions, on both sides of the origin and on region borders
+    chunks = {}
+    for chunk_pos in [(0, 0), (-1, 0), (-1, -1), (REGION_SIZE - 1, 2), (REGION_SIZE, 2), (-REGION_SIZE, 5)]:
+        blocks = bytes((chunk_pos[0] * 7 + chunk_pos[1] + i) % 20 for i in range(16 * 16))
+        chunks[chunk_pos] = zlib.compress(blocks)
+    store.write_chunks(chunks)
+    store.close()
+
+    store = SaveStore(str(tmp_path))
+    for chunk_pos, data in chunks.items():
+        assert store.has_chunk(chunk_pos)
+        assert store.read_compressed(chunk_pos) == data
+    assert not store.has_chunk((1, 0))
+    assert store.read_compressed((1, 0)) is None
+    store.close()
+
+
+def test_rewrite_keeps_other_chunks(tmp_path):
+    store = SaveStore(str(tmp_path))
+    store.write_chunks({(0, 0): zlib.compress(b'\x01' * 256), (1, 0): zlib.compress(b'\x02' * 256)})
+    assert zlib.decompress(store.read_compressed((0, 0))) == b'\x01' * 256  # Maps the region before the rewrite
+    store.write_chunks({(0, 0): zlib.compress(b'\x03' * 256)})
+
+    assert zlib.decompress(store.read_compressed((0, 0))) == b'\x03' * 256
+    assert zlib.decompress(store.read_compressed((1, 0))) == b'\x02' * 256
+    store.close()
+
+
+def test_incompatible_region(tmp_path):
+    store = SaveStore(str(tmp_path))
+    store.write_chunks({(0, 0): zlib.compress(bytes(256))})
+    store.close()
+    path = tmp_path / 'r.0.0.bin'
+    data = bytearray(path.read_bytes())
+    struct.pack_into('<H', data, 4, 99)  # Format version
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError, match='not a compatible region'):
+        SaveStore(str(tmp_path)).read_compressed((0, 0))
+
+
+@pytest.mark.parametrize('seed', [MIN_SEED, MAX_SEED])
+def test_largest_seeds_round_trip(tmp_path, seed):
+    store = SaveStore(str(tmp_path))
+    store.write_state(store.encode_state(*make_state(seed=parse_seed(str(seed)))))
+    assert SaveStore(str(tmp_path)).read_state()['seed'] == seed
+
+
+@pytest.mark.parametrize('text', [str(MAX_SEED + 1), str(MIN_SEED - 1)])
+def test_seeds_too_large_to_save_are_refused(text):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_seed(text)
+
+
+@pytest.mark.usefixtures('blank_assets')
+def test_world_loads_around_the_saved_position():
+    from world import World
+
+    world = World(seed=3, spawn=(2000, 40))
+    try:
+        assert (125, 2) in world.chunks
+        assert (0, 0) not in world.chunks
+        assert world.prefetch_centers == [(125, 2)]
+    finally:
+        world.close()
@@ -0,0 +1,49 @@
+"""Chunk generation: prefetched chunks match on-demand ones, and a closed prefetcher leaves the world usable."""
+
+import pytest
+
+from terrain import ChunkPrefetcher, TerrainColumns, generate_chunk
+
+CHUNK_SIZE = 16
+TOP, BOTTOM = -100, 100
+
+
+def test_prefetched_chunks_match_generated():
+    columns = TerrainColumns(3, -50, 50)
+    prefetcher = ChunkPrefetcher(columns, CHUNK_SIZE, TOP, BOTTOM)
+    try:
+        prefetcher.request(-2, 4, 0)
+        for future in list(prefetcher.pending):
+            future.result()
+        prefetcher.collect()
+        for chunk_x in range(-2, 2):
+            assert prefetcher.take((chunk_x, 0)) == generate_chunk(columns, chunk_x, 0, CHUNK_SIZE, TOP, BOTTOM)
+        assert prefetcher.take((2, 0)) is None
+    finally:
+        prefetcher.close()
+
+
+def test_close_forgets_requests():
+    prefetcher = ChunkPrefetcher(TerrainColumns(3, -50, 50), CHUNK_SIZE, TOP, BOTTOM)
+    for chunk_y in range(-3, 3):
+        prefetcher.request(0, 8, chunk_y)
+    prefetcher.close()
+
+    prefetcher.collect()  # Nothing left to collect, cancelled or not
+    assert not prefetcher.pending and not prefetcher.requested and not prefetcher.ready
+    assert prefetcher.take((0, 0)) is None
+
+
+@pytest.mark.usefixtures('blank_assets')
+def test_world_keeps_loading_after_close():
+    from world import World
+
+    world = World(seed=3)
+    assert world.prefetcher.pending  # The ring around the spawn point is being generated
+    world.close()
+    world.update_chunks(200, 0)
+    world.update_chunks(-500, 40)
+
+    chunk_x, chunk_y = -500 // world.chunk_size, 40 // world.chunk_size
+    assert bytes(world.chunks[(chunk_x, chunk_y)].blocks) == generate_chunk(
+        world.columns, chunk_x, chunk_y, world.chunk_size, world.top_row, world.top_row + world.world_height)
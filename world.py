@@ -1,117 +1,314 @@
 import pygame
 import pygame.gfxdraw
 import random
-import time
 import math
+import zlib
+from assets import assets
+from blocks import (AIR, BLOCK_TEXTURES, BLOCK_TYPES, BREAK_ITEMS, DROPS, FLUID_LEVEL, MAX_LIGHT, SOLID, block_id,
+                    block_type, item_bit)
+from chunk import Chunk
+from chunk_cache import ChunkSurfaceCache
+from edits import WorldEdit
+from entities import Entities
+from lighting import Lighting
+from physics import BlockPhysics
+from profiler import profiler
+from terrain import ChunkPrefetcher, TerrainColumns, generate_chunk, generate_chunk_row
+
 
 class World:
-    def __init__(self):
+    def __init__(self, seed=None, store=None, spawn=(0, 0)):
+        """
+        :param seed: World seed; the same seed always produces the same terrain. A random one is used when None.
+        :param store: Optional SaveStore that modified chunks are saved to and loaded back from.
+        :param spawn: Tile position the first chunks are loaded around, e.g. where a saved player stands.
+        """
         self.tile_size = 32  # Size of each tile in pixels
-        self.tiles = pygame.sprite.Group()
-        self.tile_map = {}
-        self.world_width = 200
-        self.world_height = 200
-        self.render_distance = 25
+        self.world_height = 200  # Height in tiles; the world is unbounded horizontally
+
+        # Chunked storage: chunks are generated around the player and evicted once far away
+        self.chunk_size = 16  # Width and height of a chunk in tiles
+        self.load_radius = 3  # Chunks kept loaded around the player, in chunks
+        self.unload_radius = 5  # Chunks further away than this are evicted
+        self.chunks = {}  # (chunk_x, chunk_y) -> Chunk
+        self.paged_chunks = {}  # (chunk_x, chunk_y) -> compressed blocks of modified chunks that were evicted
+        self.store = store
+        self.unsaved_chunks = set()  # Chunks modified since the last save snapshot
+        self.changed_rects = []  # World pixel rects modified since the renderer last redrew them (see Game.render)
+        self.change_listeners = []  # Called with (chunk position, changed tiles) on every block change
+        if store is not None and store.chunk_size != self.chunk_size:
+            raise ValueError(f'The save uses {store.chunk_size}-tile chunks, the world {self.chunk_size}-tile ones')
+        self.top_row = -(self.world_height // 2)  # Tile row of the top of the world
+        self.seed = random.getrandbits(32) if seed is None else seed
+        self.columns = TerrainColumns(self.seed, -(self.world_height // 4), self.world_height // 4)
+        # The ring of chunks just outside load_radius is generated in the background before the player reaches it
+        self.prefetch = True
+        self.prefetch_centers = None  # Chunk positions the ring was last requested around
+        self.prefetcher = ChunkPrefetcher(self.columns, self.chunk_size, self.top_row, self.top_row + self.world_height)
         self.load_textures()
+        self.lighting = Lighting(self)
+        self.chunk_cache = ChunkSurfaceCache(self.block_atlas, self.block_atlas_areas, self.tile_size, self.chunk_size,
+                                             self.lighting)
         self.clouds = self.generate_clouds()
-        self.generate_world()
+        self.entities = Entities(self)
+        self.physics = BlockPhysics(self)
+        self.explosion_radius = 2  # Radius in tiles of the crater a bomb leaves
+        self.generate_world(*spawn)
 
         # Day-Night Cycle
-        self.start_time = time.time()  # Track the start time of the game
-        self.day_night_duration = 60  
+        self.elapsed_time = 0.0  # Simulated seconds since the game started, advanced by advance_clock
+        self.day_night_duration = 60
 
     def load_textures(self):
-        self.textures = {
-            'dirt': pygame.image.load('assets/blocks/dirt.png'),
-            'grass': pygame.image.load('assets/blocks/grass.png'),
-            'cobblestone': pygame.image.load('assets/blocks/cobblestone.png'),
-            'wood': pygame.image.load('assets/blocks/wood.png'),
-            'flower1': pygame.image.load('assets/blocks/flower1.png'),
-            'flower2': pygame.image.load('assets/blocks/flower2.png'),
-            'bomb': pygame.image.load('assets/blocks/shrooms.png'),
-            'cloud': pygame.image.load('assets/gui/cloud2.png'),
-            'gem': pygame.image.load('assets/blocks/diamond_ore.png'),
-            'leaves': pygame.image.load('assets/blocks/leaves.png'),
-            'granite': pygame.image.load('assets/blocks/granite.png'),
-            'andesite': pygame.image.load('assets/blocks/andesite.png'),
+        self.texture_paths = {
+            'cloud': 'assets/gui/cloud2.png',
         }
+        self.textures = {name: assets.image(path) for name, path in self.texture_paths.items()}
+        # Block textures come from the block registry, packed into one atlas with one slot per block ID
+        # (air's slot stays empty)
+        self.block_atlas, self.block_atlas_areas = assets.atlas(BLOCK_TEXTURES, self.tile_size)
+
+    def generate_world(self, tile_x=0, tile_y=0):
+        """Generate the chunks around the spawn point; the rest of the world is generated on demand."""
+        self.update_chunks(tile_x, tile_y)
+
+    def generate_chunk(self, chunk_x, chunk_y):
+        """Generate a chunk from the terrain columns, or restore it if it was modified before eviction or saved."""
+        paged = self.paged_chunks.pop((chunk_x, chunk_y), None)
+        if paged is None and self.store is not None:
+            paged = self.store.read_compressed((chunk_x, chunk_y))
+        if paged is not None:
+            chunk = Chunk(chunk_x, chunk_y, self.chunk_size, zlib.decompress(paged))
+            chunk.modified = True
+            return chunk
+
+        blocks = self.prefetcher.take((chunk_x, chunk_y))
+        if blocks is None:
+            blocks = generate_chunk(self.columns, chunk_x, chunk_y, self.chunk_size,
+                                    self.top_row, self.top_row + self.world_height)
+        return Chunk(chunk_x, chunk_y, self.chunk_size, blocks)
+
+    def get_chunk(self, chunk_x, chunk_y):
+        """Return the chunk at the chunk coordinates, generating it if it is not loaded."""
+        chunk = self.chunks.get((chunk_x, chunk_y))
+        if chunk is None:
+            chunk = self.generate_chunk(chunk_x, chunk_y)
+            self.chunks[(chunk_x, chunk_y)] = chunk
+            self.lighting.light_chunk(chunk)
+        return chunk
+
+    def update_chunks(self, tile_x, tile_y):
+        """Load the chunks around a tile position and evict the ones that are now far away."""
+        self.update_chunks_around([(tile_x, tile_y)])
+
+    def update_chunks_around(self, positions):
+        """Load the chunks around each of several tile positions, e.g. every player's, and evict those far from all."""
+        self.prefetcher.collect()
+        for tile_x, tile_y in positions:
+            self.load_chunks(tile_x, tile_y)
+
+        # Unmodified chunks can be regenerated, so only modified ones are paged out
+        centers = [(tile_x // self.chunk_size, tile_y // self.chunk_size) for tile_x, tile_y in positions]
+        evicted = []
+        for chunk_pos in list(self.chunks):
+            if all(max(abs(chunk_pos[0] - center_x), abs(chunk_pos[1] - center_y)) > self.unload_radius
+                   for center_x, center_y in centers):
+                chunk = self.chunks.pop(chunk_pos)
+                evicted.append(chunk)
+                if chunk.modified:
+                    self.paged_chunks[chunk_pos] = zlib.compress(chunk.blocks)
+        if evicted:
+            self.lighting.unload_chunks(evicted)  # The chunks left beside them lose the light they gave
+
+        # The ring only moves when a player crosses into another chunk
+        if self.prefetch and centers != self.prefetch_centers:
+            self.prefetch_centers = centers
+            for center_x, center_y in centers:
+                self.prefetch_chunks(center_x, center_y)
+            # Prefetched chunks the players turned away from are dropped rather than kept around
+            radius = self.load_radius + 1
+            for chunk_pos in list(self.prefetcher.ready):
+                if chunk_pos in self.chunks or all(max(abs(chunk_pos[0] - center_x), abs(chunk_pos[1] - center_y))
+                                                   > radius for center_x, center_y in centers):
+                    self.prefetcher.discard(chunk_pos)
+
+    def prefetch_chunks(self, center_x, center_y):
+        """Ask the prefetcher for the chunks one past load_radius of a chunk position that nothing holds yet."""
+        radius = self.load_radius + 1
+        top = self.top_row // self.chunk_size
+        bottom = (self.top_row + self.world_height - 1) // self.chunk_size
+        for chunk_y in range(max(center_y - radius, top), min(center_y + radius, bottom) + 1):
+            # The whole row at the top and bottom of the ring, its two ends in between
+            if abs(chunk_y - center_y) == radius:
+                ring = range(center_x - radius, center_x + radius + 1)
+            else:
+                ring = (center_x - radius, center_x + radius)
+            wanted = [chunk_x for chunk_x in ring if (chunk_x, chunk_y) not in self.chunks
+                      and (chunk_x, chunk_y) not in self.prefetcher.requested and not self.is_stored((chunk_x, chunk_y))]
+            # One task per run of adjacent chunks
+            start = 0
+            for index in range(1, len(wanted) + 1):
+                if index == len(wanted) or wanted[index] != wanted[index - 1] + 1:
+                    self.prefetcher.request(wanted[start], index - start, chunk_y)
+                    start = index
+
+    def load_chunks(self, tile_x, tile_y):
+        """Load the chunks within load_radius of a tile position."""
+        center_x = tile_x // self.chunk_size
+        center_y = tile_y // self.chunk_size
+        top = self.top_row // self.chunk_size
+        bottom = (self.top_row + self.world_height - 1) // self.chunk_size
+
+        for chunk_y in range(max(center_y - self.load_radius, top), min(center_y + self.load_radius, bottom) + 1):
+            missing = [chunk_x for chunk_x in range(center_x - self.load_radius, center_x + self.load_radius + 1)
+                       if (chunk_x, chunk_y) not in self.chunks]
+            unfetched = [chunk_x for chunk_x in missing if (chunk_x, chunk_y) not in self.prefetcher.ready]
+            if len(unfetched) > 1:
+                # Generate the missing part of the row in one batch; paged-out and saved chunks are restored
+                # instead, and prefetched ones taken as they are
+                first = unfetched[0]
+                row = generate_chunk_row(self.columns, first, unfetched[-1] - first + 1, chunk_y,
+                                         self.chunk_size, self.top_row, self.top_row + self.world_height)
+                for chunk_x in unfetched:
+                    if not self.is_stored((chunk_x, chunk_y)):
+                        chunk = Chunk(chunk_x, chunk_y, self.chunk_size, row[chunk_x - first])
+                        self.chunks[(chunk_x, chunk_y)] = chunk
+                        self.lighting.light_chunk(chunk)
+            for chunk_x in missing:
+                self.get_chunk(chunk_x, chunk_y)
+
+    def close(self):
+        """Stop the background generation; the world can still be used, generating on demand."""
+        self.prefetch = False
+        self.prefetcher.close()
+
+    def is_stored(self, chunk_pos):
+        """Whether the chunk has modified blocks held outside self.chunks, paged out or in the save."""
+        return chunk_pos in self.paged_chunks or (self.store is not None and self.store.has_chunk(chunk_pos))
+
+    def snapshot_chunks(self):
+        """
+        Copy the chunks modified since the last snapshot, for saving while the game goes on.
+
+        :return: (loaded, paged): dicts of chunk position to raw block IDs for loaded chunks and to the
+                 compressed blocks for paged-out ones. Both are private copies or immutable bytes.
+        """
+        loaded = {}
+        paged = {}
+        for chunk_pos in self.unsaved_chunks:
+            chunk = self.chunks.get(chunk_pos)
+            if chunk is not None:
+                loaded[chunk_pos] = bytes(chunk.blocks)
+            elif chunk_pos in self.paged_chunks:
+                paged[chunk_pos] = self.paged_chunks[chunk_pos]
+        self.unsaved_chunks.clear()
+        return loaded, paged
+
+    def release_paged(self, paged):
+        """Drop paged-out chunks now written to the store, unless they were paged out again since the snapshot."""
+        for chunk_pos, data in paged.items():
+            if self.paged_chunks.get(chunk_pos) is data:
+                del self.paged_chunks[chunk_pos]
+
+    def get_block_id(self, tile_x, tile_y):
+        """Return the block ID at the tile position; everything above and below the world is air."""
+        if not self.top_row <= tile_y < self.top_row + self.world_height:
+            return AIR
+        return self.get_chunk(tile_x // self.chunk_size, tile_y // self.chunk_size).get(tile_x, tile_y)
+
+    def get_block(self, tile_x, tile_y):
+        """Return the block type at the tile position, or None for air."""
+        return block_type(self.get_block_id(tile_x, tile_y))
+
+    def set_block(self, tile_x, tile_y, block_type):
+        """Place a block of the given type at the tile position, or clear it when block_type is None."""
+        chunk_pos = (tile_x // self.chunk_size, tile_y // self.chunk_size)
+        self.get_chunk(*chunk_pos).set(tile_x, tile_y, block_id(block_type))
+        self.chunk_changed(chunk_pos, [(tile_x, tile_y)])
+
+    def chunk_changed(self, chunk_pos, tiles):
+        """
+        Notify everything that depends on a chunk's blocks that some of its tiles changed: the baked surface,
+        the save, the renderer's dirty area, the entities and the block physics.
 
-    def generate_world(self):
-        """Generate a 2D world layout with cliffs and uneven terrain."""
-        world_data = []
-        cliff_height = self.world_height // 2  # Starting height for the grass layer
-
-        # Initialize rows (vertical filling)
-        for y in range(self.world_height):
-            world_data.append([])
-
-        # Generate terrain
-        for x in range(0, self.world_width):  # Columns (horizontal terrain generation)
-            # Adjust cliff height with some randomness
-            if x > 0:  # Skip the first column to avoid index issues
-                change = random.choice([-1, 0, 1])  # Step up, down, or stay flat
-                cliff_height += change  # Limit height range
-            for y in range(0, self.world_width):  # Rows (vertical filling)
-                if y > 0 and world_data[y - 1][x] == 'wood' and y < cliff_height:
-                    block = 'wood'
-                elif y == cliff_height - 3:
-                    block = 'wood' if random.random() < 0.15 else 'air'
-                elif y < cliff_height:
-                    block = 'air'
-                elif y == cliff_height:
-                    block = 'grass'
-                    if world_data[y - 1][x] != 'wood':
-                        if random.random() < 0.08:  # 8% chance for a flower
-                            # if len(world_data) > y - 1 and len(world_data[y - 1]) > x:
-                                world_data[y - 1][x] = 'flower1' if random.random() < 0.5 else 'flower2'
-                        elif random.random() < 0.15:  # 15% chance for a bomb
-                            # if len(world_data) > y - 1 and len(world_data[y - 1]) > x:
-                                world_data[y - 1][x] = 'bomb'
-                else:       # everything below grass
-                    if y in [cliff_height + 1, cliff_height + 2, cliff_height + 3]:
-                        block = 'dirt'
-                    elif y > cliff_height + 3 and y < cliff_height + 8:
-                        if random.random() < 0.8:
-                            block = 'cobblestone'
-                        else:
-                            block = 'dirt'
-                    else:
-                        ran = random.random()
-                        if ran <= 0.05:
-                            block = 'gem'
-                        elif ran > 0.05 and ran <= 0.4:
-                            block = 'cobblestone'
-                        elif ran > 0.4 and ran <= 0.7:
-                            block = 'granite'
-                        else:
-                            block = 'andesite'
-                # Append block to the correct row
-                world_data[y].append(block)
-
-        # Add leaves around the topmost wood block
-        # Add leaves around the topmost wood block
-
-        for x in range(self.world_width):  # Iterate over columns
-            for y in range(self.world_height):  # Iterate over rows from top to bottom
-                if world_data[y][x] == 'wood':  # Check if the block is wood
-                    # Add leaves above the wood block
-                    if y - 2 >= 0 and world_data[y - 2][x] == 'air':  # Check bounds and air block
-                        world_data[y - 2][x] = 'leaves'
-
-                    # Add surrounding leaves
-                    for dx, dy in [(0, -1), (-1, -1), (1, -1), (-1, 0), (1, 0)]:
-                        nx, ny = x + dx, y + dy
-                        if 0 <= nx < self.world_width and 0 <= ny < self.world_height:  # Ensure within bounds
-                            if world_data[ny][nx] == 'air':  # Only replace air blocks with leaves
-                                world_data[ny][nx] = 'leaves'
-                    break  # Stop after processing the first wood block in this column
-        
-        for y in range(0, self.world_height):
-            for x in range(0, self.world_width):
-                if world_data[y][x] != 'air':
-                    tile = Tile(x - (self.world_width // 2), y - (self.world_height // 2), world_data[y][x], self.textures[world_data[y][x]], self.tile_size)
-                    self.tiles.add(tile)
-                    self.tile_map[(x - (self.world_width // 2), y - (self.world_height // 2))] = tile
+        set_block calls this for its single tile; a WorldEdit calls it once per chunk for all of its tiles.
+        """
+        self.chunk_cache.mark_dirty(chunk_pos)
+        self.unsaved_chunks.add(chunk_pos)
+        left = min(tile_x for tile_x, _ in tiles)
+        top = min(tile_y for _, tile_y in tiles)
+        right = max(tile_x for tile_x, _ in tiles)
+        bottom = max(tile_y for _, tile_y in tiles)
+        self.changed_rects.append(pygame.Rect(left * self.tile_size, top * self.tile_size,
+                                              (right - left + 1) * self.tile_size, (bottom - top + 1) * self.tile_size))
+        self.entities.wake_area(left, top, right, bottom)
+        for tile_x, tile_y in tiles:
+            self.physics.schedule(tile_x, tile_y)
+        self.lighting.relight(tiles)
+        for listener in self.change_listeners:
+            listener(chunk_pos, tiles)
+
+    def add_change_listener(self, listener):
+        self.change_listeners.append(listener)
+
+    def edit(self):
+        """Start a batch of block changes; use as `with world.edit() as edit:` to apply them on exit."""
+        return WorldEdit(self)
+
+    def fill_region(self, left, top, right, bottom, block_type):
+        """Set every tile of an inclusive tile rectangle to a block type; returns the number of tiles changed."""
+        edit = self.edit()
+        edit.fill(left, top, right, bottom, block_type)
+        return edit.apply()
+
+    def replace_region(self, left, top, right, bottom, old_type, new_type):
+        """Turn the old_type blocks of an inclusive tile rectangle into new_type; returns the number changed."""
+        edit = self.edit()
+        edit.replace(left, top, right, bottom, old_type, new_type)
+        return edit.apply()
+
+    def clear_radius(self, center_x, center_y, radius):
+        """Clear every tile within radius tiles of a tile; returns the number of tiles changed."""
+        edit = self.edit()
+        edit.clear_radius(center_x, center_y, radius)
+        return edit.apply()
+
+    def stamp(self, tile_x, tile_y, structure):
+        """Place a structure ((dx, dy) -> block type) with its origin at a tile; returns the number changed."""
+        edit = self.edit()
+        edit.stamp(tile_x, tile_y, structure)
+        return edit.apply()
+
+    def detonate(self, tile_x, tile_y):
+        """Blow up the bomb at a tile, leaving a crater of explosion_radius tiles."""
+        return self.clear_radius(tile_x, tile_y, self.explosion_radius)
+
+    def get_tile_rect(self, tile_x, tile_y):
+        """Return the pixel rect covered by the tile position."""
+        return pygame.Rect(tile_x * self.tile_size, tile_y * self.tile_size, self.tile_size, self.tile_size)
+
+    def get_blocks_in_rect(self, rect):
+        """Return (block ID, tile rect) for the blocks whose grid cells overlap the pixel rect, in row-major order."""
+        start_x = rect.left // self.tile_size
+        end_x = (rect.right - 1) // self.tile_size
+        start_y = rect.top // self.tile_size
+        end_y = (rect.bottom - 1) // self.tile_size
+        profiler.count('collision_checks', (end_x - start_x + 1) * (end_y - start_y + 1))
+
+        blocks = []
+        for y in range(start_y, end_y + 1):
+            for x in range(start_x, end_x + 1):
+                block_id = self.get_block_id(x, y)
+                if block_id != AIR:
+                    blocks.append((block_id, self.get_tile_rect(x, y)))
+        return blocks
+
+    def is_solid_below(self, rect):
+        """Check whether a solid block sits directly beneath the rect, without moving it."""
+        for block, _ in self.get_blocks_in_rect(rect.move(0, 1)):
+            if SOLID[block]:
+                return True
+        return False
 
     def generate_clouds(self):
         """Generate random cloud positions in the sky."""
@@ -124,10 +321,14 @@ class World:
             clouds.append((x, y, cloud_width, cloud_height))
         return clouds
 
+    def advance_clock(self, dt):
+        """Advance the world clock by one simulation step of dt seconds."""
+        self.elapsed_time += dt
+
     def update_day_night_cycle(self):
         """Update the sky's color based on the time of day (1 minute loop from very light blue to dark blue)."""
-        elapsed_time = time.time() - self.start_time  # Elapsed time since game start
-        cycle_progress = (elapsed_time % self.day_night_duration) / self.day_night_duration  # Progress from 0 to 1
+        # Simulated rather than wall-clock time, so the cycle follows the game's time scale
+        cycle_progress = (self.elapsed_time % self.day_night_duration) / self.day_night_duration  # Progress from 0 to 1
 
         # Use sine wave to smoothly transition between 0 and 1 over the course of 60 seconds
         transition_progress = (math.sin(2 * math.pi * cycle_progress - math.pi / 2) + 1) / 2
@@ -144,34 +345,52 @@ class World:
         # Set the sky color based on the interpolation
         self.sky_color = (r, g, b)
 
-    def render(self, screen, camera, player):
-        """Render the world, including the background and tiles."""
-        # Update the day-night cycle and get the sky color
-        self.update_day_night_cycle()
+        # The tiles' sky light dims along with the sky; the baked chunks are re-shaded when it steps, a few
+        # per frame (see refresh_shading)
+        if self.lighting.set_time_of_day(transition_progress):
+            self.chunk_cache.mark_all_stale()
 
-        # Draw the sky background with fading effect
-        pygame.draw.rect(screen, self.sky_color, (0, 0, 800, 600))  # Apply the interpolated sky color
+    def refresh_shading(self):
+        """Re-bake a few of the chunks still shaded for an earlier time of day; call once per frame, before drawing."""
+        chunk_pixels = self.chunk_size * self.tile_size
+        for chunk_x, chunk_y in self.chunk_cache.rebake_stale(self.chunks):
+            self.changed_rects.append(pygame.Rect(chunk_x * chunk_pixels, chunk_y * chunk_pixels,
+                                                  chunk_pixels, chunk_pixels))
 
-        for cloud in self.clouds:
-            screen.blit(self.textures['cloud'], (cloud[0], cloud[1]))
+    def render(self, screen, camera, player):
+        """Render the sky, the clouds and the chunks and entities that overlap the camera's viewport."""
+        # Update the day-night cycle and fill the screen (or its clip area) with the sky color
+        self.update_day_night_cycle()
+        screen.fill(self.sky_color)
 
-        # Get player's tile position
-        player_tile_x, player_tile_y = player.get_pos()
+        # Only what lies inside both the camera's viewport and the screen's clip area can show up, so the
+        # culling follows window resizes and shrinks to the dirty rect being redrawn
+        offset_x, offset_y = int(camera.offset.x), int(camera.offset.y)
+        view = camera.viewport().clip(screen.get_clip().move(offset_x, offset_y))
+        chunk_pixels = self.chunk_size * self.tile_size
+        first_x = view.left // chunk_pixels
+        last_x = (view.right - 1) // chunk_pixels
+        first_y = max(view.top // chunk_pixels, self.top_row // self.chunk_size)
+        last_y = min((view.bottom - 1) // chunk_pixels, (self.top_row + self.world_height - 1) // self.chunk_size)
 
-        # Calculate the range of tiles to render
-        start_x = player_tile_x - self.render_distance
-        end_x = player_tile_x + self.render_distance
-        start_y = player_tile_y - self.render_distance
-        end_y = player_tile_y + self.render_distance
+        # Keep at least two screenfuls of baked chunks, however large the window gets
+        visible = max(last_x - first_x + 1, 0) * max(last_y - first_y + 1, 0)
+        self.chunk_cache.max_surfaces = max(self.chunk_cache.max_surfaces, 2 * visible)
 
-        # Render visible tiles
-        for y in range(start_y, end_y + 1):
-            for x in range(start_x, end_x + 1):
-                if (x, y) in self.tile_map:
-                    tile = self.tile_map[(x, y)]
-                    screen_x = tile.rect.x - camera.offset.x
-                    screen_y = tile.rect.y - camera.offset.y
-                    screen.blit(tile.image, (screen_x, screen_y))
+        # Clouds and the baked surfaces of the visible chunks, submitted as one batch
+        batch = [(self.textures['cloud'], (cloud[0], cloud[1])) for cloud in self.clouds]
+        for chunk_y in range(first_y, last_y + 1):
+            for chunk_x in range(first_x, last_x + 1):
+                chunk = self.get_chunk(chunk_x, chunk_y)
+                # All-air chunks are skipped unless some of their air is out of the sky light and shaded
+                if chunk.block_count or chunk.sky_light.count(MAX_LIGHT) != len(chunk.sky_light):
+                    position = (chunk_x * chunk_pixels - offset_x, chunk_y * chunk_pixels - offset_y)
+                    batch.append((self.chunk_cache.get_surface(chunk), position))
+                    profiler.count('chunks_blitted')
+                    profiler.count('tiles_blitted', chunk.block_count)
+        # Dropped items and other entities go on top of the chunks, in the same batch
+        batch += self.entities.blits(view, offset_x, offset_y)
+        screen.blits(batch, doreturn=False)
     #
     # def render_inventory(self, screen):
     #     inventory_bar_width = 300
@@ -219,72 +438,39 @@ class World:
     #     count_text = font.render(str(count), True, (255, 255, 255))
     #     screen.blit(count_text, (x + 2, y + 2))  # Slight offset for visibility
 
-    def place_block(self, camera, player, x, y, block_type):
-        """Place a block of the specified type at position (x, y) if the player has the block in their inventory."""
-        block_x = x + camera.offset.x
-        block_y = y + camera.offset.y
-        tile_x = block_x // self.tile_size
-        tile_y = block_y // self.tile_size
-        tile_pos = (tile_x, tile_y)
+    def screen_to_tile(self, camera, pos):
+        """Return the tile position under a screen position, e.g. a mouse click."""
+        return (int((pos[0] + camera.offset.x) // self.tile_size), int((pos[1] + camera.offset.y) // self.tile_size))
 
+    def place_block(self, player, tile_x, tile_y, block_type):
+        """Place a block of the specified type at the tile position if the player has the block in their inventory."""
         if abs(player.get_pos()[0] - tile_x) <= 2 and abs(player.get_pos()[1] - tile_y) <= 3:
-            if tile_pos not in self.tile_map:
-                if player.has_block_in_inventory(block_type):
-                    # Remove the block from the player's inventory
-                    player.remove_block_from_inventory(block_type)
-                    tile = Tile(tile_x, tile_y, block_type, self.textures[block_type], self.tile_size)
-                    self.tiles.add(tile)
-                    self.tile_map[tile_pos] = tile
-
-    def break_block(self, camera, player, x, y, tool):
-        """Break a block at position (x, y) if the correct tool is used and add it to the player's inventory."""
-        block_x = x + camera.offset.x
-        block_y = y + camera.offset.y
-        tile_x = block_x // self.tile_size
-        tile_y = block_y // self.tile_size
-        tile_pos = (tile_x, tile_y)
-
-        block_broken = False
+            target = self.get_block_id(tile_x, tile_y)
+            # Blocks can be placed into fluids, displacing them
+            if (target == AIR or FLUID_LEVEL[target]) and player.inventory.has(block_type):
+                # Remove the block from the player's inventory
+                player.inventory.remove(block_type)
+                self.set_block(tile_x, tile_y, block_type)
+
+    def break_block(self, player, tile_x, tile_y, tool):
+        """Break the block at the tile position if the correct tool is used, dropping it as an item to pick up."""
         if abs(player.get_pos()[0] - tile_x) <= 2 and abs(player.get_pos()[1] - tile_y) <= 3:
-            # Check if the tile exists in self.tile_map
-            if tile_pos in self.tile_map:
-                tile_sprite = self.tile_map[tile_pos]
-                block_type = tile_sprite.tile_type  # Access the block type
-
-                # Check if the correct tool is used
-                if (tool == 'pickaxe'):
-                    if block_type in ['cobblestone', 'andesite', 'granite', 'gem', 'flower1', 'flower2'] and block_type != 'leaves':
-                        block_broken = True
-                elif (tool == 'axe'):
-                    if block_type in ['wood', 'leaves', 'flower1', 'flower2'] and block_type != 'leaves':
-                        block_broken = True
-                elif (tool == 'shovel'):
-                    if block_type in ['grass', 'dirt', 'flower1', 'flower2'] and block_type != 'leaves':
-                        block_broken = True
-                if block_broken:
-                    player.add_block_to_inventory(block_type)
-                    tile_sprite.kill()  # Remove sprite from rendering and groups
-                    del self.tile_map[tile_pos]  # Remove tile from the dictionary
-                elif block_type in ['leaves', 'bomb']:
-                    tile_sprite.kill()  # Remove sprite from rendering and groups
-                    del self.tile_map[tile_pos]  # Remove tile from the dictionary
-
-    def handle_click(self, player, camera, pos, tool, button):
-        """Handle player clicks, breaking blocks and placing blocks."""
-        x, y = pos
+            # Check if there is a block at the position that the held item can break (see the block registry)
+            block = self.get_block_id(tile_x, tile_y)
+            if block != AIR and BREAK_ITEMS[block] & item_bit(tool):
+                if DROPS[block] != AIR:
+                    self.entities.spawn_item(BLOCK_TYPES[DROPS[block]], tile_x, tile_y)
+                self.set_block(tile_x, tile_y, None)  # Remove block from its chunk
+
+    def handle_click(self, player, tile_pos, tool, button):
+        """Handle player clicks on a tile, breaking blocks and placing blocks."""
+        tile_x, tile_y = tile_pos
 
         # Check if the player is breaking a block
-        self.break_block(camera, player, x, y, tool)
+        self.break_block(player, tile_x, tile_y, tool)
 
         # Check if the player is placing a block (only for the right mouse button click)
         if button == 3:  # Right mouse button click
-            block_type = player.get_selected_block()  # Assuming the player has a method to get the selected block type
+            block_type = player.inventory.selected_block()
             if block_type:
-                self.place_block(camera, player, x, y, block_type)
-
-class Tile(pygame.sprite.Sprite):
-    def __init__(self, x, y, tile_type, texture, tile_size):
-        super().__init__()
-        self.image = texture
-        self.rect = self.image.get_rect(topleft=(x * tile_size, y * tile_size))
-        self.tile_type = tile_type
\ No newline at end of file
+                self.place_block(player, tile_x, tile_y, block_type)